@@ -0,0 +1,226 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# -----------------------------
+# PLC メモリのチェックポイント（ウォームスタート用）
+# -----------------------------
+# X / Y / M / D・タイマー / カウンター・heartbeat / scan_count を、メモリマップした
+# ファイルの A / B 2つのスロットへ交互に書く。
+#
+#   header : magic(8s) version(H) reserved(H) slot_size(I) x(I) y(I) m(I) d(I)
+#   slot   : seq(Q) scan(Q) heartbeat(Q) time(d) tc_count(I) crc(I) | image | tc entries
+#   image  : X / Y / M を1点1byte、D を int64 で並べたもの
+#   tc     : area(B) kind(B) index(H) value(d) flags(B) をタイマー / カウンターの件数ぶん
+#
+# 書き込みは前回と反対のスロットに、image を pack_into で直接書き（バッファ1回分のコピー）、
+# 最後にスロットヘッダ（seq と crc）を書く。途中でプロセスが kill されても、もう片方の
+# スロットは完全なまま残る。読み込み時は crc が合うスロットのうち seq が大きい方を使う。
+# ファイルへの反映は OS のページキャッシュに任せ、msync は close 時だけ行う
+# （プロセスの kill には耐えるが、OS ごと落ちた場合は直近の内容が失われることがある）。
+
+CKPT_MAGIC = b"PLCCKPT1"
+CKPT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIIIII")
+SLOT_HEADER = struct.Struct("<QQQdII")
+TC_ENTRY = struct.Struct("<BBHdB")
+
+TC_RESERVE = 1024  # スロットに確保するタイマー / カウンターの件数（足りなければ作り直す）
+
+# tc の area / kind
+TC_AREAS = "TC"
+KIND_CONTACT = 0   # T[1] / C[1]（接点の値）
+KIND_STATE = 1     # "self.mem.T[1]" をキーにした状態 dict
+
+# 状態 dict の値 -> (value, flags)
+STATE_FIELDS = {
+    "T": ("acc", ("on",)),
+    "C": ("count", ("prev", "done")),
+}
+
+
+def image_struct(x, y, m, d):
+    return struct.Struct(f"<{x}?{y}?{m}?{d}q")
+
+
+class Checkpoint:
+    def __init__(self, path, mem, every_scans=1):
+        self.path = path
+        self.mem = mem
+        self.every_scans = max(1, int(every_scans))
+        self.dims = (len(mem.X), len(mem.Y), len(mem.M), len(mem.D))
+        self.image = image_struct(*self.dims)
+        self.seq = 0
+        self.writes = 0
+        self.fp = None
+        self.mm = None
+
+    @classmethod
+    def from_config(cls, name, plc_conf, mem, enable=False):
+        """
+        plc.yaml の checkpoint から作る（無く、enable でもなければ None）。
+          checkpoint:
+            dir: logs          # 省略時は log_dir
+            every_scans: 1     # 何スキャンごとに書くか
+        """
+        conf = plc_conf.get("checkpoint")
+        if not conf and not enable:
+            return None
+        if not isinstance(conf, dict):
+            conf = {}
+        ckpt_dir = conf.get("dir", plc_conf.get("log_dir"))
+        filename = f"{name}.ckpt"
+        if ckpt_dir:
+            os.makedirs(ckpt_dir, exist_ok=True)
+            path = os.path.join(ckpt_dir, filename)
+        else:
+            path = filename
+        return cls(path, mem, every_scans=conf.get("every_scans", 1))
+
+    # -----------------------------
+    # 読み込み（起動時）
+    # -----------------------------
+    def load(self):
+        """ファイルから最新の正しいスロットを Memory.snapshot() と同じ形式で返す（無ければ None）"""
+        try:
+            with open(self.path, "rb") as fp:
+                data = fp.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, _, slot_size, x, y, m, d = HEADER.unpack_from(data, 0)
+        if magic != CKPT_MAGIC or version != CKPT_VERSION:
+            return None
+
+        best = None
+        for i in range(2):
+            off = HEADER.size + i * slot_size
+            if off + SLOT_HEADER.size > len(data):
+                continue
+            seq, scan, heartbeat, t, tc_count, crc = SLOT_HEADER.unpack_from(data, off)
+            body = off + SLOT_HEADER.size
+            image = image_struct(x, y, m, d)
+            end = body + image.size + tc_count * TC_ENTRY.size
+            if seq == 0 or end > off + slot_size or end > len(data):
+                continue
+            if zlib.crc32(data[body:end], zlib.crc32(SLOT_HEADER.pack(seq, scan, heartbeat, t, tc_count, 0))) != crc:
+                continue
+            if best is None or seq > best[0]:
+                best = (seq, scan, heartbeat, t, tc_count, body, image)
+        if best is None:
+            return None
+
+        seq, scan, heartbeat, t, tc_count, body, image = best
+        values = image.unpack_from(data, body)
+        snap = {
+            "X": list(values[:x]),
+            "Y": list(values[x:x + y]),
+            "M": list(values[x + y:x + y + m]),
+            "D": list(values[x + y + m:]),
+            "T": [], "C": [],
+            "heartbeat": heartbeat,
+            "scan_count": scan,
+            "time": t,
+        }
+        pos = body + image.size
+        for area, kind, index, value, flags in TC_ENTRY.iter_unpack(data[pos:pos + tc_count * TC_ENTRY.size]):
+            name = TC_AREAS[area]
+            if kind == KIND_CONTACT:
+                snap[name].append([index, bool(flags & 1)])
+            else:
+                value_key, flag_keys = STATE_FIELDS[name]
+                # タイマーの acc はスキャン周期 [ms] の積算（float）、カウンターは整数
+                state = {value_key: value if name == "T" else int(value)}
+                for bit, key in enumerate(flag_keys):
+                    state[key] = bool(flags >> bit & 1)
+                snap[name].append([f"self.mem.{name}[{index}]", state])
+        self.seq = seq
+        return snap
+
+    # -----------------------------
+    # 書き込み（スキャンごと）
+    # -----------------------------
+    def start(self):
+        """ファイルを作り直し、現在のメモリを最初のチェックポイントとして書く"""
+        self.open(max(TC_RESERVE, 2 * len(self.tc_entries())))
+
+    def open(self, tc_reserve):
+        """
+        一時ファイルに作ってから置き換える（前回のファイルは最初の書き込みが終わるまで残す）。
+        タイマー / カウンターが tc_reserve を超えたときも作り直す
+        """
+        self.close()
+        slot_size = SLOT_HEADER.size + self.image.size + tc_reserve * TC_ENTRY.size
+        size = HEADER.size + 2 * slot_size
+        tmp = self.path + ".tmp"
+        self.fp = open(tmp, "w+b")
+        self.fp.truncate(size)
+        self.mm = mmap.mmap(self.fp.fileno(), size)
+        HEADER.pack_into(self.mm, 0, CKPT_MAGIC, CKPT_VERSION, 0, slot_size, *self.dims)
+        self.slot_size = slot_size
+        self.tc_reserve = tc_reserve
+        self.write_slot(self.mem.sys.scan_count, self.tc_entries())
+        os.replace(tmp, self.path)
+
+    def on_scan(self):
+        scan = self.mem.sys.scan_count
+        if scan % self.every_scans == 0:
+            self.write(scan)
+
+    def tc_entries(self):
+        tc = []
+        for name, area in (("T", 0), ("C", 1)):
+            for key, v in getattr(self.mem, name).items():
+                if isinstance(key, int):
+                    tc.append((area, KIND_CONTACT, key, 0.0, 1 if v else 0))
+                else:
+                    value_key, flag_keys = STATE_FIELDS[name]
+                    flags = 0
+                    for bit, k in enumerate(flag_keys):
+                        if v.get(k):
+                            flags |= 1 << bit
+                    tc.append((area, KIND_STATE, int(key[key.index("[") + 1:-1]), float(v.get(value_key, 0)), flags))
+        return tc
+
+    def write(self, scan):
+        tc = self.tc_entries()
+        if len(tc) > self.tc_reserve:
+            self.open(len(tc) * 2)
+        else:
+            self.write_slot(scan, tc)
+
+    def write_slot(self, scan, tc):
+        mem = self.mem
+        self.seq += 1
+        off = HEADER.size + (self.seq % 2) * self.slot_size
+        body = off + SLOT_HEADER.size
+        mm = self.mm
+        # 書きかけのスロットを使われないよう、先に seq を 0 にする
+        SLOT_HEADER.pack_into(mm, off, 0, 0, 0, 0.0, 0, 0)
+        try:
+            self.image.pack_into(mm, body, *mem.X, *mem.Y, *mem.M, *mem.D)
+        except struct.error:
+            # CALC の割り算などで D に整数以外が入っている場合
+            self.image.pack_into(mm, body, *mem.X, *mem.Y, *mem.M, *(int(v) for v in mem.D))
+        pos = body + self.image.size
+        for entry in tc:
+            TC_ENTRY.pack_into(mm, pos, *entry)
+            pos += TC_ENTRY.size
+
+        t = time.time()
+        crc = zlib.crc32(mm[body:pos], zlib.crc32(SLOT_HEADER.pack(self.seq, scan, mem.sys.heartbeat, t, len(tc), 0)))
+        SLOT_HEADER.pack_into(mm, off, self.seq, scan, mem.sys.heartbeat, t, len(tc), crc)
+        self.writes += 1
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
@@ -2,41 +2,17 @@ import yaml
 import sys
 import time
 import os
-from datetime import datetime
+import glob
+import argparse
+import threading
 from pymodbus.client import ModbusTcpClient
 from pymodbus.exceptions import ModbusIOException
 
-SUPPORTED_DEVICE_VERSIONS = {"1.0"}
-
-# -----------------------------
-# Logger
-# -----------------------------
-class Logger:
-    def __init__(self, device_name, log_dir=None):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{device_name}_{timestamp}.log"
-
-        if log_dir:
-            os.makedirs(log_dir, exist_ok=True)
-            self.log_path = os.path.join(log_dir, filename)
-        else:
-            self.log_path = filename
-
-        self.fp = open(self.log_path, "a", encoding="utf-8")
-        self.log(f"log file opened: {self.log_path}")
+from heartbeat import HeartbeatMonitor, HB_ADDR, HB_LOST
+from simlog import Logger, DEBUG, WARN, ERROR, FATAL
+from signal_trace import TraceReplay, AREA_X, AREA_Y, AREA_D, AREA_NAMES, AREA_CODES
 
-    def log(self, msg):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        line = f"{now} | {msg}"
-        print(line, flush=True)
-        if self.fp:
-            self.fp.write(line + "\n")
-            self.fp.flush()
-            os.fsync(self.fp.fileno())
-
-    def close(self):
-        self.log("log file closed")
-        self.fp.close()
+SUPPORTED_DEVICE_VERSIONS = {"1.0"}
 
 # -----------------------------
 # device.yaml loader
@@ -57,118 +33,210 @@ def load_device_yaml(filename):
 
     return conf["device"]
 
+def expand_device_paths(paths):
+    """
+    ファイル / ディレクトリ / glob を device.yaml のリストに展開する。
+    ディレクトリと glob は混在する plc/ladder 等の yaml を含むため、
+    kind: device のものだけを拾う（明示指定のファイルはそのまま検証に回す）。
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = sorted(glob.glob(os.path.join(path, "*.yaml")))
+        elif glob.has_magic(path):
+            candidates = sorted(glob.glob(path))
+        else:
+            files.append(path)
+            continue
+
+        for c in candidates:
+            try:
+                with open(c, encoding="utf-8") as f:
+                    conf = yaml.safe_load(f)
+            except (OSError, yaml.YAMLError):
+                continue
+            if isinstance(conf, dict) and conf.get("kind") == "device":
+                files.append(c)
+
+    # 同じファイルが複数回指定されても1台として扱う
+    return list(dict.fromkeys(files))
+
 # -----------------------------
-# Device Simulator
+# PLC Link（接続 + heartbeat 監視）
 # -----------------------------
-class DeviceSimulator:
+class PLCLost(RuntimeError):
+    """PLC との通信断 / heartbeat 停止が確定したことを示す"""
+
+
+class PLCLink:
+    """
+    1台の PLC への Modbus 接続と heartbeat 監視。
+    ホストモードでは同じ PLC を向く複数デバイスがこれを共有する。
+    """
     MAX_PLC_ERRORS = 3
     RECONNECT_WAIT = 1.0
 
     # heartbeat 監視設定
-    HEARTBEAT_ADDR = 10000
-    HEARTBEAT_TIMEOUT = 3.0   # 秒（変化しなければ NG）
-
-    def __init__(self, yaml_file):
-        device = load_device_yaml(yaml_file)
-
-        self.name = device["name"]
-        self.signals = device["signals"]
-        self.cycle = device.get("cycle_ms", 100) / 1000
-        self.log_dir = device.get("log_dir")
+    HEARTBEAT_TIMEOUT = 3.0   # 秒（heartbeat.timeout_ms の既定値。変化しなければ NG）
 
-        plc = device["plc"]
-        self.plc_host = plc["host"]
-        self.plc_port = plc["port"]
-
-        self.logger = Logger(self.name, self.log_dir)
-        self.log = self.logger.log
-
-        self.log(f"loading config: {yaml_file}")
-        self.log(f"signals={list(self.signals.keys())}")
+    def __init__(self, host, port, log, label=None, heartbeat=None):
+        self.host = host
+        self.port = port
+        self.log = log
+        self.label = label or f"PLC:{host}:{port}"
+        self.key = f"{host}:{port}"
 
         self.client = None
         self.plc_error_count = 0
+        self.retry_at = 0.0  # 次に再接続を試みてよい時刻
 
-        # heartbeat 状態
-        self.last_heartbeat = None
-        self.last_hb_change = time.time()
-
-        self.connect_plc()
-
-        self.log(f"[Device:{self.name}] cycle={self.cycle}s")
-        self.last_alive = time.time()
+        # heartbeat 状態（読み出しは heartbeat.period_ms ごと）
+        self.heartbeat = HeartbeatMonitor.from_config(heartbeat, self.HEARTBEAT_TIMEOUT, self.log)
 
     # -----------------------------
     # PLC Connection
     # -----------------------------
-    def connect_plc(self):
-        self.log(f"[Device:{self.name}] connecting to PLC {self.plc_host}:{self.plc_port}")
-        self.client = ModbusTcpClient(self.plc_host, port=self.plc_port, timeout=2)
+    def connect(self):
+        self.log(f"[{self.label}] connecting to PLC {self.host}:{self.port}")
+        self.client = ModbusTcpClient(self.host, port=self.port, timeout=2)
 
         if not self.client.connect():
-            raise RuntimeError("initial PLC connection failed")
+            raise ConnectionError("PLC connection failed")
 
-        self.log(f"[Device:{self.name}] PLC connected")
+        self.log(f"[{self.label}] PLC connected")
 
         # heartbeat 初期化
-        self.last_heartbeat = None
-        self.last_hb_change = time.time()
-
-    def handle_plc_error(self, e):
+        self.heartbeat.reset(self.key)
+
+    def ensure_connected(self):
+        """
+        接続が切れていれば再接続する。待機時間中は False を返し、
+        ループを止めずに次の周期へ回す。
+        """
+        if self.client and self.client.is_socket_open():
+            return True
+        if time.time() < self.retry_at:
+            return False
+        self.connect()
+        return True
+
+    def handle_error(self, e):
         self.plc_error_count += 1
         self.log(
-            f"[Device:{self.name}][WARN] PLC communication error "
-            f"({self.plc_error_count}/{self.MAX_PLC_ERRORS}): {e}"
+            f"[{self.label}][WARN] PLC communication error "
+            f"({self.plc_error_count}/{self.MAX_PLC_ERRORS}): {e}",
+            level=WARN,
         )
 
-        try:
-            self.client.close()
-        except Exception:
-            pass
+        self.close()
 
         if self.plc_error_count >= self.MAX_PLC_ERRORS:
-            self.log(f"[Device:{self.name}][FATAL] PLC lost (communication).")
-            self.shutdown()
-            sys.exit(1)
+            self.log(f"[{self.label}][FATAL] PLC lost (communication).", level=FATAL)
+            raise PLCLost(f"{self.host}:{self.port} communication lost")
 
-        time.sleep(self.RECONNECT_WAIT)
-        self.connect_plc()
+        self.retry_at = time.time() + self.RECONNECT_WAIT
+
+    def reset_errors(self):
+        self.plc_error_count = 0
 
     # -----------------------------
     # PLC heartbeat check
     # -----------------------------
+    def observe_registers(self, start, registers):
+        """他の目的で読んだ HR 範囲が SYS 領域を含んでいれば heartbeat として取り込む"""
+        state = self.heartbeat.feed_registers(self.key, start, registers)
+        if state == HB_LOST:
+            self._lost()
+
     def check_heartbeat(self):
+        # 監視周期内に（範囲読み出しの相乗りも含め）確認済みなら読まない
+        if not self.heartbeat.due(self.key):
+            return
+
         try:
-            # address=10000 は PLC側の HR_SYS_BASE + 0 と一致させる
+            # HB_ADDR=10000 は PLC側の HR_SYS_BASE + 0 と一致させる
             rr = self.client.read_holding_registers(
-                address=self.HEARTBEAT_ADDR,
+                address=HB_ADDR,
                 count=1
             )
 
             if not rr or rr.isError():
                 # 起動直後はPLC側の準備ができていないことが多いため、WARNログに留めて return する
-                self.log(f"[Device:{self.name}][DEBUG] Heartbeat read failed (PLC not ready?)")
-                return 
+                self.log(f"[{self.label}][DEBUG] Heartbeat read failed (PLC not ready?)", level=DEBUG)
+                return
 
             hb = rr.registers[0]
+        except Exception as e:
+            # 接続エラーなどは上位の handle_error で処理されるため、ここではログのみ
+            self.log(f"[{self.label}][DEBUG] Heartbeat exception: {e}", level=DEBUG)
+            return
 
-            if self.last_heartbeat is None:
-                self.last_heartbeat = hb
-                self.last_hb_change = time.time()
-                return
+        if self.heartbeat.feed(self.key, hb) == HB_LOST:
+            self._lost()
 
-            if hb != self.last_heartbeat:
-                self.last_heartbeat = hb
-                self.last_hb_change = time.time()
-                return
+    def _lost(self):
+        self.log(f"[{self.label}][FATAL] PLC heartbeat stopped (>{self.heartbeat.timeout}s)", level=FATAL)
+        raise PLCLost(f"{self.host}:{self.port} heartbeat stopped")
 
-            if time.time() - self.last_hb_change > self.HEARTBEAT_TIMEOUT:
-                self.log(f"[Device:{self.name}][FATAL] PLC heartbeat stopped (>{self.HEARTBEAT_TIMEOUT}s)")
-                self.shutdown()
-                sys.exit(1)
-        except Exception as e:
-            # 接続エラーなどは上位の handle_plc_error で処理されるため、ここではログのみ
-            self.log(f"[Device:{self.name}][DEBUG] Heartbeat exception: {e}")
+    def close(self):
+        try:
+            if self.client:
+                self.client.close()
+        except Exception:
+            pass
+
+# -----------------------------
+# Device Simulator
+# -----------------------------
+class DeviceSimulator:
+    def __init__(self, yaml_file, link=None, logger=None):
+        device = load_device_yaml(yaml_file)
+
+        self.name = device["name"]
+        self.signals = device["signals"]
+        self.cycle = device.get("cycle_ms", 100) / 1000
+        self.log_dir = device.get("log_dir")
+
+        plc = device["plc"]
+        self.plc_host = plc["host"]
+        self.plc_port = plc["port"]
+
+        # ホストモードでは logger / link を DeviceHost から受け取り共有する
+        self.owns_resources = link is None
+        self.logger = logger or Logger.from_config(self.name, device)
+        self.log = self.logger.log
+
+        self.log(f"loading config: {yaml_file}")
+        self.log(f"signals={list(self.signals.keys())}")
+
+        # type: model の信号は ProcessModelBank で一括計算する
+        # （numpy が必要になるのは model を使う場合だけ）
+        model_signals = {n: s for n, s in self.signals.items() if s["type"] == "model"}
+        self.models = None
+        if model_signals:
+            from process_model import ProcessModelBank
+            self.models = ProcessModelBank(model_signals, self.log)
+            self.log(f"[Device:{self.name}] models={list(model_signals.keys())}")
+
+        if link is None:
+            link = PLCLink(self.plc_host, self.plc_port, self.log, label=f"Device:{self.name}",
+                           heartbeat=device.get("heartbeat"))
+            try:
+                link.connect()
+            except ConnectionError:
+                raise RuntimeError("initial PLC connection failed")
+        self.link = link
+        if self.models:
+            # model 入力の hr 範囲読み出しが SYS 領域を含めば heartbeat にも使う
+            self.models.observe = self.link.observe_registers
+
+        self.log(f"[Device:{self.name}] cycle={self.cycle}s")
+        self.last_alive = time.time()
+        self.stop_event = threading.Event()
+
+    @property
+    def client(self):
+        return self.link.client
 
     # -----------------------------
     # Main Loop
@@ -176,46 +244,72 @@ class DeviceSimulator:
     def run(self):
         self.log(f"[Device:{self.name}] START")
         try:
-            while True:
+            while not self.stop_event.is_set():
                 try:
                     # 接続確認（切れていたら再接続）
-                    if not self.client.is_socket_open():
-                        self.connect_plc()
+                    if self.link.ensure_connected():
+                        # heartbeat 監視 (失敗しても即終了しないように内部で制御)
+                        self.link.check_heartbeat()
 
-                    # heartbeat 監視 (失敗しても即終了しないように内部で制御)
-                    self.check_heartbeat()
+                        self.tick()
 
-                    for name, sig in self.signals.items():
-                        self.process_signal(name, sig)
-
-                    self.plc_error_count = 0
+                        self.link.reset_errors()
 
                 except (ModbusIOException, OSError, ConnectionError) as e:
-                    self.handle_plc_error(e)
+                    self.link.handle_error(e)
+                except PLCLost:
+                    raise
                 except Exception as e:
-                    self.log(f"[Device:{self.name}][ERROR] Unexpected error: {e}")
+                    self.log(f"[Device:{self.name}][ERROR] Unexpected error: {e}", level=ERROR)
 
                 if time.time() - self.last_alive >= 5:
                     self.log(f"[Device:{self.name}] alive")
                     self.last_alive = time.time()
 
-                time.sleep(self.cycle)
+                self.stop_event.wait(max(0.0, self.next_wakeup() - time.time()))
+        except PLCLost:
+            self.shutdown()
+            sys.exit(1)
         finally:
             self.shutdown()
 
+    def stop(self):
+        """別スレッドから run() を止める（plant_runner 用）"""
+        self.stop_event.set()
+
     def shutdown(self):
-        try:
-            if self.client:
-                self.client.close()
-        except Exception:
-            pass
+        if getattr(self, "_stopped", False):
+            return
+        self._stopped = True
+
+        if self.owns_resources:
+            self.link.close()
 
         self.log(f"[Device:{self.name}] STOP")
-        self.logger.close()
+        if self.owns_resources:
+            self.logger.close()
 
     # -----------------------------
     # Signal Processing
     # -----------------------------
+    def tick(self):
+        """全信号を1周期分処理する"""
+        for name, sig in self.signals.items():
+            if sig["type"] != "model":
+                self.process_signal(name, sig)
+
+        if self.models:
+            self.models.step(self.client)
+
+    def next_wakeup(self):
+        """次に tick が必要な時刻（パルスの OFF 予定があればそちらを優先）"""
+        wake = time.time() + self.cycle
+        for sig in self.signals.values():
+            off_at = sig.get("_off_at")
+            if off_at is not None and off_at < wake:
+                wake = off_at
+        return wake
+
     def process_signal(self, name, sig):
         typ = sig["type"]
 
@@ -227,6 +321,8 @@ class DeviceSimulator:
             self.run_pattern(name, sig, register=True)
         elif typ == "pulse":
             self.run_pulse(name, sig)
+        elif typ == "trace":
+            self.run_trace(name, sig)
         else:
             raise ValueError(f"unknown signal type: {typ}")
 
@@ -261,28 +357,207 @@ class DeviceSimulator:
             sig["_idx"] = (sig["_idx"] + 1) % len(sig["pattern"])
 
     def run_pulse(self, name, sig):
+        # ON 中に sleep すると同じプロセスの他デバイスまで止まるため、
+        # OFF 予定時刻 (_off_at) を持つ状態機械として処理する
         if "_next" not in sig:
             sig["_next"] = time.time()
+            sig["_off_at"] = None
 
-        if time.time() >= sig["_next"]:
-            addr = sig["address"]
+        addr = sig["address"]
 
+        if sig["_off_at"] is not None:
+            if time.time() >= sig["_off_at"]:
+                self.client.write_coil(addr, False)
+                self.log(f"[{self.name}] {name} pulse -> X{addr} OFF")
+
+                sig["_off_at"] = None
+                sig["_next"] = time.time() + sig["interval_ms"] / 1000
+            return
+
+        if time.time() >= sig["_next"]:
             self.log(f"[{self.name}] {name} pulse -> X{addr} ON")
             self.client.write_coil(addr, True)
 
-            time.sleep(sig["pulse_ms"] / 1000)
+            sig["_off_at"] = time.time() + sig["pulse_ms"] / 1000
+
+    def run_trace(self, name, sig):
+        if "_replay" not in sig:
+            sig["_replay"] = TraceReplay(
+                sig["file"],
+                speed=sig.get("speed", 1),
+                loop=sig.get("loop", False),
+                max_batch=sig.get("max_batch", 1000),
+            )
+            areas = sig.get("areas")
+            sig["_areas"] = {AREA_CODES[a] for a in areas} if areas else None
+            self.log(f"[{self.name}] {name} trace replay start: {sig['file']} (speed={sig['_replay'].speed})")
+
+        replay = sig["_replay"]
+        records = replay.due()
+
+        # 同じ周期内で同じアドレスが複数回変化した場合は最後の値だけを書く
+        latest = {}
+        for _t_ns, area, addr, value in records:
+            if sig["_areas"] is None or area in sig["_areas"]:
+                latest[(area, addr)] = value
+
+        for (area, addr), value in sorted(latest.items()):
+            if area in (AREA_X, AREA_Y):
+                # X は write_coil で SIM_INJECT として注入する
+                self.client.write_coil(addr, bool(value))
+            elif area == AREA_D:
+                self.client.write_register(addr, value & 0xFFFF)
+
+        if latest and len(latest) <= 8:
+            changes = ", ".join(f"{AREA_NAMES[a]}{addr}={v}" for (a, addr), v in sorted(latest.items()))
+            self.log(f"[{self.name}] {name} replay -> {changes}")
+        elif latest:
+            self.log(f"[{self.name}] {name} replay -> {len(latest)} values")
+
+        if replay.finished and not sig.get("_done_logged"):
+            sig["_done_logged"] = True
+            self.log(f"[{self.name}] {name} trace replay finished")
+
+# -----------------------------
+# Device Host（複数デバイスを1プロセスで実行）
+# -----------------------------
+class DeviceHost:
+    """
+    複数の device.yaml を1プロセスで動かす。
+    同じ PLC (host:port) を向くデバイスは PLCLink を共有し、
+    接続と heartbeat 読み出しは PLC ごとに1回で済ませる。
+    """
+    def __init__(self, paths, name="devicehost", log_dir=None, logger=None):
+        files = expand_device_paths(paths)
+        if not files:
+            raise ValueError(f"no device yaml found in: {paths}")
+
+        # ログの設定（レベル・切り替え）は最初の device.yaml のものを使う
+        log_conf = dict(load_device_yaml(files[0]))
+        if log_dir is not None:
+            log_conf["log_dir"] = log_dir
+
+        self.name = name
+        self.logger = logger or Logger.from_config(self.name, log_conf)
+        self.log = self.logger.log
+
+        # (host, port) -> {"link": PLCLink, "devices": [DeviceSimulator, ...]}
+        self.groups = {}
+        for path in files:
+            device = load_device_yaml(path)
+            plc = device["plc"]
+            key = (plc["host"], plc["port"])
+            if key not in self.groups:
+                # heartbeat 設定はその PLC を向く最初のデバイスのものを使う
+                link = PLCLink(plc["host"], plc["port"], self.log, heartbeat=device.get("heartbeat"))
+                self.groups[key] = {"link": link, "devices": []}
+            group = self.groups[key]
+            group["devices"].append(DeviceSimulator(path, link=group["link"], logger=self.logger))
+
+        self.last_alive = time.time()
+        self.stop_event = threading.Event()
+        self.log(f"[DeviceHost:{self.name}] {len(files)} devices on {len(self.groups)} PLCs")
+
+    def run_group(self, group, now):
+        link = group["link"]
+        try:
+            if not link.ensure_connected():
+                return
+            link.check_heartbeat()
+
+            for dev in group["devices"]:
+                if now >= dev.next_tick:
+                    dev.tick()
+                    dev.next_tick = now + dev.cycle
+                elif any(sig.get("_off_at") is not None and now >= sig["_off_at"]
+                         for sig in dev.signals.values()):
+                    # パルス OFF だけは周期を待たずに処理する
+                    dev.tick()
+
+            link.reset_errors()
+
+        except (ModbusIOException, OSError, ConnectionError) as e:
+            try:
+                link.handle_error(e)
+            except PLCLost:
+                self.on_plc_lost(link)
+        except PLCLost:
+            self.on_plc_lost(link)
+        except Exception as e:
+            self.log(f"[DeviceHost:{self.name}][ERROR] Unexpected error ({link.label}): {e}", level=ERROR)
+
+    def on_plc_lost(self, link):
+        # 1台の PLC が落ちても他の PLC 向けデバイスは止めない。
+        # 接続を閉じて RECONNECT_WAIT 後から再接続を試みる
+        link.close()
+        link.reset_errors()
+        link.retry_at = time.time() + link.RECONNECT_WAIT
+
+    def run(self):
+        self.log(f"[DeviceHost:{self.name}] START")
+        for group in self.groups.values():
+            for dev in group["devices"]:
+                dev.next_tick = 0.0
+
+        try:
+            while not self.stop_event.is_set():
+                now = time.time()
+                for group in self.groups.values():
+                    self.run_group(group, now)
+
+                if time.time() - self.last_alive >= 5:
+                    self.log(f"[DeviceHost:{self.name}] alive")
+                    self.last_alive = time.time()
+
+                wake = min(
+                    min(dev.next_tick, dev.next_wakeup())
+                    for group in self.groups.values()
+                    for dev in group["devices"]
+                )
+                self.stop_event.wait(max(0.0, wake - time.time()))
+        except KeyboardInterrupt:
+            self.log(f"[DeviceHost:{self.name}] Interrupted by user")
+        finally:
+            self.shutdown()
 
-            self.client.write_coil(addr, False)
-            self.log(f"[{self.name}] {name} pulse -> X{addr} OFF")
+    def stop(self):
+        self.stop_event.set()
 
-            sig["_next"] = time.time() + sig["interval_ms"] / 1000
+    def shutdown(self):
+        for group in self.groups.values():
+            for dev in group["devices"]:
+                dev.shutdown()
+            group["link"].close()
+        self.log(f"[DeviceHost:{self.name}] STOP")
+        self.logger.close()
 
 # -----------------------------
 # 起動
 # -----------------------------
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python device_simulator.py device_conf/xxx.yaml")
-        sys.exit(1)
+def create_device(argv, logger=None):
+    """コマンドライン引数から DeviceSimulator / DeviceHost を作る（main と plant_runner 共通）"""
+    parser = argparse.ArgumentParser(
+        usage="python devicesim.py device_conf/xxx.yaml\n"
+              "       python devicesim.py <dir|glob|yaml> [...] [--name NAME] [--log-dir DIR]"
+    )
+    parser.add_argument("configs", nargs="+", help="device.yaml / ディレクトリ / glob")
+    parser.add_argument("--name", default="devicehost", help="ホストモード時のログ名")
+    parser.add_argument("--log-dir", default=None, help="ホストモード時のログ出力先")
+    args = parser.parse_args(argv)
+
+    single = (
+        len(args.configs) == 1
+        and not os.path.isdir(args.configs[0])
+        and not glob.has_magic(args.configs[0])
+    )
+    if single:
+        return DeviceSimulator(args.configs[0], logger=logger)
+    return DeviceHost(args.configs, name=args.name, log_dir=args.log_dir, logger=logger)
+
+
+def main():
+    create_device(sys.argv[1:]).run()
 
-    DeviceSimulator(sys.argv[1]).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import argparse
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+
+# -----------------------------
+# PLC イベントトレース (plcsim のバイナリ記録 / デコーダ)
+# -----------------------------
+# [LADDER] / [TON] / [RES] / [SIM_INJECT] などのデバイス変化を、テキストではなく
+# 固定長レコードで記録する。
+#   header : magic(8s) version(H) record_size(H) reserved(I) mono_ns(q) wall_ns(q)
+#   record : t_ns(q, time.monotonic_ns) scan(Q) event(B) area(B) address(H) value(i)
+# header の mono_ns / wall_ns は同じ瞬間の monotonic 時刻と実時刻で、デコード時に
+# レコードの t_ns を実時刻へ換算するのに使う。
+#
+# スキャン側は事前に確保したリングバッファ (EventRing) へ pack_into するだけで戻る。
+# リングは plc_history の問い合わせと共有し、EventTrace はそこからファイルへの書き出しを行う。
+# 書き出しは書き出しスレッドが BLOCK_RECORDS 件ごと（と FLUSH_INTERVAL ごと）に
+# まとめて行い、max_bytes を超えたら path.1, path.2, ... に退避して書き直す。
+# 書き出しが追いつかずリングを1周した場合、古いレコードは捨てて dropped に数える。
+
+EVENT_MAGIC = b"PLCEVENT"
+EVENT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIqq")
+RECORD = struct.Struct("<qQBBHi")
+RECORD_SCAN = struct.Struct("<Q")  # レコード中の scan（t_ns の後ろ）
+SCAN_OFFSET = 8
+# value は int32。D には Python の int がそのまま入るため、範囲外は端の値に丸めて記録する
+VALUE_MIN, VALUE_MAX = -2 ** 31, 2 ** 31 - 1
+
+# event: 何による変化か
+EV_COIL = 1      # ラダーの出力コイル ([LADDER])
+EV_TIMER = 2     # タイマー接点 ([TON])
+EV_RESET = 3     # RES 命令 ([RES])
+EV_INJECT = 4    # Modbus からの入力書き込み ([SIM_INJECT] / devicesim のアナログ値)
+EV_PHYSICAL = 5  # set_physical_input ([PHYSICAL_INPUT])
+EV_CALC = 6      # CALC / MOV 命令による値の変化
+EV_STEP = 7      # SFC のステップの flag ([SFC])
+
+EVENT_NAMES = {
+    EV_COIL: "COIL",
+    EV_TIMER: "TIMER",
+    EV_RESET: "RESET",
+    EV_INJECT: "INJECT",
+    EV_PHYSICAL: "PHYSICAL",
+    EV_CALC: "CALC",
+    EV_STEP: "STEP",
+}
+
+# area: どのデバイス領域か（コード = 文字列中の位置）
+AREAS = "XYMDTC"
+AREA_CODES = {a: i for i, a in enumerate(AREAS)}
+AREA_UNKNOWN = 0xFF
+
+# ラダーのコンパイル結果の target 文字列 ("self.mem.Y[0]") からデバイスを取り出す
+TARGET_RE = re.compile(r"self\.mem\.([XYMDTC])\[(\d+)\]")
+DEVICE_RE = re.compile(r"([XYMDTC])(\d+)")
+
+DEFAULT_CAPACITY = 65536  # event_trace を有効にしたときのリングバッファのレコード数
+BLOCK_RECORDS = 4096      # この件数たまったら書き出しスレッドを起こす
+FLUSH_INTERVAL = 1.0      # 件数に関係なく書き出す間隔 [s]
+CHUNK_RECORDS = 4096
+
+
+def device_name(area, address):
+    if area < len(AREAS):
+        return f"{AREAS[area]}{address}"
+    return f"?{address}"
+
+
+def parse_device(name):
+    """デバイス名 "D12" -> (area, address)"""
+    m = DEVICE_RE.fullmatch(name.strip().upper())
+    if not m:
+        raise ValueError(f"invalid device: {name}")
+    return AREA_CODES[m.group(1)], int(m.group(2))
+
+
+def target_device(target):
+    """ラダーの target "self.mem.D[12]" -> (area, address)。デバイスでなければ None"""
+    m = TARGET_RE.fullmatch(target.strip())
+    return (AREA_CODES[m.group(1)], int(m.group(2))) if m else None
+
+
+# -----------------------------
+# 記録（plcsim 側）
+# -----------------------------
+class EventRing:
+    """固定長レコードのリングバッファ。head は記録したレコード数（累計）で、レコードの通し番号を兼ねる"""
+
+    def __init__(self, capacity):
+        self.capacity = max(int(capacity), BLOCK_RECORDS)
+        self.buf = bytearray(self.capacity * RECORD.size)
+        self.head = 0
+        # スキャンと Modbus サーバーの両方のスレッドから記録されるため
+        self.lock = threading.Lock()
+        self.ids = {}     # target 文字列 -> (area, address)
+        self.wake = None  # EventTrace の書き出しスレッドを起こす Event
+
+    def record(self, scan, event, area, address, value):
+        self._pack(scan, event, area, address, value)
+
+    def record_target(self, scan, event, target, value):
+        """target はラダーの "self.mem.Y[0]" 形式"""
+        dev = self.ids.get(target) or self.lookup(target)
+        self._pack(scan, event, dev[0], dev[1], value)
+
+    def _pack(self, scan, event, area, address, value):
+        # スキャン中に呼ばれる。value が int32 を超えても struct.error にしない
+        value = int(value)
+        if not VALUE_MIN <= value <= VALUE_MAX:
+            value = VALUE_MIN if value < 0 else VALUE_MAX
+        with self.lock:
+            head = self.head
+            RECORD.pack_into(self.buf, (head % self.capacity) * RECORD.size,
+                             time.monotonic_ns(), scan, event, area, address, value)
+            self.head = head = head + 1
+        if head % BLOCK_RECORDS == 0 and self.wake:
+            self.wake.set()
+
+    def lookup(self, target):
+        dev = self.ids[target] = target_device(target) or (AREA_UNKNOWN, 0)
+        return dev
+
+    def _scan_at(self, seq):
+        return RECORD_SCAN.unpack_from(self.buf, (seq % self.capacity) * RECORD.size + SCAN_OFFSET)[0]
+
+    def first_after_scan(self, scan):
+        """
+        scan より後のスキャンで記録した最初のレコードの通し番号（無ければ head）。
+        レコードのスキャン番号は記録順に増えていくため、リング全体を読まずに二分探索で求める
+        """
+        with self.lock:
+            lo, hi = max(0, self.head - self.capacity), self.head
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._scan_at(mid) <= scan:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+    def oldest_scan(self):
+        """リングに残っている最も古いレコードのスキャン番号（空なら None）"""
+        with self.lock:
+            if self.head == 0:
+                return None
+            return self._scan_at(max(0, self.head - self.capacity))
+
+    def copy(self, start, end=None):
+        """
+        通し番号 start 以降（end の手前まで）のレコードを (開始番号, [bytes, ...]) で返す。
+        すでに上書きされた分は飛ばすため、開始番号は start より大きくなることがある
+        """
+        with self.lock:
+            head = self.head if end is None else min(end, self.head)
+            start = max(start, self.head - self.capacity)
+            seq = start
+            blocks = []
+            while seq < head:
+                pos = seq % self.capacity
+                n = min(head - seq, self.capacity - pos, BLOCK_RECORDS)
+                blocks.append(bytes(self.buf[pos * RECORD.size:(pos + n) * RECORD.size]))
+                seq += n
+        return start, blocks
+
+    def records(self, start=0, end=None):
+        """通し番号 start 以降（end の手前まで）のレコードを (seq, t_ns, scan, event, area, address, value) で返す"""
+        seq, blocks = self.copy(start, end)
+        out = []
+        for block in blocks:
+            for rec in RECORD.iter_unpack(block):
+                out.append((seq,) + rec)
+                seq += 1
+        return out
+
+
+class EventTrace:
+    def __init__(self, ring, path, max_bytes=0, backups=5):
+        self.ring = ring
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+        self.tail = 0     # 書き出したレコード数（累計）
+        self.dropped = 0  # 書き出す前に上書きされたレコード数
+
+        self.fp = None
+        self.size = 0
+        self.open_file()
+
+        self.stopping = False
+        self.wake = ring.wake = threading.Event()
+        self.thread = threading.Thread(target=self.flush_loop, name="event-trace", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def capacity(plc_conf):
+        """event_trace が求めるリングの大きさ（無効なら 0）"""
+        conf = plc_conf.get("event_trace")
+        if not conf:
+            return 0
+        return DEFAULT_CAPACITY if conf is True else conf.get("capacity", DEFAULT_CAPACITY)
+
+    @classmethod
+    def from_config(cls, name, plc_conf, ring):
+        """
+        plc.yaml の event_trace からトレースを作る（無ければ None）。
+          event_trace:
+            dir: logs          # 省略時は log_dir
+            capacity: 65536
+            max_mb: 100
+            backups: 5
+        """
+        conf = plc_conf.get("event_trace")
+        if not conf:
+            return None
+        if conf is True:
+            conf = {}
+        log_dir = conf.get("dir", plc_conf.get("log_dir"))
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{name}_{ts}.evt"
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, filename)
+        else:
+            path = filename
+        return cls(
+            ring, path,
+            max_bytes=int(conf.get("max_mb", 0) * 1024 * 1024),
+            backups=conf.get("backups", 5),
+        )
+
+    def close(self):
+        if self.stopping:
+            return
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout=5)
+        self.flush()
+        self.fp.close()
+
+    # -----------------------------
+    # 書き出しスレッド
+    # -----------------------------
+    def flush_loop(self):
+        while not self.stopping:
+            self.wake.wait(FLUSH_INTERVAL)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        start, blocks = self.ring.copy(self.tail)
+        self.dropped += start - self.tail
+        for block in blocks:
+            if self.max_bytes and self.size + len(block) > self.max_bytes and self.size > HEADER.size:
+                self.rotate()
+            self.fp.write(block)
+            self.size += len(block)
+            start += len(block) // RECORD.size
+        self.tail = start
+        if blocks:
+            self.fp.flush()
+
+    def open_file(self):
+        self.fp = open(self.path, "wb")
+        self.fp.write(HEADER.pack(EVENT_MAGIC, EVENT_VERSION, RECORD.size, 0,
+                                  time.monotonic_ns(), time.time_ns()))
+        self.size = HEADER.size
+
+    def rotate(self):
+        self.fp.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.open_file()
+
+
+# -----------------------------
+# 読み出し（デコーダ）
+# -----------------------------
+def segments(path):
+    """path と退避済みの path.N を古い順に返す"""
+    rotated = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        rotated.append(f"{path}.{i}")
+        i += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def iter_events(path, chunk_records=CHUNK_RECORDS):
+    """(wall_ns, scan, event, area, address, value) を先頭から順に返すジェネレータ"""
+    with open(path, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"not an event trace file: {path}")
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, rec_size, _, mono_ns, wall_ns = HEADER.unpack_from(mm, 0)
+            if magic != EVENT_MAGIC:
+                raise ValueError(f"not an event trace file: {path}")
+            if version != EVENT_VERSION or rec_size != RECORD.size:
+                raise ValueError(f"unsupported event trace version: {version} (record={rec_size})")
+
+            offset = wall_ns - mono_ns
+            # 書きかけの末尾レコードは読まない
+            end = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            step = chunk_records * RECORD.size
+            for pos in range(HEADER.size, end, step):
+                chunk = mm[pos:min(pos + step, end)]
+                for t_ns, scan, event, area, address, value in RECORD.iter_unpack(chunk):
+                    yield t_ns + offset, scan, event, area, address, value
+
+
+def format_time(wall_ns):
+    sec, ns = divmod(wall_ns, 1_000_000_000)
+    return f"{datetime.fromtimestamp(sec).strftime('%Y-%m-%d %H:%M:%S')}.{ns // 1_000_000:03d}"
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="PLC event trace decoder")
+    parser.add_argument("file", help="トレースファイル（退避済みの file.1, file.2, ... も古い順に読む）")
+    parser.add_argument("--csv", action="store_true", help="CSV で出力する")
+    parser.add_argument("--event", action="append", choices=list(EVENT_NAMES.values()),
+                        help="指定したイベントだけを出力（複数指定可）")
+    parser.add_argument("--device", action="append", help="指定したデバイスだけを出力（例: Y0, 複数指定可）")
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+
+    files = segments(args.file)
+    if not files:
+        print(f"[!] not found: {args.file}")
+        sys.exit(1)
+
+    events = {k for k, v in EVENT_NAMES.items() if v in args.event} if args.event else None
+    devices = {d.upper() for d in args.device} if args.device else None
+
+    writer = csv.writer(sys.stdout) if args.csv else None
+    if writer:
+        writer.writerow(["time", "scan", "event", "device", "value"])
+
+    count = 0
+    try:
+        for path in files:
+            for wall_ns, scan, event, area, address, value in iter_events(path):
+                if events is not None and event not in events:
+                    continue
+                dev = device_name(area, address)
+                if devices is not None and dev not in devices:
+                    continue
+                name = EVENT_NAMES.get(event, str(event))
+                if writer:
+                    writer.writerow([format_time(wall_ns), scan, name, dev, value])
+                else:
+                    print(f"{format_time(wall_ns)} | scan={scan:<8} | {name:<8} | {dev} = {value}")
+                count += 1
+                if args.limit and count >= args.limit:
+                    return
+    except BrokenPipeError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
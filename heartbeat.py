@@ -0,0 +1,93 @@
+import time
+
+# -----------------------------
+# Heartbeat 監視（devicesim / iodevicesim 共通）
+# -----------------------------
+# PLC の SYS 領域 HR 10000 (HR_SYS_BASE + 0) はスキャンごとに変化する。
+# 監視はデータ周期とは独立した period で行い、他の範囲読み出しが
+# SYS 領域を含んでいればその値を feed() して専用の読み出しを省く。
+
+HB_ADDR = 10000
+
+# ホストごとの状態
+HB_UNKNOWN = "UNKNOWN"  # まだ値を受け取っていない
+HB_OK = "OK"            # 値が変化している
+HB_STALE = "STALE"      # period の2倍以上変化していない（警告）
+HB_LOST = "LOST"        # timeout を超えて変化していない（停止と判断）
+
+
+class HeartbeatMonitor:
+    def __init__(self, period=1.0, timeout=5.0, log=None):
+        self.period = period
+        self.timeout = timeout
+        self.log = log
+        self.hosts = {}  # key -> {'val', 'changed', 'sampled', 'state'}
+
+    @classmethod
+    def from_config(cls, conf, default_timeout, log=None):
+        """yaml の heartbeat: {period_ms, timeout_ms} から作る"""
+        conf = conf or {}
+        return cls(
+            period=conf.get("period_ms", 1000) / 1000,
+            timeout=conf.get("timeout_ms", default_timeout * 1000) / 1000,
+            log=log,
+        )
+
+    def _host(self, key):
+        return self.hosts.setdefault(
+            key, {'val': None, 'changed': None, 'sampled': 0.0, 'state': HB_UNKNOWN}
+        )
+
+    def due(self, key, now=None):
+        """専用の heartbeat 読み出しが必要か（period 内に feed されていなければ True）"""
+        now = time.time() if now is None else now
+        return now - self._host(key)['sampled'] >= self.period
+
+    @staticmethod
+    def covers(ranges):
+        """(start, count) の範囲リストが HB_ADDR を含むか"""
+        return any(start <= HB_ADDR < start + count for start, count in ranges)
+
+    def feed_registers(self, key, start, registers, now=None):
+        """範囲読み出しの結果が HB_ADDR を含んでいれば、その値を取り込む"""
+        if start <= HB_ADDR < start + len(registers):
+            return self.feed(key, registers[HB_ADDR - start], now)
+        return None
+
+    def feed(self, key, value, now=None):
+        now = time.time() if now is None else now
+        h = self._host(key)
+        h['sampled'] = now
+        if h['val'] is None or value != h['val']:
+            h['val'] = value
+            h['changed'] = now
+        return self.evaluate(key, now)
+
+    def evaluate(self, key, now=None):
+        """最後に値が変化してからの時間で状態を更新し、その状態を返す"""
+        now = time.time() if now is None else now
+        h = self._host(key)
+        if h['changed'] is None:
+            state = HB_UNKNOWN
+        else:
+            quiet = now - h['changed']
+            if quiet > self.timeout:
+                state = HB_LOST
+            elif quiet > self.period * 2:
+                state = HB_STALE
+            else:
+                state = HB_OK
+
+        if state != h['state']:
+            # 起動直後の UNKNOWN -> OK は記録しない
+            if self.log and not (h['state'] == HB_UNKNOWN and state == HB_OK):
+                self.log(f"[HB] {key}: {h['state']} -> {state}")
+            h['state'] = state
+        return state
+
+    def state(self, key):
+        return self._host(key)['state']
+
+    def reset(self, key):
+        """再接続時などに状態を初期化する"""
+        self.hosts.pop(key, None)
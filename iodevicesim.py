@@ -1,70 +1,432 @@
 import yaml
 import time
 import sys
-import os
 import argparse
-from datetime import datetime
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusIOException
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import modbus_pipeline as mbp
+from modbus_pipeline import PipelinedClient, merge_ranges, MAX_READ_GAP, MAX_READ_COUNT, MAX_WRITE_COUNT
+from heartbeat import HeartbeatMonitor, HB_ADDR, HB_LOST
+from rule_expr import compile_expr, ACTION_OPS
+from simlog import Logger, DEBUG, WARN, ERROR, FATAL
 
 SUPPORTED_IODEVICE_VERSIONS = {"1.0"}
 
 # -----------------------------
-# Logger
+# Read Plan（周期ごとの範囲読み出し計画）
 # -----------------------------
-class Logger:
-    def __init__(self, device_name, log_dir=None):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{device_name}_{timestamp}.log"
-
-        if log_dir:
-            os.makedirs(log_dir, exist_ok=True)
-            self.log_path = os.path.join(log_dir, filename)
-        else:
-            self.log_path = filename
+# coil / discrete は read_coils、hr は read_holding_registers で読むため、
+# アドレス空間は 'bit' と 'reg' の2種類に分けて扱う
+NODE_SPACE = {'coil': 'bit', 'discrete': 'bit', 'hr': 'reg'}
+
+
+def changed_runs(values, last, max_count):
+    """values と last を比較し、変化した連続区間 [(offset, count), ...] を返す"""
+    runs = []
+    run_start = None
+    for i, (v, old) in enumerate(zip(values, last)):
+        if v != old:
+            if run_start is None:
+                run_start = i
+            elif i - run_start >= max_count:
+                runs.append((run_start, i - run_start))
+                run_start = i
+        elif run_start is not None:
+            runs.append((run_start, i - run_start))
+            run_start = None
+    if run_start is not None:
+        runs.append((run_start, len(values) - run_start))
+    return runs
+
+
+class ReadPlan:
+    """
+    全ルールが読むノードを (host, port, space) ごとに集め、
+    範囲読み出しのリストに変換したもの。設定読み込み時に1度だけ作る。
+    """
+    def __init__(self, connections):
+        addrs = {}  # (host, port) -> {'bit': set(), 'reg': set()}
+        for conn in connections:
+            nodes = [conn.get('trigger') or conn.get('source')]
+            # 式の入力
+            nodes.extend(conn.get('inputs', {}).values())
+            # action は書き込み前に現在値が必要なので読み出し対象に含める
+            nodes.extend(conn.get('actions', []))
+            for node in nodes:
+                if not node:
+                    continue
+                space = NODE_SPACE.get(node['type'])
+                if space is None:
+                    continue
+                host_addrs = addrs.setdefault((node['host'], node['port']), {'bit': set(), 'reg': set()})
+                # mirror ルールの source は count 点の範囲
+                start = node['address']
+                host_addrs[space].update(range(start, start + node.get('count', 1)))
+
+        self.ranges = {}  # (host, port) -> [(space, start, count), ...]
+        for key, spaces in addrs.items():
+            self.ranges[key] = [
+                (space, start, count)
+                for space in ('bit', 'reg')
+                for start, count in merge_ranges(spaces[space], MAX_READ_GAP[space], MAX_READ_COUNT[space])
+            ]
+
+    def request_count(self):
+        return sum(len(r) for r in self.ranges.values())
+
+
+# -----------------------------
+# Rule（読み込み時に解釈・コンパイルしたルール）
+# -----------------------------
+REG_MAX = 0xFFFF
+
+
+class Rule:
+    """
+    connections の1要素。when / expr の式と actions の op は
+    読み込み時に関数へ変換しておき、周期ごとには呼び出すだけにする。
+
+    式で使える名前は inputs のキー（trigger があれば 'trigger' も）。
+    actions の expr では書き込み先の現在値を 'current' で参照できる。
+    """
+    def __init__(self, conn, index):
+        self.conn = conn
+        self.name = conn.get('name', f"rule_{index}")
+        self.is_mirror = conn.get('type') == 'mirror'
+        self.trigger = conn.get('trigger') or conn.get('source')
+        self.target = conn.get('target')
+
+        inputs = dict(conn.get('inputs', {}))
+        if self.trigger and not self.is_mirror:
+            inputs.setdefault('trigger', self.trigger)
+        for var, node in inputs.items():
+            if NODE_SPACE.get(node.get('type')) is None:
+                raise ValueError(f"rule '{self.name}': unsupported input type for '{var}': {node.get('type')}")
+        self.input_names = list(inputs)
+        self.input_nodes = [inputs[n] for n in self.input_names]
+
+        self.when = None
+        if 'when' in conn:
+            self.when = compile_expr(conn['when'], self.input_names, f"{self.name}.when")
+
+        # target.expr があれば変換ルール（毎周期評価して変化時に書き込む）
+        self.expr = None
+        if self.target and 'expr' in self.target:
+            self.expr = compile_expr(self.target['expr'], self.input_names, f"{self.name}.target.expr")
+
+        if not self.is_mirror and not self.expr and not self.trigger and not self.when:
+            raise ValueError(f"rule '{self.name}': needs trigger/source, when, or target.expr")
+
+        # actions: (node, 関数)。関数は (入力値..., current) -> 新しい値
+        self.actions = []
+        for action in conn.get('actions', []):
+            if 'expr' in action:
+                fn = compile_expr(action['expr'], self.input_names + ['current'], f"{self.name}.actions.expr")
+            else:
+                op = action.get('op')
+                if op not in ACTION_OPS:
+                    raise ValueError(f"rule '{self.name}': unknown action op: {op}")
+                op_fn = ACTION_OPS[op]
+                val = action.get('value', 1)
+                fn = lambda *args, op_fn=op_fn, val=val: op_fn(args[-1], val)
+            self.actions.append((action, fn))
+
+    def describe_action(self, action):
+        if 'expr' in action:
+            return f"expr({action['expr']})"
+        return f"{action.get('op')}({action.get('value', 1)})"
+
+
+def to_node_value(node, value):
+    """式の結果を書き込み先の型に合わせる（bit は bool、hr は 0〜65535 の整数）"""
+    if NODE_SPACE[node['type']] == 'bit':
+        return bool(value)
+    return min(max(int(round(value)), 0), REG_MAX)
+
+
+# -----------------------------
+# Host Worker（PLC 1台ごとの I/O スレッド）
+# -----------------------------
+class HostWorker:
+    """
+    1台の PLC (host:port) 専用の I/O ワーカー。
+    pymodbus のクライアントはスレッドセーフではないため、1ホスト1スレッドで
+    接続・読み出し・書き込みを直列化し、ホスト同士は並行に動かす。
+    遅い / 落ちている PLC はこのワーカーだけが詰まり、他のホストのルールには影響しない。
+    """
+    RECONNECT_WAIT = 1.0 # 再接続を試みるまでの待機時間（秒）
 
-        self.fp = open(self.log_path, "a", encoding="utf-8")
-        self.log(f"log file opened: {self.log_path}")
+    def __init__(self, host, port, ranges, hb_addr, log):
+        self.host = host
+        self.port = port
+        self.key = f"{host}:{port}"
+        self.ranges = ranges
+        self.hb_addr = hb_addr
+        self.log = log
+        # 読み出し計画の範囲が SYS 領域を含んでいれば heartbeat はそこから取れる
+        self.covers_hb = HeartbeatMonitor.covers(
+            [(start, count) for space, start, count in ranges if space == 'reg']
+        )
+
+        # 要求はトランザクションID付きでまとめて送る（応答を1件ずつ待たない）
+        self.client = PipelinedClient(host, port, timeout=2)
+        self.last_attempt = 0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"io-{self.key}")
+        self.pending = None   # 実行中の周期読み出し (Future)
+        self.late_cycles = 0  # 期限内に読み出しが終わらなかった周期数
+        self.epoch = 0        # 接続し直すたびに増える（書き込みキャッシュの無効化に使う）
+
+        # この周期に溜めた書き込み（周期の最後にまとめて送る）
+        self.write_queue = []
+        # まだ送っていない書き込み: (space, addr) -> (node, 値, ブロックか)。アドレスごとに最新の値だけを残す。
+        # 前のバッチを送っている間（ホストが遅い / 止まっている間）は次を投入せず、ここで上書きしていく
+        self.unsent = {}
+        self.write_lock = threading.Lock()
+        self.writing = None   # 実行中の書き込み (Future)
+        # 書き込み抑制に使う、直近の周期読み出しで読み返した hr の値: addr -> 値。ワーカースレッドだけが触る。
+        # 他の装置やラダーも同じアドレスを書き換えるため、自分が書いた値は使わない（読み返せない
+        # coil / discrete への書き込みは抑制しない）
+        self.readback = {}
+        self.writes_sent = 0
+        self.writes_suppressed = 0
+        self.writes_coalesced = 0  # 送る前に同じアドレスへの新しい値で置き換えた数
+
+    def get_client(self):
+        client = self.client
+        if not client.connected:
+            now = time.time()
+            # 前回の試行から RECONNECT_WAIT 秒経過していなければスキップ
+            if now - self.last_attempt < self.RECONNECT_WAIT:
+                return None
 
-    def log(self, msg):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        line = f"{now} | {msg}"
-        print(line, flush=True)
-        if hasattr(self, 'fp') and not self.fp.closed:
-            self.fp.write(line + "\n")
-            self.fp.flush()
-            os.fsync(self.fp.fileno())
+            self.last_attempt = now
+            if not client.connect():
+                # ログの氾濫を防ぐため DEBUG 扱いにするか、限定的に出す
+                return None
+            else:
+                self.epoch += 1
+                self.readback.clear()
+                self.log(f"[INFO] Connected to {self.key}")
+        return client
+
+    # -----------------------------
+    # 周期読み出し（ワーカースレッドで実行）
+    # -----------------------------
+    def start_cycle(self, poll_hb=False):
+        """
+        この周期の読み出しを投入する。前の周期の読み出しがまだ終わっていなければ
+        新たには投入せず、そのまま待ち続ける（遅いホストにリクエストを積み増さない）。
+        poll_hb: heartbeat 専用の読み出しも行う（監視周期が来ていて、範囲読み出しで取れない時だけ）
+        """
+        if self.pending is None:
+            self.pending = self.executor.submit(self._read_cycle, poll_hb)
+        return self.pending
+
+    def collect(self):
+        """期限までに終わった読み出し結果を取り出す。終わっていなければ None"""
+        fut = self.pending
+        if fut is None or not fut.done():
+            self.late_cycles += 1
+            return None
+        self.pending = None
+        self.late_cycles = 0
+        try:
+            return fut.result()
+        except Exception as e:
+            self.log(f"[DEBUG] read error {self.key}: {e}", level=DEBUG)
+            return None
+
+    def _read_cycle(self, poll_hb):
+        """読み出し計画の範囲（と必要なら heartbeat）を1回のパイプラインで読む -> (hb_val, values)"""
+        client = self.get_client()
+        if not client:
+            return None
+
+        requests = []
+        for space, start, count in self.ranges:
+            if space == 'bit':
+                requests.append(mbp.read_coils(start, count))
+            else:
+                requests.append(mbp.read_holding_registers(start, count))
+        if poll_hb:
+            requests.append(mbp.read_holding_registers(self.hb_addr, 1))
+
+        try:
+            results = client.execute(requests)
+        except OSError as e:
+            # 接続は閉じられているので、次の周期に get_client で再接続する
+            self.log(f"[DEBUG] read error {self.key}: {e}", level=DEBUG)
+            self.readback.clear()
+            return None
+
+        values = {'bit': {}, 'reg': {}}
+        for (space, start, count), res in zip(self.ranges, results):
+            if res is None: continue
+            values[space].update(zip(range(start, start + count), res))
+        # 前の周期の値は残さない（読めなかった範囲のアドレスは抑制しない）
+        self.readback = dict(values['reg'])
+
+        hb_val = None
+        if poll_hb:
+            if results[-1] is not None:
+                hb_val = results[-1][0]
+        elif self.covers_hb:
+            hb_val = values['reg'].get(self.hb_addr)
+        return hb_val, values
+
+    # -----------------------------
+    # 書き込み（周期中は溜めておき、最後にワーカーへまとめて投入する）
+    # -----------------------------
+    def queue_write(self, node, value):
+        self.write_queue.append((node, node['address'], [value], False))
+
+    def queue_write_block(self, node, address, values):
+        self.write_queue.append((node, address, list(values), True))
+
+    def flush_writes(self):
+        if self.write_queue:
+            with self.write_lock:
+                for node, address, values, is_block in self.write_queue:
+                    space = self.cache_space(node)
+                    for i, v in enumerate(values):
+                        if (space, address + i) in self.unsent:
+                            self.writes_coalesced += 1
+                        self.unsent[(space, address + i)] = (node, v, is_block)
+            self.write_queue = []
+        # 前のバッチがまだ終わっていなければ投入しない（遅いホストに書き込みを積み増さない）
+        if self.unsent and (self.writing is None or self.writing.done()):
+            self.writing = self.executor.submit(self._write_pending)
+
+    def _write_pending(self):
+        """まだ送っていない書き込みを取り出し、ブロック書き込みは連続区間にまとめ直して送る"""
+        with self.write_lock:
+            pending, self.unsent = self.unsent, {}
+        batch = []  # (node, address, values, ブロックか)。_write_batch と同じ形
+        for (space, address), (node, value, is_block) in sorted(pending.items(), key=lambda kv: kv[0]):
+            if is_block and batch:
+                last_node, start, values, last_block = batch[-1]
+                if last_block and self.cache_space(last_node) == space and start + len(values) == address \
+                        and len(values) < MAX_WRITE_COUNT['reg' if space == 'reg' else 'bit']:
+                    values.append(value)
+                    continue
+            batch.append((node, address, [value], is_block))
+        self._write_batch(batch)
+
+    @staticmethod
+    def cache_space(node):
+        return 'reg' if node['type'] == 'hr' else 'inject'
+
+    def _write_batch(self, batch):
+        client = self.get_client()
+        if not client: return
+
+        requests = []
+        written = []  # 送った要求ごとの (space, address, values)
+        for node, address, values, is_block in batch:
+            space = self.cache_space(node)
+            if not is_block:
+                # 直近の周期読み出しで読み返した値と同じなら送らない
+                if space == 'reg' and address in self.readback and self.readback[address] == values[0]:
+                    self.writes_suppressed += 1
+                    continue
+                if node['type'] == 'discrete':
+                    # DeviceSimulator 同様、discrete 指定時は write_coil を使用して
+                    # サーバー側の X 領域へ注入する
+                    self.log(f"[DEBUG] Write Discrete (Injected) -> {node['host']}:X{address} = {values[0]}",
+                             level=DEBUG)
+                if space == 'reg':
+                    requests.append(mbp.write_register(address, values[0]))
+                else:
+                    requests.append(mbp.write_coil(address, bool(values[0])))
+            else:
+                # 連続区間をまとめて FC15 / FC16 で書き込む
+                if space == 'reg':
+                    requests.append(mbp.write_registers(address, values))
+                else:
+                    requests.append(mbp.write_coils(address, [bool(v) for v in values]))
+            written.append((space, address, values))
+            if space == 'reg':
+                # 書いた後の値は次の周期読み出しで確かめるまで使わない
+                for i in range(len(values)):
+                    self.readback.pop(address + i, None)
+
+        if not requests:
+            return
+        try:
+            results = client.execute(requests)
+        except OSError as e:
+            # 書けたかどうか分からないため、再接続時 (epoch 更新) に全体を書き直させる
+            self.log(f"[DEBUG] write error {self.key}: {e}", level=DEBUG)
+            return
+
+        self.writes_sent += len(requests)
+        for (space, address, values), res in zip(written, results):
+            if res is None:
+                self.log(f"[DEBUG] write rejected {self.key}@{address}+{len(values)}", level=DEBUG)
+                if len(values) > 1:
+                    # ブロック書き込みの失敗は接続を切り、再接続時 (epoch 更新) に全体を書き直させる
+                    client.close()
 
     def close(self):
-        if hasattr(self, 'fp') and not self.fp.closed:
-            self.log("log file closed")
-            self.fp.close()
+        # 詰まっているホストの完了は待たない
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
 
 # -----------------------------
 # IODevice
 # -----------------------------
 class IODevice:
-    HB_ADDR = 10000
-    HB_TIMEOUT = 5.0  # 秒
-    RECONNECT_WAIT = 1.0 # 再接続を試みるまでの待機時間（秒）
+    HB_TIMEOUT = 5.0  # 秒（heartbeat.timeout_ms の既定値）
 
-    def __init__(self, yaml_file):
+    def __init__(self, yaml_file, logger=None):
         self.config = self.load_config(yaml_file)
         
         self.name = self.config.get('name', 'iodevice_bridge')
         self.connections = self.config.get('connections', [])
         self.cycle = self.config.get('cycle_ms', 200) / 1000.0
+        # 各周期でホストの読み出しを待つ期限。これを過ぎたホストはその周期をスキップする
+        self.host_deadline = self.config.get('host_deadline_ms', self.config.get('cycle_ms', 200) / 2) / 1000.0
         self.log_dir = self.config.get('log_dir')
 
-        self.logger = Logger(self.name, self.log_dir)
+        self.logger = logger or Logger.from_config(self.name, self.config)
         self.log = self.logger.log
+        self.stop_event = threading.Event()
 
-        self.clients = {}
-        self.last_attempt = {} # 各ホストごとの最終接続試行時刻
-        self.hb_states = {}  # 各接続先のハートビート状態
+        # 各接続先のハートビート監視（周期はデータ周期とは別に heartbeat.period_ms で指定）
+        self.heartbeat = HeartbeatMonitor.from_config(self.config.get('heartbeat'), self.HB_TIMEOUT, self.log)
         self.last_alive = time.time()
         self.log(f"loading config: {yaml_file}")
 
+        # ルールは読み込み時に式をコンパイルしておく
+        self.rules = [Rule(conn, i) for i, conn in enumerate(self.connections)]
+        # 変換ルールごとの最後に書き込んだ値: rule_name -> (epoch, value)
+        self.expr_outputs = {}
+
+        # 読み出し計画とその周期のスナップショット
+        # snapshot: (host, port) -> {'bit': {addr: val}, 'reg': {addr: val}}
+        self.plan = ReadPlan(self.connections)
+        self.snapshot = {}
+        # mirror ルールごとの最後に書き込んだイメージ: rule_name -> (epoch, [values])
+        self.mirror_images = {}
+        self.log(f"read plan: {self.plan.request_count()} range reads/cycle for {len(self.plan.ranges)} hosts")
+
+        # ルールに登場するすべてのホストにワーカーを1つずつ用意する
+        hosts = set(self.plan.ranges)
+        for conn in self.connections:
+            for key in ['trigger', 'source', 'target']:
+                node = conn.get(key)
+                if node: hosts.add((node['host'], node['port']))
+            for action in conn.get('actions', []):
+                hosts.add((action['host'], action['port']))
+        self.workers = {
+            (h, p): HostWorker(h, p, self.plan.ranges.get((h, p), []), HB_ADDR, self.log)
+            for h, p in sorted(hosts)
+        }
+
     def load_config(self, filename):
         with open(filename, 'r', encoding='utf-8') as f:
             conf = yaml.safe_load(f)
@@ -78,175 +440,210 @@ class IODevice:
 
         return conf
 
-    def get_client(self, host, port):
-        key = f"{host}:{port}"
-        if key not in self.clients:
-            self.clients[key] = ModbusTcpClient(host, port=port, timeout=2)
-            self.last_attempt[key] = 0
-        
-        client = self.clients[key]
-        if not client.connected:
-            now = time.time()
-            # 前回の試行から RECONNECT_WAIT 秒経過していなければスキップ
-            if now - self.last_attempt[key] < self.RECONNECT_WAIT:
-                return None
-            
-            self.last_attempt[key] = now
-            if not client.connect():
-                # ログの氾濫を防ぐため DEBUG 扱いにするか、限定的に出す
-                return None
-            else:
-                self.log(f"[INFO] Connected to {key}")
-        return client
-
-    def check_heartbeat(self, host, port):
-        key = f"{host}:{port}"
-        client = self.get_client(host, port)
-        if not client or not client.connected:
+    def check_heartbeat(self, key, hb_val):
+        # 読めなかった周期は判定しない（接続断は HostWorker 側で再接続する）
+        if hb_val is None:
             return
 
-        try:
-            rr = client.read_holding_registers(address=self.HB_ADDR, count=1)
-            if rr is None or rr.isError():
-                return 
-
-            hb_val = rr.registers[0]
-            now = time.time()
-
-            if key not in self.hb_states:
-                self.hb_states[key] = {'val': hb_val, 'time': now}
-                return
-
-            if hb_val != self.hb_states[key]['val']:
-                self.hb_states[key] = {'val': hb_val, 'time': now}
-            else:
-                if now - self.hb_states[key]['time'] > self.HB_TIMEOUT:
-                    self.log(f"[FATAL] PLC {key} heartbeat stopped (>{self.HB_TIMEOUT}s)")
-                    self.shutdown()
-                    sys.exit(1)
-        except Exception as e:
-            self.log(f"[DEBUG] HB check error {key}: {e}")
+        if self.heartbeat.feed(key, hb_val) == HB_LOST:
+            self.log(f"[FATAL] PLC {key} heartbeat stopped (>{self.heartbeat.timeout}s)", level=FATAL)
+            self.shutdown()
+            sys.exit(1)
+
+    def read_snapshot(self):
+        """
+        全ホストの周期読み出しを並行に投入し、期限 (host_deadline) までに
+        揃った分でこの周期のスナップショットを作る
+        """
+        futures = [
+            w.start_cycle(poll_hb=not w.covers_hb and self.heartbeat.due(w.key))
+            for w in self.workers.values()
+        ]
+        wait(futures, timeout=self.host_deadline)
+
+        snapshot = {}
+        for (host, port), worker in self.workers.items():
+            result = worker.collect()
+            if result is None:
+                if worker.late_cycles == 1:
+                    self.log(f"[WARN] {worker.key} missed cycle deadline ({self.host_deadline}s), rules for it are skipped",
+                             level=WARN)
+                continue
+            hb_val, values = result
+            self.check_heartbeat(worker.key, hb_val)
+            snapshot[(host, port)] = values
+        self.snapshot = snapshot
 
     def read_value(self, node):
-        client = self.get_client(node['host'], node['port'])
-        if not client: return None
-        
-        addr = node['address']
-        typ = node['type']
-        try:
-            if typ in ['discrete', 'coil']:
-                res = client.read_coils(address=addr, count=1)
-                return res.bits[0] if not res.isError() else None
-            elif typ == 'hr':
-                res = client.read_holding_registers(address=addr, count=1)
-                return res.registers[0] if not res.isError() else None
-        except Exception as e:
-            # 通信エラーは頻出するため、接続が切れた場合は get_client 側で再接続を促す
-            pass
-        return None
+        """この周期のスナップショットから値を返す（読めていなければ None）"""
+        values = self.snapshot.get((node['host'], node['port']))
+        space = NODE_SPACE.get(node['type'])
+        if values is None or space is None:
+            return None
+        return values[space].get(node['address'])
+
+    def update_snapshot(self, node, value):
+        # 同じ周期内で後続のルールが書き込み後の値を参照できるようにする
+        values = self.snapshot.get((node['host'], node['port']))
+        space = NODE_SPACE.get(node['type'])
+        if values is not None and space is not None:
+            values[space][node['address']] = value
 
     def write_value(self, node, value):
-        client = self.get_client(node['host'], node['port'])
-        if not client: return
-        
-        addr = node['address']
-        typ = node['type']
-        try:
-
-            # DeviceSimulator 同様、discrete 指定時は write_coil を使用して
-            # サーバー側の X 領域へ注入する
-            if typ == 'discrete':
-                client.write_coil(address=addr, value=value,)
-                # 書き込み時のログ（デバッグ用）
-                self.log(f"[DEBUG] Write Discrete (Injected) -> {node['host']}:X{addr} = {value}")
-            if typ == 'coil':
-                client.write_coil(address=addr, value=value)
-            elif typ == 'hr':
-                client.write_register(address=addr, value=int(value))
-        except Exception as e:
-            pass
+        self.workers[(node['host'], node['port'])].queue_write(node, value)
+
+    def read_inputs(self, rule):
+        """ルールの式入力をスナップショットから集める（1つでも読めていなければ None）"""
+        values = []
+        for node in rule.input_nodes:
+            v = self.read_value(node)
+            if v is None:
+                return None
+            values.append(v)
+        return values
 
-    def execute_action(self, action, rule_name):
+    def execute_action(self, rule, action, fn, inputs):
         current = self.read_value(action)
         if current is None: return
-        
-        op = action.get('op')
-        val = action.get('value', 1)
-        
-        new_val = current
-        if op == 'increment': new_val = current + val
-        elif op == 'decrement': new_val = max(0, current - val)
-        elif op == 'add': new_val = current + val
-        elif op == 'set': new_val = val
-        else: return
-        
+
+        new_val = to_node_value(action, fn(*inputs, current))
+
         if new_val != current:
             self.write_value(action, new_val)
-            self.log(f"[ACTION] {rule_name}: {action['host']}:{action['address']} {op}({val}) {current}->{new_val}")
+            self.update_snapshot(action, new_val)
+            self.log(f"[ACTION] {rule.name}: {action['host']}:{action['address']} {rule.describe_action(action)} {current}->{new_val}")
+
+    def run_transform(self, rule, inputs):
+        """target.expr を評価し、前回書き込んだ値から変化したときだけ書き込む"""
+        if rule.when and not rule.when(*inputs):
+            return
+        dst = rule.target
+        value = to_node_value(dst, rule.expr(*inputs))
+
+        worker = self.workers[(dst['host'], dst['port'])]
+        if self.expr_outputs.get(rule.name) == (worker.epoch, value):
+            return
+        self.write_value(dst, value)
+        self.update_snapshot(dst, value)
+        self.expr_outputs[rule.name] = (worker.epoch, value)
+        self.log(f"[EXPR] {rule.name}: {dst['host']}:{dst['port']}@{dst['address']} = {value}")
+
+    def run_rule(self, rule, last_states):
+        if rule.is_mirror:
+            self.run_mirror(rule.conn, rule.name)
+            return
+
+        inputs = self.read_inputs(rule)
+        if inputs is None: return
+
+        if rule.expr:
+            self.run_transform(rule, inputs)
+            return
+
+        # when があればその結果、なければ trigger の値でエッジを判定する
+        if rule.when:
+            current_val = bool(rule.when(*inputs))
+        else:
+            current_val = inputs[rule.input_names.index('trigger')]
+        prev_val = last_states.get(rule.name, False)
+
+        if current_val and not prev_val:
+            self.log(f"[EVENT] Triggered: {rule.name}")
+            if rule.target:
+                self.write_value(rule.target, True)
+            for action, fn in rule.actions:
+                self.execute_action(rule, action, fn, inputs)
+
+        elif not current_val and prev_val:
+            if rule.target:
+                self.write_value(rule.target, False)
+
+        last_states[rule.name] = current_val
+
+    def run_mirror(self, conn, rule_name):
+        """
+        source の範囲を target へ毎周期コピーする。
+        前回書き込んだイメージと比較し、変化した連続区間だけを書き込む。
+        """
+        src = conn['source']
+        dst = conn['target']
+        count = src.get('count', 1)
+
+        values = self.snapshot.get((src['host'], src['port']))
+        if values is None: return
+        space = NODE_SPACE[src['type']]
+        image = [values[space].get(a) for a in range(src['address'], src['address'] + count)]
+        if None in image: return
+
+        worker = self.workers[(dst['host'], dst['port'])]
+        epoch, last = self.mirror_images.get(rule_name, (None, None))
+        if last is None or epoch != worker.epoch:
+            # 初回 / 再接続後は全体を書き直す
+            last = [None] * count
+            self.log(f"[MIRROR] {rule_name}: full sync {count} points -> {dst['host']}:{dst['port']}@{dst['address']}")
+
+        dst_space = NODE_SPACE[dst['type']]
+        for offset, n in changed_runs(image, last, MAX_WRITE_COUNT[dst_space]):
+            worker.queue_write_block(dst, dst['address'] + offset, image[offset:offset + n])
+
+        self.mirror_images[rule_name] = (worker.epoch, image)
 
     def run(self):
-        self.log(f"[*] START ({len(self.connections)} rules, cycle={self.cycle}s)")
+        self.log(f"[*] START ({len(self.connections)} rules, cycle={self.cycle}s, host_deadline={self.host_deadline}s)")
         last_states = {}
 
         try:
-            while True:
+            while not self.stop_event.is_set():
+                cycle_start = time.time()
                 try:
-                    # 1. ハートビート監視
-                    targets = set()
-                    for conn in self.connections:
-                        for key in ['trigger', 'source', 'target']:
-                            node = conn.get(key)
-                            if node: targets.add((node['host'], node['port']))
-                    
-                    for h, p in targets:
-                        self.check_heartbeat(h, p)
+                    # 1. 全ホストの読み出し（ハートビート含む）を並行に実行
+                    self.read_snapshot()
 
                     # 2. 転送ルール処理
-                    for i, conn in enumerate(self.connections):
-                        rule_name = conn.get('name', f"rule_{i}")
-                        trigger_node = conn.get('trigger') or conn.get('source')
-                        current_val = self.read_value(trigger_node)
-                        
-                        if current_val is None: continue
-                        prev_val = last_states.get(rule_name, False)
-
-                        if current_val and not prev_val:
-                            self.log(f"[EVENT] Triggered: {rule_name}")
-                            if 'target' in conn:
-                                self.write_value(conn['target'], True)
-                            for action in conn.get('actions', []):
-                                self.execute_action(action, rule_name)
-                        
-                        elif not current_val and prev_val:
-                            if 'target' in conn:
-                                self.write_value(conn['target'], False)
-
-                        last_states[rule_name] = current_val
+                    for rule in self.rules:
+                        try:
+                            self.run_rule(rule, last_states)
+                        except (ArithmeticError, TypeError, ValueError) as e:
+                            # 0除算などはそのルールのこの周期だけスキップする
+                            self.log(f"[ERROR] {rule.name}: expression error: {e}", level=ERROR)
+
+                    # 3. この周期の書き込みをホストごとにまとめて送る
+                    for worker in self.workers.values():
+                        worker.flush_writes()
 
                 except Exception as e:
-                    self.log(f"[ERROR] Loop error: {e}")
+                    self.log(f"[ERROR] Loop error: {e}", level=ERROR)
 
                 if time.time() - self.last_alive >= 5:
-                    self.log(f"[*] alive")
+                    sent = sum(w.writes_sent for w in self.workers.values())
+                    suppressed = sum(w.writes_suppressed for w in self.workers.values())
+                    coalesced = sum(w.writes_coalesced for w in self.workers.values())
+                    self.log(f"[*] alive (writes sent={sent} suppressed={suppressed} coalesced={coalesced})")
                     self.last_alive = time.time()
 
-                time.sleep(self.cycle)
+                # 周期の開始時刻を基準に待つ（読み出し時間の分だけ周期が延びないようにする）
+                self.stop_event.wait(max(0.0, cycle_start + self.cycle - time.time()))
 
         except KeyboardInterrupt:
             self.log("[*] Interrupted by user")
         finally:
             self.shutdown()
 
+    def stop(self):
+        """別スレッドから run() を止める（plant_runner 用）"""
+        self.stop_event.set()
+
     def shutdown(self):
-        for key, client in self.clients.items():
-            try:
-                client.close()
-                self.log(f"[*] Closed connection to {key}")
-            except: pass
+        if getattr(self, '_stopped', False):
+            return
+        self._stopped = True
+        for key, worker in self.workers.items():
+            worker.close()
+            self.log(f"[*] Closed connection to {worker.key}")
         self.log("[*] STOP")
         self.logger.close()
 
-if __name__ == "__main__":
+def main():
     if len(sys.argv) != 2:
         print("Usage: python iodevice.py device_conf/iodevice.yaml")
         sys.exit(1)
@@ -254,4 +651,8 @@ if __name__ == "__main__":
     try:
         IODevice(sys.argv[1]).run()
     except Exception as e:
-        print(f"Fatal error: {e}")
\ No newline at end of file
+        print(f"Fatal error: {e}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,5 +1,14 @@
+import threading
+
 from ladder_parser import Lark_StandAlone, Transformer, Token
 
+BLOCK_AREAS = "XYMD"  # ブロック命令で使えるデバイス
+
+# 条件付きスキップ（MC / CJ）で飛ばした区間の出力の扱いの既定値
+#   hold  : 飛ばす直前の値のまま
+#   reset : 飛ばし始めたときに、区間内のコイルを OFF・タイマーをリセットする（条件 OFF で実行したのと同じ）
+DEFAULT_SKIP_MODE = {"MC": "reset", "CJ": "hold"}
+
 class LadderTransformer(Transformer):
     def _transform_device(self, item):
         """
@@ -48,6 +57,52 @@ class LadderTransformer(Transformer):
             "preset": int(items[2])
         }
 
+    # ブロック命令。実行時にリストのスライスでまとめて処理する（plcsim.PLC.execute_block）
+    # デバイスは (領域, 先頭番号) で持つ。X / Y / M / D のみ（T / C は辞書のため対象外）
+    def _block_device(self, token):
+        name = str(token)
+        if name[0] not in BLOCK_AREAS:
+            raise ValueError(f"block instruction supports {', '.join(BLOCK_AREAS)} only: {name}")
+        return (name[0], int(name[1:]))
+
+    def _block_count(self, token):
+        n = int(token)
+        if n <= 0:
+            raise ValueError(f"block size must be positive: {n}")
+        return n
+
+    def block_move(self, items):
+        # BMOV D0 D100 10 -> D100〜D109 = D0〜D9
+        return {"type": "BMOV", "src": self._block_device(items[0]), "dst": self._block_device(items[1]),
+                "n": self._block_count(items[2])}
+
+    def block_fill(self, items):
+        # FMOV D0 D100 10 / FMOV 5 D100 10 -> D100〜D109 をすべて同じ値にする
+        src = self._block_device(items[0]) if items[0].type == 'DEVICE' else int(items[0])
+        return {"type": "FMOV", "src": src, "dst": self._block_device(items[1]), "n": self._block_count(items[2])}
+
+    def block_compare(self, items):
+        # BCMP D0 D100 10 M10 -> D0〜D9 と D100〜D109 がすべて等しければ M10 を ON
+        return {"type": "BCMP", "src": self._block_device(items[0]), "src2": self._block_device(items[1]),
+                "n": self._block_count(items[2]), "dst": self._block_device(items[3])}
+
+    def block_reduce(self, items):
+        # SUM D0 10 D200 -> D200 = D0〜D9 の合計（AVG / MIN / MAX も同じ形）
+        return {"type": str(items[0]), "src": self._block_device(items[1]), "n": self._block_count(items[2]),
+                "dst": self._block_device(items[3])}
+
+    # 条件付きスキップ。区間の終わり（MCR / LABEL）は link_jumps で rung の番号に解決する
+    def _skip_mode(self, kind, items):
+        return str(items[1]).lower() if len(items) > 1 and items[1] is not None else DEFAULT_SKIP_MODE[kind]
+
+    def mc_inst(self, items):
+        # [ M0 ] --(MC N0) ... MCR N0 -> M0 が OFF の間は MCR N0 までを飛ばす
+        return {"type": "MC", "label": str(items[0]), "mode": self._skip_mode("MC", items)}
+
+    def cj_inst(self, items):
+        # [ M0 ] --(CJ P1) ... LABEL P1 -> M0 が ON の間は LABEL P1 までを飛ばす
+        return {"type": "CJ", "label": str(items[0]), "mode": self._skip_mode("CJ", items)}
+
     def out_sequence(self, items):
         # items[0] は現在の出力 (dict)
         # items[1] は次の out_sequence (list または None)
@@ -67,6 +122,16 @@ class LadderTransformer(Transformer):
     def end_rung(self, _):
         return {"type": "END"}
 
+    def mcr_rung(self, items):
+        return {"type": "MCR", "label": str(items[0])}
+
+    def label_rung(self, items):
+        return {"type": "LABEL", "label": str(items[0])}
+
+    def condition(self, items):
+        # 出力の無い条件式だけの行（SFC の遷移条件）。compile_condition でのみ使う
+        return {"type": "CONDITION", "logic": self._transform_device(items[0])}
+
     # 比較演算 [ C0 < 100 ] の評価
     def op_compare(self, items):
         # items: [左辺, 演算子, 右辺]
@@ -84,7 +149,8 @@ class LadderTransformer(Transformer):
     def calc_expr(self, items):
         # DEVICE "=" math_expr
         target = self._transform_device(items[0])
-        expression = items[1]
+        # 右辺が1項だけ（D0 = D1）の場合は math_expr を通らず Token のまま届くため、ここで変換する
+        expression = self._transform_device(items[1])
         return f"{target} = {expression}"
 
     def math_expr(self, items):
@@ -134,4 +200,70 @@ class LadderCompiler:
         if not line or line.startswith("#"):
             return None
         tree = self.parser.parse(line)
-        return self.transformer.transform(tree)
\ No newline at end of file
+        rung = self.transformer.transform(tree)
+        if rung.get("type") == "CONDITION":
+            raise ValueError(f"rung without output: {line}")
+        return rung
+
+    def compile_condition(self, expr):
+        """条件式だけ（"X0 AND NOT T0"）を eval する文字列にする"""
+        tree = self.parser.parse(str(expr).strip())
+        cond = self.transformer.transform(tree)
+        if not isinstance(cond, dict) or cond.get("type") != "CONDITION":
+            raise ValueError(f"condition expected: {expr}")
+        return cond["logic"]
+
+def rung_outputs(rung):
+    outputs = rung.get("outputs")
+    if outputs is None:
+        return []
+    return outputs if isinstance(outputs, list) else [outputs]
+
+
+def link_jumps(rungs):
+    """
+    コンパイル済みの rung 列の MC / CJ を、飛び先の rung の番号に解決する（タスクごとに呼ぶ）。
+    MC / CJ の rung には rung["jump"] を付ける:
+      end    : 飛び先（MCR / LABEL の rung）の番号。実行はその次の rung から続ける
+      resets : reset のとき条件 OFF で実行し直す (rung の番号, 出力) のリスト（COIL / TON のみ）
+      active : 直前のスキャンで区間を実行したか（None は未実行。reset は実行 -> スキップの変化時だけ行う）
+    飛び先は後ろにしか置けない（後ろ向きのジャンプはスキャンが終わらなくなるため）
+    """
+    ends = {"MC": "MCR", "CJ": "LABEL"}
+    for idx, rung in enumerate(rungs):
+        outputs = rung_outputs(rung)
+        jumps = [out for out in outputs if out.get("type") in ends]
+        if not jumps:
+            continue
+        if len(outputs) > 1:
+            raise ValueError(f"rung {idx}: {jumps[0]['type']} must be the only output of the rung")
+        jump = jumps[0]
+        end_type = ends[jump["type"]]
+        for end in range(idx + 1, len(rungs)):
+            if rungs[end].get("type") == end_type and rungs[end].get("label") == jump["label"]:
+                break
+        else:
+            raise ValueError(f"rung {idx}: {jump['type']} {jump['label']} without {end_type} {jump['label']} after it")
+        jump["end"] = end
+        jump["resets"] = [
+            (i, out)
+            for i in range(idx + 1, end)
+            for out in rung_outputs(rungs[i])
+            if out.get("type") in ("COIL", "TON")
+        ] if jump["mode"] == "reset" else []
+        jump["active"] = None
+        rung["jump"] = jump
+    return rungs
+
+
+# Lark パーサーの組み立ては重いため、プロセス内で1つを共有する
+# （zygote は fork 前にこれを呼び、子の plcsim は組み立て済みのものを使う）。
+# 共有したパーサーを複数のスレッドから同時に使わないよう、コンパイルは COMPILE_LOCK の中で行う
+_shared_compiler = None
+COMPILE_LOCK = threading.Lock()
+
+def get_compiler():
+    global _shared_compiler
+    if _shared_compiler is None:
+        _shared_compiler = LadderCompiler()
+    return _shared_compiler
@@ -3561,10 +3561,10 @@ class PythonIndenter(Indenter):
 
 import pickle, zlib, base64
 DATA = (
-{'parser': {'lexer_conf': {'terminals': [{'@': 0}, {'@': 1}, {'@': 2}, {'@': 3}, {'@': 4}, {'@': 5}, {'@': 6}, {'@': 7}, {'@': 8}, {'@': 9}, {'@': 10}, {'@': 11}, {'@': 12}, {'@': 13}, {'@': 14}, {'@': 15}, {'@': 16}, {'@': 17}], 'ignore': ['WS'], 'g_regex_flags': 0, 'use_bytes': False, 'lexer_type': 'contextual', '__type__': 'LexerConf'}, 'parser_conf': {'rules': [{'@': 18}, {'@': 19}, {'@': 20}, {'@': 21}, {'@': 22}, {'@': 23}, {'@': 24}, {'@': 25}, {'@': 26}, {'@': 27}, {'@': 28}, {'@': 29}, {'@': 30}, {'@': 31}, {'@': 32}, {'@': 33}, {'@': 34}, {'@': 35}, {'@': 36}, {'@': 37}, {'@': 38}, {'@': 39}, {'@': 40}, {'@': 41}, {'@': 42}, {'@': 43}, {'@': 44}, {'@': 45}, {'@': 46}, {'@': 47}, {'@': 48}, {'@': 49}, {'@': 50}, {'@': 51}, {'@': 52}, {'@': 53}], 'start': ['start'], 'parser_type': 'lalr', '__type__': 'ParserConf'}, 'parser': {'tokens': {0: 'COMP_OP', 1: '__ANON_0', 2: 'AND', 3: 'OR', 4: 'RSQB', 5: 'DEVICE', 6: 'NUMBER', 7: 'term', 8: 'RPAR', 9: '$END', 10: 'logic_and', 11: 'FALSE', 12: 'logic_or', 13: 'start', 14: 'LSQB', 15: 'rung', 16: 'factor', 17: 'comparison', 18: 'END', 19: 'NOT', 20: 'TRUE', 21: 'logic_not', 22: 'logic_expr', 23: 'OP', 24: 'out_sequence', 25: 'EQUAL', 26: '__logic_or_star_0', 27: '__logic_and_star_1', 28: '__math_expr_star_2', 29: 'math_expr', 30: 'out_target', 31: 'calc_expr', 32: 'RES', 33: 'INST'}, 'states': {0: {0: (0, 12), 1: (1, {'@': 30}), 2: (1, {'@': 30}), 3: (1, {'@': 30}), 4: (1, {'@': 30})}, 1: {5: (0, 10), 6: (0, 34), 7: (0, 40)}, 2: {0: (0, 22)}, 3: {8: (1, {'@': 41})}, 4: {9: (1, {'@': 20})}, 5: {1: (1, {'@': 49}), 4: (1, {'@': 49}), 3: (1, {'@': 49})}, 6: {10: (0, 33), 11: (0, 27), 12: (0, 31), 13: (0, 20), 5: (0, 0), 6: (0, 2), 14: (0, 21), 15: (0, 51), 16: (0, 38), 17: (0, 49), 18: (0, 4), 19: (0, 52), 20: (0, 29), 21: (0, 41), 22: (0, 14)}, 7: {1: (1, {'@': 26}), 2: (1, {'@': 26}), 3: (1, {'@': 26}), 4: (1, {'@': 26})}, 8: {1: (1, {'@': 48}), 4: (1, {'@': 48}), 3: (1, {'@': 48})}, 9: {2: (0, 24), 1: (1, {'@': 24}), 3: (1, {'@': 24}), 4: (1, {'@': 24})}, 10: {23: (1, {'@': 46}), 8: (1, {'@': 46})}, 11: {4: (0, 35)}, 12: {5: (0, 16), 6: (0, 19)}, 13: {1: (1, {'@': 35}), 2: (1, {'@': 35}), 3: (1, {'@': 35}), 4: (1, {'@': 35})}, 14: {1: (0, 56), 24: (0, 23)}, 15: {5: (0, 42)}, 16: {1: (1, {'@': 33}), 2: (1, {'@': 33}), 3: (1, {'@': 33}), 4: (1, {'@': 33})}, 17: {1: (1, {'@': 36}), 2: (1, {'@': 36}), 3: (1, {'@': 36}), 4: (1, {'@': 36})}, 18: {25: (0, 48), 8: (1, {'@': 39})}, 19: {1: (1, {'@': 34}), 2: (1, {'@': 34}), 3: (1, {'@': 34}), 4: (1, {'@': 34})}, 20: {}, 21: {21: (0, 41), 10: (0, 33), 6: (0, 2), 16: (0, 38), 11: (0, 27), 12: (0, 31), 17: (0, 49), 5: (0, 0), 20: (0, 29), 22: (0, 11), 14: (0, 21), 19: (0, 52)}, 22: {6: (0, 17), 5: (0, 13)}, 23: {9: (1, {'@': 19})}, 24: {19: (0, 52), 6: (0, 2), 21: (0, 46), 16: (0, 38), 11: (0, 27), 5: (0, 0), 17: (0, 49), 20: (0, 29), 14: (0, 21)}, 25: {8: (1, {'@': 42})}, 26: {8: (1, {'@': 43})}, 27: {1: (1, {'@': 32}), 2: (1, {'@': 32}), 3: (1, {'@': 32}), 4: (1, {'@': 32})}, 28: {19: (0, 52), 6: (0, 2), 16: (0, 38), 11: (0, 27), 5: (0, 0), 17: (0, 49), 20: (0, 29), 21: (0, 55), 14: (0, 21)}, 29: {1: (1, {'@': 31}), 2: (1, {'@': 31}), 3: (1, {'@': 31}), 4: (1, {'@': 31})}, 30: {21: (0, 41), 6: (0, 2), 16: (0, 38), 10: (0, 8), 11: (0, 27), 5: (0, 0), 17: (0, 49), 20: (0, 29), 14: (0, 21), 19: (0, 52)}, 31: {1: (1, {'@': 21}), 4: (1, {'@': 21})}, 32: {21: (0, 41), 6: (0, 2), 10: (0, 5), 16: (0, 38), 11: (0, 27), 5: (0, 0), 17: (0, 49), 20: (0, 29), 14: (0, 21), 19: (0, 52)}, 33: {26: (0, 53), 3: (0, 30), 1: (1, {'@': 23}), 4: (1, {'@': 23})}, 34: {23: (1, {'@': 47}), 8: (1, {'@': 47})}, 35: {1: (1, {'@': 28}), 2: (1, {'@': 28}), 3: (1, {'@': 28}), 4: (1, {'@': 28})}, 36: {23: (0, 54), 8: (1, {'@': 44})}, 37: {23: (1, {'@': 53}), 8: (1, {'@': 53})}, 38: {1: (1, {'@': 27}), 2: (1, {'@': 27}), 3: (1, {'@': 27}), 4: (1, {'@': 27})}, 39: {8: (0, 44)}, 40: {23: (1, {'@': 52}), 8: (1, {'@': 52})}, 41: {2: (0, 28), 27: (0, 9), 1: (1, {'@': 25}), 3: (1, {'@': 25}), 4: (1, {'@': 25})}, 42: {8: (1, {'@': 40})}, 43: {6: (0, 3)}, 44: {1: (0, 56), 24: (0, 47), 9: (1, {'@': 38})}, 45: {28: (0, 36), 23: (0, 1), 8: (1, {'@': 45})}, 46: {1: (1, {'@': 51}), 3: (1, {'@': 51}), 4: (1, {'@': 51}), 2: (1, {'@': 51})}, 47: {9: (1, {'@': 37})}, 48: {7: (0, 45), 6: (0, 34), 5: (0, 10), 29: (0, 26)}, 49: {1: (1, {'@': 29}), 2: (1, {'@': 29}), 3: (1, {'@': 29}), 4: (1, {'@': 29})}, 50: {5: (0, 43)}, 51: {9: (1, {'@': 18})}, 52: {6: (0, 2), 11: (0, 27), 5: (0, 0), 17: (0, 49), 20: (0, 29), 16: (0, 7), 14: (0, 21)}, 53: {3: (0, 32), 1: (1, {'@': 22}), 4: (1, {'@': 22})}, 54: {7: (0, 37), 5: (0, 10), 6: (0, 34)}, 55: {1: (1, {'@': 50}), 3: (1, {'@': 50}), 4: (1, {'@': 50}), 2: (1, {'@': 50})}, 56: {30: (0, 39), 31: (0, 25), 5: (0, 18), 32: (0, 15), 33: (0, 50)}}, 'start_states': {'start': 6}, 'end_states': {'start': 20}}, '__type__': 'ParsingFrontend'}, 'rules': [{'@': 18}, {'@': 19}, {'@': 20}, {'@': 21}, {'@': 22}, {'@': 23}, {'@': 24}, {'@': 25}, {'@': 26}, {'@': 27}, {'@': 28}, {'@': 29}, {'@': 30}, {'@': 31}, {'@': 32}, {'@': 33}, {'@': 34}, {'@': 35}, {'@': 36}, {'@': 37}, {'@': 38}, {'@': 39}, {'@': 40}, {'@': 41}, {'@': 42}, {'@': 43}, {'@': 44}, {'@': 45}, {'@': 46}, {'@': 47}, {'@': 48}, {'@': 49}, {'@': 50}, {'@': 51}, {'@': 52}, {'@': 53}], 'options': {'debug': False, 'strict': False, 'keep_all_tokens': False, 'tree_class': None, 'cache': False, 'cache_grammar': False, 'postlex': None, 'parser': 'lalr', 'lexer': 'contextual', 'transformer': None, 'start': ['start'], 'priority': 'normal', 'ambiguity': 'auto', 'regex': False, 'propagate_positions': False, 'lexer_callbacks': {}, 'maybe_placeholders': False, 'edit_terminals': None, 'g_regex_flags': 0, 'use_bytes': False, 'ordered_sets': True, 'import_paths': [], 'source_path': None, '_plugins': {}}, '__type__': 'Lark'}
+{'parser': {'lexer_conf': {'terminals': [{'@': 0}, {'@': 1}, {'@': 2}, {'@': 3}, {'@': 4}, {'@': 5}, {'@': 6}, {'@': 7}, {'@': 8}, {'@': 9}, {'@': 10}, {'@': 11}, {'@': 12}, {'@': 13}, {'@': 14}, {'@': 15}, {'@': 16}, {'@': 17}, {'@': 18}, {'@': 19}, {'@': 20}, {'@': 21}, {'@': 22}, {'@': 23}, {'@': 24}, {'@': 25}, {'@': 26}, {'@': 27}, {'@': 28}], 'ignore': ['WS'], 'g_regex_flags': 0, 'use_bytes': False, 'lexer_type': 'contextual', '__type__': 'LexerConf'}, 'parser_conf': {'rules': [{'@': 29}, {'@': 30}, {'@': 31}, {'@': 32}, {'@': 33}, {'@': 34}, {'@': 35}, {'@': 36}, {'@': 37}, {'@': 38}, {'@': 39}, {'@': 40}, {'@': 41}, {'@': 42}, {'@': 43}, {'@': 44}, {'@': 45}, {'@': 46}, {'@': 47}, {'@': 48}, {'@': 49}, {'@': 50}, {'@': 51}, {'@': 52}, {'@': 53}, {'@': 54}, {'@': 55}, {'@': 56}, {'@': 57}, {'@': 58}, {'@': 59}, {'@': 60}, {'@': 61}, {'@': 62}, {'@': 63}, {'@': 64}, {'@': 65}, {'@': 66}, {'@': 67}, {'@': 68}, {'@': 69}, {'@': 70}, {'@': 71}, {'@': 72}, {'@': 73}, {'@': 74}, {'@': 75}, {'@': 76}], 'start': ['start'], 'parser_type': 'lalr', '__type__': 'ParserConf'}, 'parser': {'tokens': {0: '__ANON_0', 1: 'out_sequence', 2: '$END', 3: 'OP', 4: 'RPAR', 5: 'POINTER', 6: 'DEVICE', 7: 'RSQB', 8: 'NUMBER', 9: 'AND', 10: 'OR', 11: 'factor', 12: 'NOT', 13: 'LSQB', 14: 'comparison', 15: 'FALSE', 16: 'TRUE', 17: 'logic_not', 18: 'EQUAL', 19: 'logic_and', 20: 'logic_or', 21: 'logic_expr', 22: 'SKIP_MODE', 23: 'term', 24: 'start', 25: 'LABEL', 26: 'END', 27: 'rung', 28: 'MCR', 29: 'NEST', 30: 'COMP_OP', 31: 'math_expr', 32: '__logic_and_star_1', 33: '__logic_or_star_0', 34: '__math_expr_star_2', 35: 'CJ', 36: 'out_target', 37: 'BCMP', 38: 'calc_expr', 39: 'RES', 40: 'FMOV', 41: 'BLOCK_FUNC', 42: 'MC', 43: 'INST', 44: 'BMOV'}, 'states': {0: {0: (0, 85), 1: (0, 43), 2: (1, {'@': 52})}, 1: {3: (1, {'@': 75}), 4: (1, {'@': 75})}, 2: {5: (0, 25)}, 3: {6: (0, 60)}, 4: {7: (1, {'@': 35}), 2: (1, {'@': 35}), 0: (1, {'@': 35})}, 5: {2: (1, {'@': 30})}, 6: {4: (1, {'@': 56})}, 7: {6: (0, 54)}, 8: {6: (0, 69)}, 9: {8: (0, 6)}, 10: {9: (1, {'@': 49}), 2: (1, {'@': 49}), 0: (1, {'@': 49}), 7: (1, {'@': 49}), 10: (1, {'@': 49})}, 11: {9: (1, {'@': 48}), 2: (1, {'@': 48}), 0: (1, {'@': 48}), 7: (1, {'@': 48}), 10: (1, {'@': 48})}, 12: {8: (0, 82), 6: (0, 35), 11: (0, 71), 12: (0, 74), 13: (0, 22), 14: (0, 17), 15: (0, 53), 16: (0, 61), 17: (0, 49)}, 13: {4: (1, {'@': 57})}, 14: {6: (0, 36)}, 15: {4: (1, {'@': 59})}, 16: {18: (0, 46), 4: (1, {'@': 53})}, 17: {9: (1, {'@': 43}), 2: (1, {'@': 43}), 0: (1, {'@': 43}), 7: (1, {'@': 43}), 10: (1, {'@': 43})}, 18: {3: (1, {'@': 69}), 4: (1, {'@': 69})}, 19: {6: (0, 41)}, 20: {3: (1, {'@': 70}), 4: (1, {'@': 70})}, 21: {4: (1, {'@': 65})}, 22: {8: (0, 82), 19: (0, 63), 6: (0, 35), 20: (0, 4), 11: (0, 71), 21: (0, 33), 17: (0, 52), 12: (0, 74), 13: (0, 22), 14: (0, 17), 15: (0, 53), 16: (0, 61)}, 23: {9: (1, {'@': 42}), 2: (1, {'@': 42}), 0: (1, {'@': 42}), 7: (1, {'@': 42}), 10: (1, {'@': 42})}, 24: {3: (0, 29), 4: (1, {'@': 67})}, 25: {22: (0, 39), 4: (1, {'@': 64})}, 26: {8: (0, 14), 6: (0, 8)}, 27: {9: (1, {'@': 47}), 2: (1, {'@': 47}), 0: (1, {'@': 47}), 7: (1, {'@': 47}), 10: (1, {'@': 47})}, 28: {6: (0, 47)}, 29: {23: (0, 51), 6: (0, 18), 8: (0, 20)}, 30: {9: (1, {'@': 40}), 2: (1, {'@': 40}), 0: (1, {'@': 40}), 7: (1, {'@': 40}), 10: (1, {'@': 40})}, 31: {15: (0, 53), 24: (0, 59), 8: (0, 82), 6: (0, 35), 21: (0, 66), 11: (0, 71), 12: (0, 74), 19: (0, 63), 20: (0, 4), 25: (0, 83), 17: (0, 52), 13: (0, 22), 26: (0, 72), 27: (0, 64), 14: (0, 17), 16: (0, 61), 28: (0, 73)}, 32: {4: (1, {'@': 60})}, 33: {7: (0, 23)}, 34: {29: (0, 48)}, 35: {30: (0, 62), 9: (1, {'@': 44}), 2: (1, {'@': 44}), 0: (1, {'@': 44}), 7: (1, {'@': 44}), 10: (1, {'@': 44})}, 36: {8: (0, 84)}, 37: {7: (1, {'@': 71}), 2: (1, {'@': 71}), 0: (1, {'@': 71}), 10: (1, {'@': 71})}, 38: {9: (1, {'@': 50}), 2: (1, {'@': 50}), 0: (1, {'@': 50}), 7: (1, {'@': 50}), 10: (1, {'@': 50})}, 39: {4: (1, {'@': 63})}, 40: {6: (0, 67)}, 41: {4: (1, {'@': 54})}, 42: {4: (0, 0)}, 43: {2: (1, {'@': 51})}, 44: {8: (0, 82), 6: (0, 35), 11: (0, 71), 17: (0, 52), 12: (0, 74), 13: (0, 22), 14: (0, 17), 15: (0, 53), 19: (0, 37), 16: (0, 61)}, 45: {7: (1, {'@': 72}), 2: (1, {'@': 72}), 0: (1, {'@': 72}), 10: (1, {'@': 72})}, 46: {23: (0, 78), 6: (0, 18), 8: (0, 20), 31: (0, 75)}, 47: {6: (0, 9)}, 48: {22: (0, 50), 4: (1, {'@': 62})}, 49: {9: (1, {'@': 73}), 2: (1, {'@': 73}), 0: (1, {'@': 73}), 7: (1, {'@': 73}), 10: (1, {'@': 73})}, 50: {4: (1, {'@': 61})}, 51: {3: (1, {'@': 76}), 4: (1, {'@': 76})}, 52: {9: (0, 12), 32: (0, 55), 7: (1, {'@': 39}), 10: (1, {'@': 39}), 2: (1, {'@': 39}), 0: (1, {'@': 39})}, 53: {9: (1, {'@': 46}), 2: (1, {'@': 46}), 0: (1, {'@': 46}), 7: (1, {'@': 46}), 10: (1, {'@': 46})}, 54: {8: (0, 81)}, 55: {9: (0, 86), 7: (1, {'@': 38}), 10: (1, {'@': 38}), 2: (1, {'@': 38}), 0: (1, {'@': 38})}, 56: {6: (0, 7)}, 57: {10: (0, 70), 7: (1, {'@': 36}), 2: (1, {'@': 36}), 0: (1, {'@': 36})}, 58: {6: (0, 32)}, 59: {}, 60: {8: (0, 58)}, 61: {9: (1, {'@': 45}), 2: (1, {'@': 45}), 0: (1, {'@': 45}), 7: (1, {'@': 45}), 10: (1, {'@': 45})}, 62: {6: (0, 27), 8: (0, 11)}, 63: {10: (0, 44), 33: (0, 57), 7: (1, {'@': 37}), 2: (1, {'@': 37}), 0: (1, {'@': 37})}, 64: {2: (1, {'@': 29})}, 65: {2: (1, {'@': 32})}, 66: {0: (0, 85), 1: (0, 5), 2: (1, {'@': 34})}, 67: {8: (0, 80)}, 68: {8: (0, 38), 6: (0, 10)}, 69: {8: (0, 13)}, 70: {8: (0, 82), 6: (0, 35), 11: (0, 71), 17: (0, 52), 12: (0, 74), 13: (0, 22), 14: (0, 17), 15: (0, 53), 19: (0, 45), 16: (0, 61)}, 71: {9: (1, {'@': 41}), 2: (1, {'@': 41}), 0: (1, {'@': 41}), 7: (1, {'@': 41}), 10: (1, {'@': 41})}, 72: {2: (1, {'@': 31})}, 73: {29: (0, 65)}, 74: {8: (0, 82), 6: (0, 35), 11: (0, 30), 13: (0, 22), 14: (0, 17), 15: (0, 53), 16: (0, 61)}, 75: {4: (1, {'@': 66})}, 76: {2: (1, {'@': 33})}, 77: {23: (0, 1), 6: (0, 18), 8: (0, 20)}, 78: {3: (0, 77), 34: (0, 24), 4: (1, {'@': 68})}, 79: {9: (1, {'@': 74}), 2: (1, {'@': 74}), 0: (1, {'@': 74}), 7: (1, {'@': 74}), 10: (1, {'@': 74})}, 80: {4: (1, {'@': 55})}, 81: {6: (0, 15)}, 82: {30: (0, 68)}, 83: {5: (0, 76)}, 84: {4: (1, {'@': 58})}, 85: {35: (0, 2), 36: (0, 42), 37: (0, 56), 38: (0, 21), 39: (0, 19), 40: (0, 26), 41: (0, 3), 6: (0, 16), 42: (0, 34), 43: (0, 40), 44: (0, 28)}, 86: {8: (0, 82), 6: (0, 35), 11: (0, 71), 12: (0, 74), 13: (0, 22), 14: (0, 17), 15: (0, 53), 17: (0, 79), 16: (0, 61)}}, 'start_states': {'start': 31}, 'end_states': {'start': 59}}, '__type__': 'ParsingFrontend'}, 'rules': [{'@': 29}, {'@': 30}, {'@': 31}, {'@': 32}, {'@': 33}, {'@': 34}, {'@': 35}, {'@': 36}, {'@': 37}, {'@': 38}, {'@': 39}, {'@': 40}, {'@': 41}, {'@': 42}, {'@': 43}, {'@': 44}, {'@': 45}, {'@': 46}, {'@': 47}, {'@': 48}, {'@': 49}, {'@': 50}, {'@': 51}, {'@': 52}, {'@': 53}, {'@': 54}, {'@': 55}, {'@': 56}, {'@': 57}, {'@': 58}, {'@': 59}, {'@': 60}, {'@': 61}, {'@': 62}, {'@': 63}, {'@': 64}, {'@': 65}, {'@': 66}, {'@': 67}, {'@': 68}, {'@': 69}, {'@': 70}, {'@': 71}, {'@': 72}, {'@': 73}, {'@': 74}, {'@': 75}, {'@': 76}], 'options': {'debug': False, 'strict': False, 'keep_all_tokens': False, 'tree_class': None, 'cache': False, 'cache_grammar': False, 'postlex': None, 'parser': 'lalr', 'lexer': 'contextual', 'transformer': None, 'start': ['start'], 'priority': 'normal', 'ambiguity': 'auto', 'regex': False, 'propagate_positions': False, 'lexer_callbacks': {}, 'maybe_placeholders': False, 'edit_terminals': None, 'g_regex_flags': 0, 'use_bytes': False, 'ordered_sets': True, 'import_paths': [], 'source_path': None, '_plugins': {}}, '__type__': 'Lark'}
 )
 MEMO = (
-{0: {'name': 'WS', 'pattern': {'value': '(?:[ \t\x0c\r\n])+', 'flags': [], 'raw': None, '_width': [1, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 1: {'name': 'COMP_OP', 'pattern': {'value': '(?:==|!=|>=|<=|>|<)', 'flags': [], 'raw': None, '_width': [1, 2], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 2: {'name': 'DEVICE', 'pattern': {'value': '[XYMTCID]\\d+', 'flags': [], 'raw': '/[XYMTCID]\\d+/', '_width': [2, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 3: {'name': 'INST', 'pattern': {'value': '(?:TON|TOF|CTU)', 'flags': [], 'raw': None, '_width': [3, 3], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 4: {'name': 'OP', 'pattern': {'value': '(?:\\+|\\-|\\*|/)', 'flags': [], 'raw': None, '_width': [1, 1], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 5: {'name': 'NUMBER', 'pattern': {'value': '\\d+', 'flags': [], 'raw': '/\\d+/', '_width': [1, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 6: {'name': 'END', 'pattern': {'value': 'END', 'flags': [], 'raw': '"END"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 7: {'name': 'OR', 'pattern': {'value': 'OR', 'flags': [], 'raw': '"OR"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 8: {'name': 'AND', 'pattern': {'value': 'AND', 'flags': [], 'raw': '"AND"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 9: {'name': 'NOT', 'pattern': {'value': 'NOT', 'flags': [], 'raw': '"NOT"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 10: {'name': 'LSQB', 'pattern': {'value': '[', 'flags': [], 'raw': '"["', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 11: {'name': 'RSQB', 'pattern': {'value': ']', 'flags': [], 'raw': '"]"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 12: {'name': 'TRUE', 'pattern': {'value': 'TRUE', 'flags': [], 'raw': '"TRUE"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 13: {'name': 'FALSE', 'pattern': {'value': 'FALSE', 'flags': [], 'raw': '"FALSE"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 14: {'name': '__ANON_0', 'pattern': {'value': '--(', 'flags': [], 'raw': '"--("', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 15: {'name': 'RPAR', 'pattern': {'value': ')', 'flags': [], 'raw': '")"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 16: {'name': 'RES', 'pattern': {'value': 'RES', 'flags': [], 'raw': '"RES"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 17: {'name': 'EQUAL', 'pattern': {'value': '=', 'flags': [], 'raw': '"="', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 18: {'origin': {'name': 'start', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'rung', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 19: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_expr', '__type__': 'NonTerminal'}, {'name': 'out_sequence', '__type__': 'NonTerminal'}], 'order': 0, 'alias': 'standard_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 20: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'END', 'filter_out': True, '__type__': 'Terminal'}], 'order': 1, 'alias': 'end_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 21: {'origin': {'name': 'logic_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_or', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 22: {'origin': {'name': 'logic_or', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_and', '__type__': 'NonTerminal'}, {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 23: {'origin': {'name': 'logic_or', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 24: {'origin': {'name': 'logic_and', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_not', '__type__': 'NonTerminal'}, {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 25: {'origin': {'name': 'logic_and', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 26: {'origin': {'name': 'logic_not', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NOT', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'factor', '__type__': 'NonTerminal'}], 'order': 0, 'alias': 'op_not', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 27: {'origin': {'name': 'logic_not', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'factor', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 28: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'LSQB', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_expr', '__type__': 'NonTerminal'}, {'name': 'RSQB', 'filter_out': True, '__type__': 'Terminal'}], 'order': 0, 'alias': 'nested', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 29: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'comparison', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 30: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'device', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 31: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'TRUE', 'filter_out': True, '__type__': 'Terminal'}], 'order': 3, 'alias': 'const_true', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 32: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'FALSE', 'filter_out': True, '__type__': 'Terminal'}], 'order': 4, 'alias': 'const_false', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 33: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 34: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 35: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 36: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 3, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 37: {'origin': {'name': 'out_sequence', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__ANON_0', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_target', '__type__': 'NonTerminal'}, {'name': 'RPAR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_sequence', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 38: {'origin': {'name': 'out_sequence', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__ANON_0', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_target', '__type__': 'NonTerminal'}, {'name': 'RPAR', 'filter_out': True, '__type__': 'Terminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 39: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': 'coil', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 40: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'RES', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': 'res_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 41: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'INST', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'timer_counter_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 42: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'calc_expr', '__type__': 'NonTerminal'}], 'order': 3, 'alias': 'calc_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 43: {'origin': {'name': 'calc_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'EQUAL', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'math_expr', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 44: {'origin': {'name': 'math_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'term', '__type__': 'NonTerminal'}, {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 45: {'origin': {'name': 'math_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'term', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 46: {'origin': {'name': 'term', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 47: {'origin': {'name': 'term', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 48: {'origin': {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'OR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 49: {'origin': {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, {'name': 'OR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 50: {'origin': {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'AND', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 51: {'origin': {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, {'name': 'AND', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 52: {'origin': {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'term', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 53: {'origin': {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, {'name': 'OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'term', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}}
+{0: {'name': 'WS', 'pattern': {'value': '(?:[ \t\x0c\r\n])+', 'flags': [], 'raw': None, '_width': [1, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 1: {'name': 'COMP_OP', 'pattern': {'value': '(?:==|!=|>=|<=|>|<)', 'flags': [], 'raw': None, '_width': [1, 2], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 2: {'name': 'DEVICE', 'pattern': {'value': '[XYMTCID]\\d+', 'flags': [], 'raw': '/[XYMTCID]\\d+/', '_width': [2, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 3: {'name': 'INST', 'pattern': {'value': '(?:TON|TOF|CTU)', 'flags': [], 'raw': None, '_width': [3, 3], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 4: {'name': 'BLOCK_FUNC', 'pattern': {'value': '(?:SUM|AVG|MIN|MAX)', 'flags': [], 'raw': None, '_width': [3, 3], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 5: {'name': 'SKIP_MODE', 'pattern': {'value': '(?:RESET|HOLD)', 'flags': [], 'raw': None, '_width': [4, 5], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 6: {'name': 'NEST', 'pattern': {'value': 'N\\d+', 'flags': [], 'raw': '/N\\d+/', '_width': [2, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 7: {'name': 'POINTER', 'pattern': {'value': 'P\\d+', 'flags': [], 'raw': '/P\\d+/', '_width': [2, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 8: {'name': 'OP', 'pattern': {'value': '(?:\\+|\\-|\\*|/)', 'flags': [], 'raw': None, '_width': [1, 1], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 9: {'name': 'NUMBER', 'pattern': {'value': '\\d+', 'flags': [], 'raw': '/\\d+/', '_width': [1, 18446744073709551616], '__type__': 'PatternRE'}, 'priority': 0, '__type__': 'TerminalDef'}, 10: {'name': 'END', 'pattern': {'value': 'END', 'flags': [], 'raw': '"END"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 11: {'name': 'MCR', 'pattern': {'value': 'MCR', 'flags': [], 'raw': '"MCR"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 12: {'name': 'LABEL', 'pattern': {'value': 'LABEL', 'flags': [], 'raw': '"LABEL"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 13: {'name': 'OR', 'pattern': {'value': 'OR', 'flags': [], 'raw': '"OR"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 14: {'name': 'AND', 'pattern': {'value': 'AND', 'flags': [], 'raw': '"AND"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 15: {'name': 'NOT', 'pattern': {'value': 'NOT', 'flags': [], 'raw': '"NOT"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 16: {'name': 'LSQB', 'pattern': {'value': '[', 'flags': [], 'raw': '"["', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 17: {'name': 'RSQB', 'pattern': {'value': ']', 'flags': [], 'raw': '"]"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 18: {'name': 'TRUE', 'pattern': {'value': 'TRUE', 'flags': [], 'raw': '"TRUE"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 19: {'name': 'FALSE', 'pattern': {'value': 'FALSE', 'flags': [], 'raw': '"FALSE"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 20: {'name': '__ANON_0', 'pattern': {'value': '--(', 'flags': [], 'raw': '"--("', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 21: {'name': 'RPAR', 'pattern': {'value': ')', 'flags': [], 'raw': '")"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 22: {'name': 'RES', 'pattern': {'value': 'RES', 'flags': [], 'raw': '"RES"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 23: {'name': 'BMOV', 'pattern': {'value': 'BMOV', 'flags': [], 'raw': '"BMOV"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 24: {'name': 'FMOV', 'pattern': {'value': 'FMOV', 'flags': [], 'raw': '"FMOV"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 25: {'name': 'BCMP', 'pattern': {'value': 'BCMP', 'flags': [], 'raw': '"BCMP"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 26: {'name': 'MC', 'pattern': {'value': 'MC', 'flags': [], 'raw': '"MC"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 27: {'name': 'CJ', 'pattern': {'value': 'CJ', 'flags': [], 'raw': '"CJ"', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 28: {'name': 'EQUAL', 'pattern': {'value': '=', 'flags': [], 'raw': '"="', '__type__': 'PatternStr'}, 'priority': 0, '__type__': 'TerminalDef'}, 29: {'origin': {'name': 'start', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'rung', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 30: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_expr', '__type__': 'NonTerminal'}, {'name': 'out_sequence', '__type__': 'NonTerminal'}], 'order': 0, 'alias': 'standard_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 31: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'END', 'filter_out': True, '__type__': 'Terminal'}], 'order': 1, 'alias': 'end_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 32: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'MCR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'NEST', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'mcr_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 33: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'LABEL', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'POINTER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 3, 'alias': 'label_rung', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 34: {'origin': {'name': 'rung', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_expr', '__type__': 'NonTerminal'}], 'order': 4, 'alias': 'condition', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 35: {'origin': {'name': 'logic_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_or', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 36: {'origin': {'name': 'logic_or', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_and', '__type__': 'NonTerminal'}, {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 37: {'origin': {'name': 'logic_or', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 38: {'origin': {'name': 'logic_and', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_not', '__type__': 'NonTerminal'}, {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 39: {'origin': {'name': 'logic_and', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 40: {'origin': {'name': 'logic_not', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NOT', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'factor', '__type__': 'NonTerminal'}], 'order': 0, 'alias': 'op_not', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 41: {'origin': {'name': 'logic_not', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'factor', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 42: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'LSQB', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_expr', '__type__': 'NonTerminal'}, {'name': 'RSQB', 'filter_out': True, '__type__': 'Terminal'}], 'order': 0, 'alias': 'nested', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 43: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'comparison', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 44: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'device', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 45: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'TRUE', 'filter_out': True, '__type__': 'Terminal'}], 'order': 3, 'alias': 'const_true', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 46: {'origin': {'name': 'factor', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'FALSE', 'filter_out': True, '__type__': 'Terminal'}], 'order': 4, 'alias': 'const_false', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 47: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 48: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 49: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 50: {'origin': {'name': 'comparison', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'COMP_OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 3, 'alias': 'op_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 51: {'origin': {'name': 'out_sequence', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__ANON_0', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_target', '__type__': 'NonTerminal'}, {'name': 'RPAR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_sequence', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 52: {'origin': {'name': 'out_sequence', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__ANON_0', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'out_target', '__type__': 'NonTerminal'}, {'name': 'RPAR', 'filter_out': True, '__type__': 'Terminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 53: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': 'coil', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 54: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'RES', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': 'res_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 55: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'INST', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 2, 'alias': 'timer_counter_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 56: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'BMOV', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 3, 'alias': 'block_move', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 57: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'FMOV', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 4, 'alias': 'block_fill', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 58: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'FMOV', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 5, 'alias': 'block_fill', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 59: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'BCMP', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 6, 'alias': 'block_compare', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 60: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'BLOCK_FUNC', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 7, 'alias': 'block_reduce', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 61: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'MC', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'NEST', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'SKIP_MODE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 8, 'alias': 'mc_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 62: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'MC', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'NEST', 'filter_out': False, '__type__': 'Terminal'}], 'order': 9, 'alias': 'mc_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 63: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'CJ', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'POINTER', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'SKIP_MODE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 10, 'alias': 'cj_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 64: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'CJ', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'POINTER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 11, 'alias': 'cj_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 65: {'origin': {'name': 'out_target', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'calc_expr', '__type__': 'NonTerminal'}], 'order': 12, 'alias': 'calc_inst', 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 66: {'origin': {'name': 'calc_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'EQUAL', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'math_expr', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 67: {'origin': {'name': 'math_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'term', '__type__': 'NonTerminal'}, {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 68: {'origin': {'name': 'math_expr', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'term', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 69: {'origin': {'name': 'term', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'DEVICE', 'filter_out': False, '__type__': 'Terminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 70: {'origin': {'name': 'term', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'NUMBER', 'filter_out': False, '__type__': 'Terminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': True, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 71: {'origin': {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'OR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 72: {'origin': {'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__logic_or_star_0', '__type__': 'NonTerminal'}, {'name': 'OR', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_and', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 73: {'origin': {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'AND', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 74: {'origin': {'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__logic_and_star_1', '__type__': 'NonTerminal'}, {'name': 'AND', 'filter_out': True, '__type__': 'Terminal'}, {'name': 'logic_not', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 75: {'origin': {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, 'expansion': [{'name': 'OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'term', '__type__': 'NonTerminal'}], 'order': 0, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}, 76: {'origin': {'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, 'expansion': [{'name': '__math_expr_star_2', '__type__': 'NonTerminal'}, {'name': 'OP', 'filter_out': False, '__type__': 'Terminal'}, {'name': 'term', '__type__': 'NonTerminal'}], 'order': 1, 'alias': None, 'options': {'keep_all_tokens': False, 'expand1': False, 'priority': None, 'template_source': None, 'empty_indices': (), '__type__': 'RuleOptions'}, '__type__': 'Rule'}}
 )
 Shift = 0
 Reduce = 1
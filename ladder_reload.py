@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+from ladder_compiler import COMPILE_LOCK
+from simlog import ERROR
+
+# -----------------------------
+# ラダーのオンライン変更（ホットリロード）
+# -----------------------------
+# plcsim を止めずに ladder.yaml を読み直し、スキャンの切れ目でプログラムを差し替える。
+# Modbus サーバーは動いたままなので、デバイスや IODevice の接続・heartbeat は途切れない。
+#
+#   要求     : ladder.yaml の更新（watch）/ SYS レジスタ 10006 への書き込み / request()
+#   コンパイル: 専用スレッドで行う（スキャンは待たない）。失敗したら今のプログラムのまま動かす
+#   差し替え  : PLC.tick() の先頭で PLC のタスク（plc_tasks）を新しいものに置き換えるだけ
+#
+# タイマー / カウンターの状態は Memory.T / C にデバイス（"self.mem.T[1]"）をキーにして
+# 持っているため、新しいプログラムの同じ番号の命令がそのまま引き継ぐ（プリセットは新しい値）。
+# 新しいプログラムで使われなくなったデバイスの状態も消さずに残す。
+
+DEFAULT_WATCH_INTERVAL = 1.0  # ladder.yaml の更新を確認する間隔 [s]
+
+
+class PendingProgram:
+    """コンパイル済みで、次のスキャンの前に差し替えるプログラム"""
+
+    def __init__(self, tasks, reason, requested_scan, requested_at, compile_s):
+        self.tasks = tasks
+        self.reason = reason
+        self.requested_scan = requested_scan
+        self.requested_at = requested_at
+        self.compile_s = compile_s
+
+
+class LadderReloader:
+    def __init__(self, path, mem, load, log, watch_interval=0):
+        """load(path) は ladder.yaml をコンパイルしたタスクのリストを返す関数"""
+        self.path = path
+        self.mem = mem
+        self.load = load
+        self.log = log
+        self.version = 1      # 動いているプログラムの版（差し替えるたびに +1。SYS 10007）
+        self.pending = None   # PendingProgram（コンパイルスレッドが置き、スキャンのスレッドが取る）
+        self.lock = threading.Lock()
+        self.compiling = False
+        self.again = False    # コンパイル中に来た要求（終わった後にもう1度読む）
+        self.file_state = self.stat()
+        self.watch_interval = watch_interval
+        self.stopped = threading.Event()
+        if watch_interval > 0:
+            threading.Thread(target=self.watch, name="ladder-watch", daemon=True).start()
+
+    @classmethod
+    def from_config(cls, plc_conf, path, mem, load, log):
+        """
+        plc.yaml の ladder_reload から作る（SYS 10006 による要求は設定が無くても受け付ける）。
+          ladder_reload:
+            watch: true       # ladder.yaml の更新を監視して自動で読み直す
+            interval_s: 1.0   # 更新を確認する間隔 [s]
+        """
+        conf = plc_conf.get("ladder_reload") or {}
+        if not isinstance(conf, dict):
+            conf = {"watch": bool(conf)}
+        interval = conf.get("interval_s", DEFAULT_WATCH_INTERVAL) if conf.get("watch") else 0
+        return cls(path, mem, load, log, watch_interval=interval)
+
+    # -----------------------------
+    # 要求（どのスレッドからでもよい）
+    # -----------------------------
+    def stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def watch(self):
+        while not self.stopped.wait(self.watch_interval):
+            state = self.stat()
+            if state is not None and state != self.file_state:
+                self.file_state = state
+                self.request("file changed")
+
+    def request(self, reason):
+        with self.lock:
+            if self.compiling:
+                self.again = True
+                return
+            self.compiling = True
+        self.log(f"[RELOAD] reload requested ({reason}): {self.path}")
+        threading.Thread(target=self.compile, args=(reason,), name="ladder-reload", daemon=True).start()
+
+    def compile(self, reason):
+        while True:
+            scan = self.mem.sys.scan_count
+            t0 = time.perf_counter()
+            try:
+                # パーサーはプロセスで共有しているため、他のコンパイルとは1件ずつ行う
+                with COMPILE_LOCK:
+                    tasks = self.load(self.path)
+            except Exception as e:
+                self.log(f"[RELOAD][ERROR] {type(e).__name__}: {e} (keeping program v{self.version})", level=ERROR)
+            else:
+                pending = PendingProgram(tasks, reason, scan, t0, time.perf_counter() - t0)
+                with self.lock:
+                    self.pending = pending
+            with self.lock:
+                if not self.again:
+                    self.compiling = False
+                    return
+                self.again = False
+            reason = "changed during compile"
+
+    # -----------------------------
+    # 差し替え（スキャンのスレッドで、スキャンの前に呼ぶ）
+    # -----------------------------
+    def install(self, plc):
+        t0 = time.perf_counter()
+        with self.lock:
+            pending, self.pending = self.pending, None
+        plc.set_tasks(pending.tasks)
+        t1 = time.perf_counter()
+        self.version += 1
+        scans = self.mem.sys.scan_count - pending.requested_scan
+        self.log(
+            f"[RELOAD] program v{self.version} installed before scan {self.mem.sys.scan_count + 1} "
+            f"({sum(len(t.rungs) for t in pending.tasks)} rungs in {len(pending.tasks)} tasks, {pending.reason}): "
+            f"compile {pending.compile_s * 1000:.1f}ms in background, swap {(t1 - t0) * 1e6:.1f}us, {scans} scans ran during reload "
+            f"({(t1 - pending.requested_at) * 1000:.1f}ms)"
+        )
+
+    def close(self):
+        self.stopped.set()
@@ -0,0 +1,178 @@
+import socket
+import struct
+
+# -----------------------------
+# パイプライン Modbus TCP クライアント（iodevicesim 用）
+# -----------------------------
+# pymodbus の同期クライアントは「要求 -> 応答待ち」を1件ずつ繰り返すため、
+# 1周期の読み出し・書き込みが往復回数ぶん遅れる。ここでは MBAP ヘッダの
+# トランザクションID を振って複数の要求をまとめて送り、応答を ID で突き合わせる。
+# （サーバー側は modbus_server.PipelinedTcpServer が順に処理する）
+
+MBAP = struct.Struct(">HHHB")  # transaction id, protocol id(0), length, unit id
+
+FC_READ_COILS = 1
+FC_READ_HOLDING_REGISTERS = 3
+FC_WRITE_COIL = 5
+FC_WRITE_REGISTER = 6
+FC_WRITE_COILS = 15
+FC_WRITE_REGISTERS = 16
+
+
+# この隙間以下のアドレスは1回の範囲読み出しにまとめる（余分に読む方が往復より安い）
+MAX_READ_GAP = {'bit': 64, 'reg': 16}
+# Modbus 1リクエストあたりの上限
+MAX_READ_COUNT = {'bit': 2000, 'reg': 125}
+MAX_WRITE_COUNT = {'bit': 1968, 'reg': 123}
+
+
+# -----------------------------
+# 範囲読み出しのまとめ（iodevicesim / process_model 共通）
+# -----------------------------
+def merge_ranges(addrs, max_gap, max_count):
+    """アドレス集合を [(start, count), ...] の最小限の範囲読み出しにまとめる"""
+    ranges = []
+    for addr in sorted(set(addrs)):
+        if ranges:
+            start, count = ranges[-1]
+            end = start + count
+            if addr - end <= max_gap and addr - start < max_count:
+                ranges[-1] = (start, addr - start + 1)
+                continue
+        ranges.append((addr, 1))
+    return ranges
+
+
+# -----------------------------
+# 要求（PDU）の組み立て
+# -----------------------------
+def read_coils(address, count):
+    return FC_READ_COILS, struct.pack(">BHH", FC_READ_COILS, address, count), count
+
+
+def read_holding_registers(address, count):
+    return FC_READ_HOLDING_REGISTERS, struct.pack(">BHH", FC_READ_HOLDING_REGISTERS, address, count), count
+
+
+def write_coil(address, value):
+    return FC_WRITE_COIL, struct.pack(">BHH", FC_WRITE_COIL, address, 0xFF00 if value else 0), 1
+
+
+def write_register(address, value):
+    return FC_WRITE_REGISTER, struct.pack(">BHH", FC_WRITE_REGISTER, address, int(value) & 0xFFFF), 1
+
+
+def write_coils(address, values):
+    packed = bytearray((len(values) + 7) // 8)
+    for i, v in enumerate(values):
+        if v:
+            packed[i // 8] |= 1 << (i % 8)
+    pdu = struct.pack(">BHHB", FC_WRITE_COILS, address, len(values), len(packed)) + bytes(packed)
+    return FC_WRITE_COILS, pdu, len(values)
+
+
+def write_registers(address, values):
+    pdu = struct.pack(f">BHHB{len(values)}H", FC_WRITE_REGISTERS, address, len(values),
+                      len(values) * 2, *(int(v) & 0xFFFF for v in values))
+    return FC_WRITE_REGISTERS, pdu, len(values)
+
+
+def decode_response(fc, count, pdu):
+    """応答 PDU を値に変換する。例外応答は None"""
+    if pdu[0] != fc:
+        return None
+    if fc == FC_READ_COILS:
+        data = pdu[2:]
+        return [bool(data[i // 8] >> (i % 8) & 1) for i in range(count)]
+    if fc == FC_READ_HOLDING_REGISTERS:
+        return list(struct.unpack_from(f">{count}H", pdu, 2))
+    return True
+
+
+class PipelinedClient:
+    MAX_IN_FLIGHT = 16  # 応答を待たずに送る要求数の上限
+
+    def __init__(self, host, port, timeout=2.0, unit=1):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.unit = unit
+        self.sock = None
+        self.tid = 0
+        self.buf = b""
+
+    @property
+    def connected(self):
+        return self.sock is not None
+
+    def connect(self):
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            self.sock = None
+            return False
+        self.buf = b""
+        return True
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _next_tid(self):
+        self.tid = self.tid % 0xFFFF + 1
+        return self.tid
+
+    def _recv_frame(self):
+        while True:
+            if len(self.buf) >= MBAP.size:
+                tid, _pid, length, _unit = MBAP.unpack_from(self.buf)
+                end = 6 + length
+                if len(self.buf) >= end:
+                    pdu = self.buf[MBAP.size:end]
+                    self.buf = self.buf[end:]
+                    return tid, pdu
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+            self.buf += data
+
+    def execute(self, requests):
+        """
+        要求のリストをパイプラインで送り、同じ順で結果を返す。
+        読み出しは値のリスト、書き込みは True、例外応答は None。
+        通信エラー時は接続を閉じて例外を送出する（応答の対応が取れなくなるため）。
+        """
+        if not self.sock:
+            raise ConnectionError(f"{self.host}:{self.port} not connected")
+
+        results = [None] * len(requests)
+        try:
+            for base in range(0, len(requests), self.MAX_IN_FLIGHT):
+                chunk = requests[base:base + self.MAX_IN_FLIGHT]
+                waiting = {}
+                frames = []
+                for i, (fc, pdu, count) in enumerate(chunk, start=base):
+                    tid = self._next_tid()
+                    waiting[tid] = (i, fc, count)
+                    frames.append(MBAP.pack(tid, 0, len(pdu) + 1, self.unit) + pdu)
+                self.sock.sendall(b"".join(frames))
+
+                while waiting:
+                    tid, pdu = self._recv_frame()
+                    entry = waiting.pop(tid, None)
+                    if entry is None:
+                        continue  # 以前に諦めた要求の応答は捨てる
+                    i, fc, count = entry
+                    try:
+                        results[i] = decode_response(fc, count, pdu)
+                    except (struct.error, IndexError):
+                        results[i] = None  # 壊れた応答は例外応答と同じ扱い
+        except OSError:
+            self.close()
+            raise
+        return results
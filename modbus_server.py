@@ -1,12 +1,24 @@
-from pymodbus.server import StartTcpServer
+from pymodbus.server import ModbusTcpServer
+from pymodbus.server.requesthandler import ServerRequestHandler
+from pymodbus.constants import ExcCodes
+from pymodbus.exceptions import ModbusIOException
+from pymodbus.pdu import ExceptionResponse
 from pymodbus.datastore import (
     ModbusServerContext,
     ModbusDeviceContext,
     ModbusSequentialDataBlock
 )
+import asyncio
 import threading
 import time
 
+from event_trace import EV_INJECT, AREA_CODES
+from plc_tasks import SYS_TASK_COUNT, SYS_TASK_BASE, TASK_REGS, MAX_TASKS
+from simlog import WARN, ERROR
+
+AREA_X = AREA_CODES["X"]
+AREA_D = AREA_CODES["D"]
+
 
 # -----------------------------
 # Chaos Context Wrapper
@@ -31,6 +43,18 @@ class ChaosSlaveContext:
             time.sleep(self.bridge.latency_sec)
         self.original.setValues(fc, address, values)
 
+    # Pymodbus 3.x のサーバーは async_getValues / async_setValues を呼ぶため、
+    # こちらにも遅延を注入する（asyncio.sleep なので他の接続の応答は止めない）
+    async def async_getValues(self, fc, address, count=1):
+        if self.bridge.latency_sec > 0:
+            await asyncio.sleep(self.bridge.latency_sec)
+        return await self.original.async_getValues(fc, address, count)
+
+    async def async_setValues(self, fc, address, values):
+        if self.bridge.latency_sec > 0:
+            await asyncio.sleep(self.bridge.latency_sec)
+        return await self.original.async_setValues(fc, address, values)
+
     # 必須メソッドの委譲
     def validate(self, fc, address, count=1):
         return self.original.validate(fc, address, count)
@@ -46,22 +70,74 @@ class ChaosSlaveContext:
         else:
             setattr(self.original, name, value)
 
+# -----------------------------
+# パイプライン要求を受け付けるサーバー
+# -----------------------------
+class PipelinedRequestHandler(ServerRequestHandler):
+    """
+    応答を待たずに連続で送られた要求（トランザクションID で区別）を順に処理する。
+    pymodbus 標準のハンドラは1回の受信につき1フレームしか処理せず、
+    応答送信時に受信バッファを捨てるため、後続の要求が失われる。
+    """
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.requests = asyncio.Queue()
+        self.drain_task = None
+
+    def callback_data(self, data, addr=None):
+        used = 0
+        while used < len(data):
+            try:
+                n, pdu = self.framer.handleFrame(self.trace_packet(False, data[used:]), 0, 0)
+            except ModbusIOException:
+                self.server_send(ExceptionResponse(40, exception_code=ExcCodes.ILLEGAL_FUNCTION), 0)
+                return len(data)
+            if not n:
+                break  # フレームの途中までしか届いていない
+            used += n
+            if pdu:
+                self.requests.put_nowait((self.trace_pdu(False, pdu), addr))
+
+        # 受信順に1つずつ処理する（応答の順序 = 要求の順序）
+        if self.drain_task is None or self.drain_task.done():
+            self.drain_task = self.loop.create_task(self.drain())
+        return used
+
+    async def drain(self):
+        while not self.requests.empty():
+            self.last_pdu, self.last_addr = self.requests.get_nowait()
+            await self.handle_request()
+
+    def send(self, data, addr=None):
+        # 応答を送っても、まだ処理していない受信データは残す
+        pending = self.recv_buffer
+        super().send(data, addr)
+        self.recv_buffer = pending
+
+
+class PipelinedTcpServer(ModbusTcpServer):
+    def callback_new_connection(self):
+        return PipelinedRequestHandler(self, self.trace_packet, self.trace_pdu, self.trace_connect)
+
+
 # --- 1. 書き込みを監視するカスタムブロッククラスを定義 ---
 class InjectedDataBlock(ModbusSequentialDataBlock):
     def __init__(self, address, values, bridge, dev_type):
         super().__init__(address, values)
         self.bridge = bridge
         self.dev_type = dev_type
-        self.is_syncing = False  # 同期中かどうかのフラグ
+
+    def sync_values(self, address, values):
+        """
+        同期スレッド（ModbusBridge.sync_once）用。台帳だけを書き換え、PLC への反映とログ出力はしない。
+        クライアントの書き込みと同時に動いても、その書き込みの PLC への反映は止めない
+        """
+        super().setValues(address, values)
 
     def setValues(self, address, values):
         # 最後に親（Modbusの台帳）の値を更新
         super().setValues(address, values)
 
-        # 同期スレッドからの呼び出し（is_syncing=True）なら、PLCへの反映とログ出力をスキップ
-        if self.is_syncing:
-            return
-
         # 2. 物理入力(X)への反映ロジック
         if self.dev_type == 'CO':
             # Pymodbus 3.x の SequentialDataBlock では、
@@ -80,8 +156,26 @@ class InjectedDataBlock(ModbusSequentialDataBlock):
                     new_v = bool(v)
                     
                     if old_v != new_v:
-                        self.bridge.plc.mem.X[target_idx] = new_v
-                        self.bridge.log(f"[SIM_INJECT] Physical Signal: X{target_idx} = {new_v}")
+                        plc = self.bridge.plc
+                        plc.mem.X[target_idx] = new_v
+                        plc.events.record(plc.mem.sys.scan_count, EV_INJECT, AREA_X, target_idx, new_v)
+                        if plc.text_events:
+                            self.bridge.log(f"[SIM_INJECT] Physical Signal: X{target_idx} = {new_v}")
+                        plc.interrupt(target_idx, new_v)
+
+        # 3. アナログ入力(D)への反映ロジック
+        # devicesim の register / model 信号が書いた値を PLC の D メモリへ反映する。
+        # 反映しないと同期スレッドが次の周期で PLC 側の値に上書きしてしまう
+        elif self.dev_type == 'HR':
+            base_idx = address - 1
+            plc = self.bridge.plc
+            d_mem = plc.mem.D
+            for i, v in enumerate(values):
+                target_idx = base_idx + i
+                if 0 <= target_idx < len(d_mem):
+                    if d_mem[target_idx] != v:
+                        plc.events.record(plc.mem.sys.scan_count, EV_INJECT, AREA_D, target_idx, v)
+                    d_mem[target_idx] = int(v)
 
 
 class ChaosServerContext:
@@ -125,6 +219,8 @@ class ChaosServerContext:
 # Modbus Bridge
 # -----------------------------
 class ModbusBridge:
+    SYNC_INTERVAL = 0.1  # PLC メモリ -> Modbus 台帳の反映周期 [s]
+
     def __init__(self, plc, port, debug=False):
         self.plc = plc
         self.port = port
@@ -151,13 +247,14 @@ class ModbusBridge:
         # --- 名簿（データブロック）のサイズ計算 ---
         # 必要な長さは「開始アドレス + 実際の個数」
         co_size = self.ADDR_M_START + m_count 
-        hr_size = self.HR_SYS_BASE + 20 # システム領域分を確保
+        # システム領域分を確保（+20 以降はタスクごとの実行統計。plc_tasks）
+        hr_size = self.HR_SYS_BASE + SYS_TASK_BASE + MAX_TASKS * TASK_REGS
 
         # --- 受付名簿（データブロック）の作成 ---
         device = ModbusDeviceContext(
             di=ModbusSequentialDataBlock(1, [0] * x_count), # X用 (FC2)
             co=InjectedDataBlock(1, [0] * co_size, self, 'CO'), # Y, M用 (FC1)
-            hr=ModbusSequentialDataBlock(1, [0] * hr_size), # D, Sys用 (FC3)
+            hr=InjectedDataBlock(1, [0] * hr_size, self, 'HR'), # D, Sys用 (FC3)
         )
 
         # 1. 同期スレッドが直接触るための「生のデバイス」を保持
@@ -174,77 +271,95 @@ class ModbusBridge:
     # -------------------------------------------------
     # PLC <-> Modbus 同期
     # -------------------------------------------------
-    def sync_from_plc(self):
-        self.log("[Modbus] sync thread started")
+    def sync_values(self, fc, address, values):
+        """
+        台帳だけを書き換える（address は ModbusDeviceContext.setValues と同じく 0 始まり）。
+        InjectedDataBlock には sync_values で書き、クライアントの書き込みとして PLC へ反映しない
+        """
+        block = self.raw_device.store[self.raw_device.decode(fc)]
+        if isinstance(block, InjectedDataBlock):
+            block.sync_values(address + 1, values)
+        else:
+            block.setValues(address + 1, values)
 
+    def sync_once(self):
+        """PLC メモリを Modbus の台帳へ1回反映する（同期スレッド / plant_runner から呼ぶ）"""
         # Mansion全体を通さず、保存しておいた「部屋(Device)」を直接操作する
         raw_slave_context = self.raw_device
 
-        while True:
-            try:
-
-                # 同期開始。InjectedDataBlockのフラグを立ててログ出力を抑制する
-                # raw_device.store['c'] が CO (InjectedDataBlock) インスタンスを指します
-                self.raw_device.store['c'].is_syncing = True
-
-                # ---------- 1. カオス設定の読み取り ----------
-                # HR 10005 を遅延設定用に使用。ここを外部(Python等)から書き換えると遅延が始まる
-                chaos_res = raw_slave_context.getValues(3, self.HR_SYS_BASE + 5, count=1)
-                if isinstance(chaos_res, list):
-                    new_latency = chaos_res[0]
-                    if new_latency != self.latency_sec:
-                        self.latency_sec = new_latency
-                        if self.latency_sec > 0:
-                            self.log(f"!!! [CHAOS] Latency Mode Active: {self.latency_sec}s !!!")
-                        else:
-                            self.log("[CHAOS] Latency Mode Disabled")
-
-                # ---------- 2. X ← Client (FC2) ----------
-                # Mmodbusの取り扱い解釈誤りのため以下のように修正
-                # deicesimが直接書き換えたPLC.m.xの値を、modbusの台帳(DI)に反映する
-                # これにより、外部(orchestratorなど)から入力状況が見えるようになる想定
-                # --------------以下、修正前のコード -----------------
-                # res = raw_slave_context.getValues(2, 1, count=len(self.plc.mem.X))
-                # if isinstance(res, list):
-                #     for i, v in enumerate(res):
-                #         if i < len(self.plc.mem.X):
-                #             self.plc.mem.X[i] = bool(v)
-                # --------------以下、修正後のコード-------------------
-                for i, v in enumerate(self.plc.mem.X):
-                    raw_slave_context.setValues(2, i, [int(v)])
-
-                # ---------- 3. Y/M/D 送信処理 ----------
-                # 定義した START アドレスを基準にループ
-                # Y (Coil 0〜)
-                for i, v in enumerate(self.plc.mem.Y):
-                    raw_slave_context.setValues(1, self.ADDR_Y_START + i, [int(v)])
-                
-                # M (Coil 1000〜)
-                for i, v in enumerate(self.plc.mem.M):
-                    raw_slave_context.setValues(1, self.ADDR_M_START + i, [int(v)])
-                
-                # D (HR 0〜)
-                for i, v in enumerate(self.plc.mem.D):
-                    raw_slave_context.setValues(3, self.ADDR_D_START + i, [int(v)])
-                    
-                # ---------- 4. システムレジスタ更新 ----------
-                sys = self.plc.mem.sys
-                raw_slave_context.setValues(3, self.HR_SYS_BASE + 0, [sys.heartbeat])
-                raw_slave_context.setValues(3, self.HR_SYS_BASE + 1, [sys.scan_count & 0xFFFF])
-                raw_slave_context.setValues(3, self.HR_SYS_BASE + 2, [sys.uptime_sec])
+        # ---------- 1. カオス設定の読み取り ----------
+        # HR 10005 を遅延設定用に使用。ここを外部(Python等)から書き換えると遅延が始まる
+        chaos_res = raw_slave_context.getValues(3, self.HR_SYS_BASE + 5, count=1)
+        if isinstance(chaos_res, list):
+            new_latency = chaos_res[0]
+            if new_latency != self.latency_sec:
+                self.latency_sec = new_latency
+                if self.latency_sec > 0:
+                    self.log(f"!!! [CHAOS] Latency Mode Active: {self.latency_sec}s !!!")
+                else:
+                    self.log("[CHAOS] Latency Mode Disabled")
+
+        # HR 10006 はラダーの再読み込み要求。0 以外が書かれたら要求を出して 0 に戻す
+        reload_res = raw_slave_context.getValues(3, self.HR_SYS_BASE + 6, count=1)
+        if isinstance(reload_res, list) and reload_res[0]:
+            self.sync_values(3, self.HR_SYS_BASE + 6, [0])
+            if self.plc.reloader:
+                self.plc.reloader.request(f"SYS {self.HR_SYS_BASE + 6}")
+            else:
+                self.log("[RELOAD][WARN] reload requested but ladder path is unknown", level=WARN)
+
+        # ---------- 2. X ← Client (FC2) ----------
+        # Mmodbusの取り扱い解釈誤りのため以下のように修正
+        # deicesimが直接書き換えたPLC.m.xの値を、modbusの台帳(DI)に反映する
+        # これにより、外部(orchestratorなど)から入力状況が見えるようになる想定
+        # --------------以下、修正前のコード -----------------
+        # res = raw_slave_context.getValues(2, 1, count=len(self.plc.mem.X))
+        # if isinstance(res, list):
+        #     for i, v in enumerate(res):
+        #         if i < len(self.plc.mem.X):
+        #             self.plc.mem.X[i] = bool(v)
+        # --------------以下、修正後のコード-------------------
+        for i, v in enumerate(self.plc.mem.X):
+            self.sync_values(2, i, [int(v)])
+
+        # ---------- 3. Y/M/D 送信処理 ----------
+        # 定義した START アドレスを基準にループ
+        # Y (Coil 0〜)
+        for i, v in enumerate(self.plc.mem.Y):
+            self.sync_values(1, self.ADDR_Y_START + i, [int(v)])
+
+        # M (Coil 1000〜)
+        for i, v in enumerate(self.plc.mem.M):
+            self.sync_values(1, self.ADDR_M_START + i, [int(v)])
+
+        # D (HR 0〜)
+        for i, v in enumerate(self.plc.mem.D):
+            self.sync_values(3, self.ADDR_D_START + i, [int(v)])
+
+        # ---------- 4. システムレジスタ更新 ----------
+        sys = self.plc.mem.sys
+        # レジスタは16bitのため周回させる（65535 を超えると応答が作れなくなる）
+        self.sync_values(3, self.HR_SYS_BASE + 0, [sys.heartbeat & 0xFFFF])
+        self.sync_values(3, self.HR_SYS_BASE + 1, [sys.scan_count & 0xFFFF])
+        self.sync_values(3, self.HR_SYS_BASE + 2, [sys.uptime_sec & 0xFFFF])
+        if self.plc.reloader:
+            self.sync_values(3, self.HR_SYS_BASE + 7, [self.plc.reloader.version & 0xFFFF])
+        tasks = self.plc.tasks[:MAX_TASKS]
+        self.sync_values(3, self.HR_SYS_BASE + SYS_TASK_COUNT, [len(tasks)])
+        for i, task in enumerate(tasks):
+            self.sync_values(3, self.HR_SYS_BASE + SYS_TASK_BASE + i * TASK_REGS, task.registers())
 
-                # 同期終了。フラグを戻す
-                self.raw_device.store['c'].is_syncing = False
+    def sync_from_plc(self):
+        self.log("[Modbus] sync thread started")
 
-                time.sleep(0.1)
+        while True:
+            try:
+                self.sync_once()
+                time.sleep(self.SYNC_INTERVAL)
 
             except Exception as e:
-                # エラー発生時も念のためフラグを戻す
-                if hasattr(self.raw_device.store['c'], 'is_syncing'):
-                    self.raw_device.store['c'].is_syncing = False
-
                 import traceback
-                self.log(f"[Modbus][ERROR] {e}\n{traceback.format_exc()}")
+                self.log(f"[Modbus][ERROR] {e}\n{traceback.format_exc()}", level=ERROR)
                 time.sleep(1)
 
     # -------------------------------------------------
@@ -255,4 +370,18 @@ class ModbusBridge:
         threading.Thread(target=self.sync_from_plc, daemon=True).start()
         # self.context (Chaosラップ済み) をサーバーに渡す
         # StartTcpServer(self.context.original, address=("0.0.0.0", self.port))
-        StartTcpServer(self.context, address=("0.0.0.0", self.port))
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        # ModbusTcpServer は実行中のイベントループ内で作る必要がある
+        server = PipelinedTcpServer(self.context, address=("0.0.0.0", self.port))
+        # 変化履歴の問い合わせ（plc_history）も同じループで受け付ける
+        history = getattr(self.plc, "history", None)
+        query = await history.start_server(self.log) if history else None
+        try:
+            await server.serve_forever()
+        finally:
+            # タスクを cancel された場合もポートと接続を閉じる（plant_runner の停止）
+            if query:
+                query.close()
+            await server.shutdown()
@@ -6,38 +6,49 @@ import threading
 from datetime import datetime
 import os
 import glob
+from concurrent.futures import ThreadPoolExecutor, wait
 from pymodbus.client import ModbusTcpClient
 
+import modbus_pipeline as mbp
+from modbus_pipeline import PipelinedClient
+from heartbeat import HeartbeatMonitor, HB_ADDR, HB_STALE, HB_LOST
+from simlog import Logger, INFO, WARN, ERROR
+from zygote import Zygote
+import plc_history
+from plc_tasks import SYS_TASK_COUNT, SYS_TASK_BASE, TASK_REGS, TASK_REG_NAMES, task_names
+
 PYTHON = sys.executable
 
 SERVICE_TYPES = ("plc", "device", "iodevice")
 
+# Modbus で確認する ready_check.kind（どちらも host / port を持つ）
+MODBUS_CHECK_KINDS = ("modbus", "heartbeat")
+
 # -----------------------------
 # Orchestrator Logger (Smart Display)
 # -----------------------------
-class OrchestratorLogger:
-    def __init__(self, log_file):
-        self.log_file = log_file
-
-    def log(self, msg, console=True):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        line = f"{ts} | {msg}"
-        
-        # ファイルには常にすべての情報を記録
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-        
-        # console=True の場合のみ画面に表示
-        if console:
-            # # プロンプトの行を邪魔しないよう、改行を入れて出力
-            # print(f"\r{line}")
-            # print("orchestrator > ", end="", flush=True)
-
-            # \r\033[K は「行頭に戻ってその行をクリアする」というエスケープシーケンスです
-            # これにより、入力中の "orchestrator > " を一度消してログを出します
-            sys.stdout.write(f"\r\033[K{line}\n")
-            sys.stdout.write("orchestrator > ")
-            sys.stdout.flush()
+def prompt_console_writer(lines):
+    # \r\033[K は「行頭に戻ってその行をクリアする」というエスケープシーケンスです
+    # これにより、入力中の "orchestrator > " を一度消してログを出します
+    sys.stdout.write("".join(f"\r\033[K{line}\n" for line in lines))
+    sys.stdout.write("orchestrator > ")
+    sys.stdout.flush()
+
+def create_orchestrator_logger(log_conf):
+    """
+    ファイルには常にすべての情報を記録し、log(msg, console=True) の場合のみ画面にも表示する。
+    書き込みは simlog の書き込みスレッドが行う
+    """
+    rotate = log_conf.get("rotate") or {}
+    return Logger(
+        "orchestrator", log_conf.get("dir", "logs"),
+        level=log_conf.get("level", "INFO"),
+        console=False,
+        console_writer=prompt_console_writer,
+        max_bytes=int(rotate.get("max_mb", 0) * 1024 * 1024),
+        interval_s=rotate.get("interval_h", 0) * 3600,
+        backups=rotate.get("backups", 5),
+    )
 
 # -----------------------------
 # Global State
@@ -46,8 +57,10 @@ running = True
 processes = {}
 svc_ready_status = {}
 svc_map = {}
+svc_health = {}  # ready_check.kind: heartbeat のスキャン健全性 {'state', 'scan_rate', 'uptime'}
 state_lock = threading.Lock()
 disabled_services = set()
+launching = set()  # 再起動中のサービス（launch_service は state_lock の外で実行する）
 
 # -----------------------------
 # Core Functions
@@ -73,30 +86,236 @@ def resolve_start_order(services):
         visit(svc["name"], set())
     return resolved
 
-def check_service_ready(svc):
-    rc = svc.get("ready_check")
-    if not rc: return True
-    if rc.get("kind") == "modbus":
+def resolve_start_levels(services):
+    """
+    依存関係の深さごとにサービスをまとめる。
+    同じ段のサービスは互いに依存しないため並行に起動できる: [[svc, ...], ...]
+    """
+    order = resolve_start_order(services)
+    level = {}
+    for svc in order:
+        deps = svc.get("depends_on", [])
+        level[svc["name"]] = max((level[d] + 1 for d in deps), default=0)
+
+    levels = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for svc in order:
+        levels[level[svc["name"]]].append(svc)
+    return levels
+
+# launcher: zygote / inprocess / pool のときに使うランチャー（main で起動）
+zygote = None
+plant = None
+pool = None
+
+def launch_service(svc, restart=False):
+    # warm_restart: true の PLC は常にチェックポイントを書かせ、再起動時だけそこから再開させる
+    if svc.get("warm_restart"):
+        flag = "--warm-start" if restart else "--checkpoint"
+        if flag not in svc.get("args", []):
+            svc = dict(svc, args=list(svc.get("args", [])) + [flag])
+    script = svc["command"][0]
+    if plant and plant.supports(svc):
+        return plant.start(svc)
+    if pool and pool.supports(svc):
+        return pool.start(svc)
+    if zygote and zygote.alive and len(svc["command"]) == 1 and Zygote.supports(script):
+        return zygote.spawn(script, svc.get("args", []))
+    cmd = [PYTHON] + svc["command"] + svc.get("args", [])
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def restart_services(services, logger):
+    """
+    呼び出し側が state_lock の中で launching に入れたサービスを、ロックの外で再起動する。
+    zygote の spawn などは時間がかかるため、その間も CLI や監視ループは state_lock を使える。
+    起動中に stop されたサービスは、起動し終えたところで止める
+    """
+    for svc in services:
+        name = svc["name"]
         try:
-            client = ModbusTcpClient(rc["host"], port=rc["port"], timeout=1)
-            if client.connect():
-                client.close()
-                return True
-        except:
-            pass
-    return False
+            p = launch_service(svc, restart=True)
+        except Exception as e:
+            p = None
+            logger.log(f"[ERROR] failed to launch {name}: {e}", level=ERROR, console=True)
+        with state_lock:
+            launching.discard(name)
+            if p is None:
+                continue
+            processes[name] = p
+            svc_ready_status[name] = False
+            if name in disabled_services:
+                p.terminate()
+
+def wait_services_ready(wave, logger, prober, timeout, probe_min=0.05, probe_max=1.0):
+    """
+    wave のサービスが READY になるまで待つ。
+    確認間隔は probe_min から始めて1.5倍ずつ probe_max まで伸ばす
+    （すぐ立ち上がるサービスは待たせず、遅いサービスには問い合わせを減らす）。
+    戻り値: READY にならなかったサービス名のリスト
+    """
+    pending = {svc["name"]: svc for svc in wave}
+    deadline = time.time() + timeout
+    interval = probe_min
+    while pending:
+        for name in list(pending):
+            p = processes.get(name)
+            if p and p.poll() is not None:
+                logger.log(f"[WARN] {name} exited during startup (code={p.returncode})", level=WARN, console=True)
+                del pending[name]
+
+        for name, ready in prober.probe_all(pending.values()).items():
+            if ready:
+                svc_ready_status[name] = True
+                del pending[name]
+
+        if not pending or time.time() >= deadline:
+            break
+        time.sleep(interval)
+        interval = min(interval * 1.5, probe_max)
+
+    return list(pending)
+
+# -----------------------------
+# Readiness Prober
+# -----------------------------
+class ReadinessProber:
+    """
+    ready_check をスレッドプールで並行に実行する。
+    Modbus の接続はサービスごとに張りっぱなしにして使い回し、
+    1件の確認は timeout 秒で打ち切る（止まった PLC が他の確認を待たせない）。
+
+    kind: heartbeat では SYS 領域 (10000〜10002) を1回で読み、
+    heartbeat の変化・スキャン速度・稼働時間からスキャンの健全性も判定する。
+    """
+    RATE_WINDOW = 1.0   # スキャン速度を求める最小間隔（秒）
+    UPTIME_SLACK = 2.0  # 稼働時間の進みと経過時間のずれの許容（秒。整数秒への切り捨てと読み出し遅れ）
+
+    def __init__(self, timeout=1.0, max_workers=32):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe")
+        self.clients = {}  # name -> PipelinedClient（確認スレッドからのみ使う）
+        self.pending = {}  # name -> 実行中の確認 (Future)
+        self.hb = {}       # name -> HeartbeatMonitor (kind: heartbeat)
+        self.samples = {}  # name -> (時刻, scan_count, uptime) 前回の読み出し
+        self.health = {}   # name -> {'state', 'scan_rate', 'uptime'}（kind: heartbeat のみ）
+
+    def get_client(self, name, rc):
+        client = self.clients.get(name)
+        if client is None:
+            client = self.clients[name] = PipelinedClient(rc["host"], rc["port"], timeout=self.timeout)
+        if not client.connected and not client.connect():
+            return None
+        return client
+
+    def check(self, svc):
+        rc = svc.get("ready_check")
+        if not rc: return True
+        kind = rc.get("kind")
+        if kind not in MODBUS_CHECK_KINDS:
+            return False
+
+        name = svc["name"]
+        client = self.get_client(name, rc)
+        if client is None:
+            return False
+        count = 3 if kind == "heartbeat" else 1
+        try:
+            res = client.execute([mbp.read_holding_registers(HB_ADDR, count)])[0]
+        except OSError:
+            return False
+
+        if kind == "modbus":
+            # 応答が返れば（例外応答でも）サーバーは生きている
+            return True
+        if res is None:
+            return False
+        return self.check_scan_health(name, rc, *res)
+
+    def check_scan_health(self, name, rc, hb, scans, uptime):
+        """
+        heartbeat が止まっていなければ READY。
+        スキャン速度 [scan/s] が min_scan_rate を下回れば DEGRADED とする。
+        """
+        now = time.time()
+        timeout = rc.get("timeout_s", 3.0)
+        monitor = self.hb.setdefault(name, HeartbeatMonitor(period=timeout / 4, timeout=timeout))
+
+        base = self.samples.get(name)
+        # uptime は 16bit で周回する（約18.2時間）。大小比較ではなく、
+        # 前回からの進み（周回込み）が経過時間と合わなければ再起動とみなす
+        if base is None or abs(((uptime - base[2]) & 0xFFFF) - (now - base[0])) > self.UPTIME_SLACK:
+            # 初回 / PLC が再起動した（稼働時間が戻った）: 次の確認から判定する
+            self.samples[name] = (now, scans, uptime)
+            monitor.reset(name)
+            monitor.feed(name, hb, now)
+            self.health[name] = {"state": "STARTING", "scan_rate": None, "uptime": uptime}
+            return False
+
+        hb_state = monitor.feed(name, hb, now)
+
+        # 起動待ちの短い間隔では誤差が大きいため、速度は RATE_WINDOW 秒以上の間隔で求める
+        rate = self.health[name]["scan_rate"]
+        if now - base[0] >= self.RATE_WINDOW:
+            # scan_count は 16bit で周回する
+            rate = ((scans - base[1]) & 0xFFFF) / (now - base[0])
+            self.samples[name] = (now, scans, uptime)
+
+        if hb_state == HB_LOST:
+            state = "LOST"
+        elif hb_state == HB_STALE:
+            state = "STALE"
+        elif rate is not None and rate < rc.get("min_scan_rate", 0):
+            state = "DEGRADED"
+        else:
+            state = "OK"
+        self.health[name] = {"state": state, "scan_rate": rate, "uptime": uptime}
+        # STALE はまだタイムアウト前なので READY のまま（LOST で NOT READY）
+        return state != "LOST"
+
+    def probe_all(self, services):
+        """
+        services の確認を並行に行い {name: True/False} を返す。
+        期限内に終わらなかった確認は結果に含めない（前回の状態のまま）。
+        """
+        futures = {}
+        for svc in services:
+            name = svc["name"]
+            fut = self.pending.get(name)
+            if fut is None or fut.done():
+                fut = self.pending[name] = self.executor.submit(self.check, svc)
+            futures[name] = fut
+
+        wait(futures.values(), timeout=self.timeout + 0.5)
+        results = {}
+        for name, fut in futures.items():
+            if fut.done():
+                del self.pending[name]
+                try:
+                    results[name] = fut.result()
+                except Exception:
+                    results[name] = False
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for client in self.clients.values():
+            client.close()
 
 # -----------------------------
 # Monitoring Loop
 # -----------------------------
-def monitor_loop(logger, start_order):
+def monitor_loop(logger, start_order, prober, interval=2.0):
     global running
     while running:
+        cycle_start = time.time()
+
+        # 1. プロセスの生死確認と再起動の判断（ロック内は状態の参照・更新だけ）
+        alive = []
+        restarts = []
         with state_lock:
             for svc in start_order:
                 name = svc["name"]
-                if name in disabled_services: continue
-                
+                if name in disabled_services or name in launching: continue
+
                 p = processes.get(name)
                 is_alive = p and p.poll() is None
 
@@ -115,24 +334,51 @@ def monitor_loop(logger, start_order):
                     
                     if parent_ok:
                         logger.log(f"Attempting to restart {name}...", console=False)
-                        cmd = [PYTHON] + svc["command"] + svc.get("args", [])
-                        processes[name] = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
+                        launching.add(name)
+                        restarts.append(svc)
                 else:
-                    # --- [ケース2] プロセスは動いている場合 ---
-                    # 現在のREADY状態をチェックして更新する
-                    current_ready = check_service_ready(svc)
-                    
-                    # 状態が NO -> YES に変わったときだけログを出す
-                    if current_ready and not svc_ready_status.get(name):
-                        svc_ready_status[name] = True
-                        logger.log(f"[INFO] {name} is now READY.", console=True)
-                    # 状態が YES -> NO に変わったとき（通信断など）
-                    elif not current_ready and svc_ready_status.get(name):
-                        svc_ready_status[name] = False
-                        logger.log(f"[WARN] {name} is running but NOT READY (Modbus failure).", console=True)
+                    alive.append((svc, p))
+
+        # 2. 動いているサービスの READY 確認（ロックの外で並行に実行）
+        results = prober.probe_all([svc for svc, _ in alive])
 
-        time.sleep(2)
+        # 3. 結果の反映
+        with state_lock:
+            for svc, p in alive:
+                name = svc["name"]
+                # 確認中に停止 / 再起動されたサービスの結果は捨てる
+                if name in disabled_services or processes.get(name) is not p or name not in results:
+                    continue
+                current_ready = results[name]
+
+                # --- [ケース2] プロセスは動いている場合 ---
+                # スキャン健全性 (kind: heartbeat) の変化
+                health = prober.health.get(name)
+                if health:
+                    prev_state = svc_health.get(name, {}).get("state")
+                    svc_health[name] = health
+                    first = prev_state in (None, "STARTING")
+                    if health["state"] != prev_state and health["state"] != "STARTING" and not (first and health["state"] == "OK"):
+                        level = "INFO" if health["state"] == "OK" else "WARN"
+                        rate = health["scan_rate"]
+                        rate_text = f"{rate:.1f} scan/s" if rate is not None else "scan rate unknown"
+                        logger.log(f"[{level}] {name} scan health: {prev_state} -> {health['state']} ({rate_text})", console=True)
+
+                # 状態が NO -> YES に変わったときだけログを出す
+                if current_ready and not svc_ready_status.get(name):
+                    svc_ready_status[name] = True
+                    logger.log(f"[INFO] {name} is now READY.", console=True)
+                # 状態が YES -> NO に変わったとき（通信断など）
+                elif not current_ready and svc_ready_status.get(name):
+                    svc_ready_status[name] = False
+                    reason = "heartbeat stopped" if health and health["state"] == "LOST" else "Modbus failure"
+                    logger.log(f"[WARN] {name} is running but NOT READY ({reason}).", level=WARN, console=True)
+
+        # 4. 再起動（ロックの外で行う）
+        restart_services(restarts, logger)
+
+        # 確認にかかった時間を含めて一定の周期を保つ
+        time.sleep(max(0.0, cycle_start + interval - time.time()))
 
 # 指定されたPLCのアドレス空間を表示
 def show_specific_plc_map(target_name):
@@ -192,6 +438,10 @@ def show_specific_plc_map(target_name):
             # System
             print(f"SYS      | System Heartbeat  | {HR_SYS_BASE:<12} | FC3 (Read Only)")
             print(f"SYS      | Chaos Latency (s) | {HR_SYS_BASE+5:<12} | FC3/6 (Read/Write)")
+            print(f"SYS      | Ladder Reload Req | {HR_SYS_BASE+6:<12} | FC6 (Write 1)")
+            print(f"SYS      | Program Version   | {HR_SYS_BASE+7:<12} | FC3 (Read Only)")
+            print(f"SYS      | Task Count        | {HR_SYS_BASE+SYS_TASK_COUNT:<12} | FC3 (Read Only)")
+            print(f"SYS      | Task Statistics   | {HR_SYS_BASE+SYS_TASK_BASE:<12} | FC3 (Read Only, {TASK_REGS} per task)")
             print("-" * 65)
             print(f"Note: M (Internal Relay) starts from offset {ADDR_M_START} to avoid overlap with Y.")
             print(f"Note: System Diagnostics area starts from {HR_SYS_BASE}.\n")
@@ -202,82 +452,186 @@ def show_specific_plc_map(target_name):
 # -----------------------------
 # CLI Functions (Memory Inspection)
 # -----------------------------
-def show_plc_memory_status(target_name):
+INFO_HISTORY_SCANS = 500  # info で表示する変化履歴の範囲 [スキャン]
+INFO_HISTORY_LIMIT = 20   # info で表示する変化の件数
+
+def show_plc_memory_status(target_name, scans=INFO_HISTORY_SCANS):
+    # state_lock の中では設定を写すだけにし、ファイル・Modbus・履歴の問い合わせは外で行う
+    # （各タイムアウトの間 monitor_loop や他のコマンドを止めないため）
     with state_lock:
         if target_name not in svc_map:
             print(f"[!] Service '{target_name}' not found.")
             return
-        
+
         svc = svc_map[target_name]
-        rc = svc.get("ready_check")
-        if not rc or rc.get("kind") != "modbus":
-            print(f"[!] No Modbus config for {target_name}.")
+        rc = dict(svc.get("ready_check") or {})
+        args = list(svc.get("args", []))
+    if not rc or rc.get("kind") not in MODBUS_CHECK_KINDS:
+        print(f"[!] No Modbus config for {target_name}.")
+        return
+
+    plc_conf_path = next((arg for arg in args if "plc" in arg), None)
+    try:
+        with open(plc_conf_path, "r", encoding="utf-8") as f:
+            p_conf = yaml.safe_load(f)
+        m_limits = p_conf.get("memory", {})
+        print(f"m_limits info:{m_limits}")
+        
+        client = ModbusTcpClient(rc["host"], port=rc["port"], timeout=2)
+        if not client.connect():
+            print(f"[!] Could not connect to {target_name} on port {rc['port']}.")
             return
 
-        plc_conf_path = next((arg for arg in svc.get("args", []) if "plc" in arg), None)
-        try:
-            with open(plc_conf_path, "r", encoding="utf-8") as f:
-                p_conf = yaml.safe_load(f)
-            m_limits = p_conf.get("memory", {})
-            print(f"m_limits info:{m_limits}")
-            
-            client = ModbusTcpClient(rc["host"], port=rc["port"], timeout=2)
-            if not client.connect():
-                print(f"[!] Could not connect to {target_name} on port {rc['port']}.")
-                return
+        print(f"\n--- [ {target_name.upper()} ] Current Values ---")
 
-            print(f"\n--- [ {target_name.upper()} ] Current Values ---")
+        # 引数を (address, count, slave=1) の形式に統一します
+        # slave=1 はデフォルトですが、明示的にキーワード指定することでエラーを回避します
 
-            # 引数を (address, count, slave=1) の形式に統一します
-            # slave=1 はデフォルトですが、明示的にキーワード指定することでエラーを回避します
+        # 1. X (Discrete Inputs) - FC2
+        x_cnt = m_limits.get("X", 0)
+        if x_cnt > 0:
+            res = client.read_discrete_inputs(address=0, count=x_cnt)
+            # print(f"  X (Inputs) afterclient.read_discrete_inputs : {res}")
+            if not res.isError():
+                # pymodbus 3.xでは res.bits が直接リストとして扱えます
+                print(f"  X (Inputs)  : {[1 if b else 0 for b in res.bits[:x_cnt]]}")
+            else:
+                print(f"  X (Inputs)  : [Error] {res}")
+
+        # 2. Y (Coils) - FC1
+        y_cnt = m_limits.get("Y", 0)
+        if y_cnt > 0:
+            res = client.read_coils(address=0, count=y_cnt)
+            if not res.isError():
+                print(f"  Y (Outputs) : {[1 if b else 0 for b in res.bits[:y_cnt]]}")
+
+        # 3. M (Internal Relays) - FC1 (Offset 1000)
+        m_cnt = m_limits.get("M", 0)
+        if m_cnt > 0:
+            res = client.read_coils(address=1000, count=m_cnt)
+            # print(f"  3. M (Internal Relays) client.read_coils(address=1000, count=m_cnt) : {res}")
+            if not res.isError():
+                print(f"  M (Internal): {[1 if b else 0 for b in res.bits[:m_cnt]]}")
+
+        # 4. D (Data Registers) - FC3
+        d_cnt = m_limits.get("D", 0)
+        if d_cnt > 0:
+            # 1リクエストで読めるのは 125 ワードまで
+            regs = []
+            for start in range(0, d_cnt, 125):
+                res = client.read_holding_registers(address=start, count=min(125, d_cnt - start))
+                if res.isError():
+                    break
+                regs.extend(res.registers)
+            else:
+                print(f"  D (Registers): {regs[:d_cnt]}")
 
-            # 1. X (Discrete Inputs) - FC2
-            x_cnt = m_limits.get("X", 0)
-            if x_cnt > 0:
-                res = client.read_discrete_inputs(address=0, count=x_cnt)
-                # print(f"  X (Inputs) afterclient.read_discrete_inputs : {res}")
-                if not res.isError():
-                    # pymodbus 3.xでは res.bits が直接リストとして扱えます
-                    print(f"  X (Inputs)  : {[1 if b else 0 for b in res.bits[:x_cnt]]}")
-                else:
-                    print(f"  X (Inputs)  : [Error] {res}")
+        show_plc_tasks(client, args, plc_conf_path)
+        client.close()
+        show_plc_history(rc["host"], plc_history.query_port(p_conf), scans)
+        print("-" * 40 + "\n")
 
-            # 2. Y (Coils) - FC1
-            y_cnt = m_limits.get("Y", 0)
-            if y_cnt > 0:
-                res = client.read_coils(address=0, count=y_cnt)
-                if not res.isError():
-                    print(f"  Y (Outputs) : {[1 if b else 0 for b in res.bits[:y_cnt]]}")
+    except Exception as e:
+        print(f"[!] Error: {e}")
 
-            # 3. M (Internal Relays) - FC1 (Offset 1000)
-            m_cnt = m_limits.get("M", 0)
-            if m_cnt > 0:
-                res = client.read_coils(address=1000, count=m_cnt)
-                # print(f"  3. M (Internal Relays) client.read_coils(address=1000, count=m_cnt) : {res}")
-                if not res.isError():
-                    print(f"  M (Internal): {[1 if b else 0 for b in res.bits[:m_cnt]]}")
 
-            # 4. D (Data Registers) - FC3
-            d_cnt = m_limits.get("D", 0)
-            if d_cnt > 0:
-                res = client.read_holding_registers(address=0, count=d_cnt)
-                if not res.isError():
-                    print(f"  D (Registers): {res.registers[:d_cnt]}")
+def show_plc_tasks(client, args, plc_conf_path):
+    """SYS レジスタのタスク統計（plc_tasks）を表示する（タスクが1つだけなら表示しない）"""
+    res = client.read_holding_registers(address=10000 + SYS_TASK_COUNT, count=1)
+    if res.isError() or res.registers[0] <= 1:
+        return
+    count = res.registers[0]
+    names = []
+    ladder_path = next((a for a in args if a.endswith(".yaml") and a != plc_conf_path), None)
+    try:
+        with open(ladder_path, "r", encoding="utf-8") as f:
+            names = task_names(yaml.safe_load(f))
+    except (OSError, TypeError, AttributeError, yaml.YAMLError):
+        pass
+
+    print("\n  Tasks:")
+    print(f"    {'name':<16} " + " ".join(f"{k:>12}" for k in TASK_REG_NAMES))
+    for i in range(count):
+        res = client.read_holding_registers(address=10000 + SYS_TASK_BASE + i * TASK_REGS, count=TASK_REGS)
+        if res.isError():
+            break
+        name = names[i] if i < len(names) else f"task{i}"
+        print(f"    {name:<16} " + " ".join(f"{v:>12}" for v in res.registers))
+
+def show_plc_history(host, port, scans):
+    """PLC のメモリ内履歴（plc_history）から直近の変化を表示する"""
+    if not port:
+        return
+    try:
+        resp = plc_history.query(host, port, {"cmd": "changes", "scans": scans, "limit": INFO_HISTORY_LIMIT})
+    except (OSError, ValueError) as e:
+        print(f"  (history unavailable: {e})")
+        return
 
-            client.close()
-            print("-" * 40 + "\n")
+    print(f"\n  Recent changes (last {scans} scans, current scan={resp['scan']}):")
+    for ev in resp["events"]:
+        print(f"    {plc_history.format_event(ev)}")
+    if not resp["events"]:
+        print("    (no changes)")
+    elif resp["total"] > len(resp["events"]):
+        print(f"    ... {resp['total'] - len(resp['events'])} older changes not shown")
+    if not resp["complete"]:
+        print(f"    (history starts at scan {resp['oldest_scan']})")
 
-        except Exception as e:
-            print(f"[!] Error: {e}")
+RELOAD_WAIT_SEC = 10.0  # reload で差し替えの完了を待つ時間
+
+def reload_plc_program(target_name, logger):
+    """SYS 10006 に書き込んで PLC にラダーを読み直させ、10007（プログラムの版）が変わるまで待つ"""
+    with state_lock:
+        if target_name not in svc_map:
+            print(f"[!] Service '{target_name}' not found.")
+            return
+        rc = svc_map[target_name].get("ready_check")
+    if not rc or rc.get("kind") not in MODBUS_CHECK_KINDS:
+        print(f"[!] Service {target_name} does not support Modbus reload.")
+        return
 
+    client = ModbusTcpClient(rc["host"], port=rc["port"])
+    if not client.connect():
+        print(f"[!] Could not connect to {target_name} to request reload.")
+        return
+    try:
+        res = client.read_holding_registers(10007, count=1)
+        before = None if res.isError() else res.registers[0]
+        client.write_register(10006, 1)
+        logger.log(f"Reload: requested ladder reload of {target_name} (program v{before})", console=True)
+
+        deadline = time.time() + RELOAD_WAIT_SEC
+        while time.time() < deadline:
+            time.sleep(0.2)
+            res = client.read_holding_registers(10007, count=1)
+            if not res.isError() and res.registers[0] != before:
+                logger.log(f"Reload: {target_name} is running program v{res.registers[0]}", console=True)
+                return
+        print(f"[!] {target_name} did not install a new program within {RELOAD_WAIT_SEC:.0f}s (see the PLC log)")
+    finally:
+        client.close()
 
 # -----------------------------
 # CLI Functions (All Features)
 # -----------------------------
+def show_pool_status():
+    if not pool:
+        print("PLC pool is not enabled (launcher: pool / --pool)")
+        return
+    print("\n" + "="*80)
+    print(f"{'WORKER':<7} | {'CPU':<4} | {'PID':<8} | {'LOAD':<6} | PLCs")
+    print("-"*8 + "|" + "-"*6 + "|" + "-"*10 + "|" + "-"*8 + "|" + "-"*45)
+    for index, cpu, pid, names, load in pool.describe():
+        cpu = "-" if cpu is None else cpu
+        print(f"{index:<7} | {cpu:<4} | {pid:<8} | {load:<6.2f} | {', '.join(names) or '-'}")
+    print("="*80)
+    print("LOAD: スキャン時間 / スキャン周期 の合計（1.00 で CPU 1つ分）\n")
+
 def show_status(start_order):
-    print("\n" + "="*90)
-    print(f"{'SERVICE NAME':<25} | {'TYPE':<10} | {'PID':<8} | {'STATUS':<12} | {'READY':<10} | {'MBUS-PORT':<15}")
-    print("-"*26 + "|" + "-"*12 + "|" + "-"*10 + "|" + "-"*14 + "|" + "-"*12 + "|" + "-"*11)
+    print("\n" + "="*110)
+    print(f"{'SERVICE NAME':<25} | {'TYPE':<10} | {'PID':<8} | {'STATUS':<12} | {'READY':<10} | {'MBUS-PORT':<9} | {'SCAN HEALTH':<15}")
+    print("-"*26 + "|" + "-"*12 + "|" + "-"*10 + "|" + "-"*14 + "|" + "-"*12 + "|" + "-"*11 + "|" + "-"*20)
 
     # summary用カウンタ
     summary = {
@@ -305,9 +659,18 @@ def show_status(start_order):
             ready = "YES" if svc_ready_status.get(name) else "NO"
             mbusport = svc["ready_check"]["port"] if svc['type'] == "plc" else "---"
 
-            print(f"{name:<25} | {svc.get('type', 'dev'):<10} | {pid:<8} | {status:<12} | {ready:<10} | {mbusport}")
+            # kind: heartbeat のサービスはスキャン状態と速度を表示
+            health = svc_health.get(name) if is_alive else None
+            if health and health["scan_rate"] is not None:
+                scan = f"{health['state']} {health['scan_rate']:.1f}/s"
+            elif health:
+                scan = health["state"]
+            else:
+                scan = "---"
+
+            print(f"{name:<25} | {svc.get('type', 'dev'):<10} | {pid:<8} | {status:<12} | {ready:<10} | {mbusport:<9} | {scan}")
     # status一覧の終わり
-    print("="*90 + "\n")
+    print("="*110 + "\n")
 
     # summary表
     print("\nService type summary:")
@@ -360,6 +723,7 @@ def interactive_log_viewer(log_dir):
 
 def execute_chaos(subcmd, target, logger, args=None):
     global disabled_services
+    resume = None
     with state_lock:
         if target not in svc_map:
             print(f"[!] Service '{target}' not found.")
@@ -388,16 +752,11 @@ def execute_chaos(subcmd, target, logger, args=None):
                 
                 # プロセスが止まっていれば再起動する ---
                 # p が存在しない、または poll() が値を返している（停止中）なら起動
-                if p is None or p.poll() is not None:
+                # 起動はロックの外で行う（restart_services が READY を一度 NO にし、monitor_loop が確認する）
+                if (p is None or p.poll() is not None) and target not in launching:
                     logger.log(f"Launching {target} for resume...", console=True)
-                    cmd = [PYTHON] + svc["command"] + svc.get("args", [])
-                    processes[target] = subprocess.Popen(
-                        cmd, 
-                        stdout=subprocess.DEVNULL, 
-                        stderr=subprocess.DEVNULL
-                    )
-                    # 一度NOにしておけば、monitor_loopがModbus接続を確認してYESにしてくれます
-                    svc_ready_status[target] = False
+                    launching.add(target)
+                    resume = svc
             else:
                 print(f"[!] {target} is not in disabled state.")
 
@@ -409,7 +768,7 @@ def execute_chaos(subcmd, target, logger, args=None):
             try:
                 sec = int(args[0])
                 rc = svc.get("ready_check")
-                if rc and rc.get("kind") == "modbus":
+                if rc and rc.get("kind") in MODBUS_CHECK_KINDS:
                     # Modbus経由で10005番(HR_SYS_BASE + 5)に書き込む
                     client = ModbusTcpClient(rc["host"], port=rc["port"])
                     if client.connect():
@@ -424,34 +783,94 @@ def execute_chaos(subcmd, target, logger, args=None):
             except ValueError:
                 print("[!] Latency must be an integer (seconds).")
 
+    if resume:
+        restart_services([resume], logger)
+
 
 # -----------------------------
 # Main Loop
 # -----------------------------
 def main():
-    global running, svc_map
-    if len(sys.argv) != 2:
-        print("Usage: python orchestrator.py orchestrator.yaml")
+    global running, svc_map, zygote, plant, pool
+    launcher_flags = {"--zygote": "zygote", "--inprocess": "inprocess", "--pool": "pool"}
+    args = [a for a in sys.argv[1:] if a not in launcher_flags]
+    if len(args) != 1:
+        print("Usage: python orchestrator.py orchestrator.yaml [--zygote | --inprocess | --pool]")
         return
 
-    conf = load_orchestrator_yaml(sys.argv[1])
+    conf = load_orchestrator_yaml(args[0])
     log_dir = conf.get("log", {}).get("dir", "logs")
     os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, f"orchestrator_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-    logger = OrchestratorLogger(log_file)
+    logger = create_orchestrator_logger(conf.get("log", {}))
+    log_file = logger.path
 
     start_order = resolve_start_order(conf["services"])
+    start_levels = resolve_start_levels(conf["services"])
     svc_map = {svc["name"]: svc for svc in start_order}
-
+    ready_timeout = conf.get("startup", {}).get("ready_timeout_s", 30)
+    monitor_conf = conf.get("monitor", {})
+    prober = ReadinessProber(
+        timeout=monitor_conf.get("probe_timeout_s", 1.0),
+        max_workers=monitor_conf.get("probe_workers", 32),
+    )
+
+    # launcher: zygote（--zygote）なら読み込み済みのプロセスから fork で、
+    # inprocess（--inprocess）なら orchestrator 自身の中でサービスを動かす。
+    # pool（--pool）なら PLC をコア数ぶんのワーカープロセスにまとめる
+    launcher = conf.get("launcher", "process")
+    for flag in sys.argv[1:]:
+        launcher = launcher_flags.get(flag, launcher)
     print(f"[*] Starting system. Logs recorded to: {log_file}")
-    for svc in start_order:
-        name = svc["name"]
-        cmd = [PYTHON] + svc["command"] + svc.get("args", [])
-        logger.log(f"Launching {name}...", console=True)
-        processes[name] = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        svc_ready_status[name] = check_service_ready(svc)
-
-    m_thread = threading.Thread(target=monitor_loop, args=(logger, start_order), daemon=True)
+    t_start = time.time()
+    if launcher == "inprocess":
+        from plant_runner import PlantRunner
+        plant = PlantRunner(log_dir)
+        logger.log(f"In-process plant runner ready in {time.time() - t_start:.2f}s (log: {plant.logger.path})", console=True)
+    elif launcher == "pool":
+        from plc_pool import PlcPool
+        pool_conf = conf.get("pool", {})
+        pool = PlcPool(
+            workers=pool_conf.get("workers"),
+            log_dir=log_dir,
+            python=PYTHON,
+            rebalance_interval=pool_conf.get("rebalance_interval_s", 30),
+            rebalance_threshold=pool_conf.get("rebalance_threshold", 0.2),
+            log=lambda msg, level=INFO: logger.log(msg, level, console=False),
+        )
+        logger.log(f"PLC pool ready in {time.time() - t_start:.2f}s ({len(pool.workers)} workers)", console=True)
+    elif launcher == "zygote":
+        if os.name != "posix":
+            logger.log("[WARN] zygote launcher requires fork(); using subprocess", level=WARN, console=True)
+        else:
+            try:
+                zygote = Zygote(PYTHON)
+                logger.log(f"Zygote ready in {time.time() - t_start:.2f}s (pid={zygote.proc.pid})", console=True)
+            except RuntimeError as e:
+                logger.log(f"[WARN] zygote unavailable ({e}); using subprocess", level=WARN, console=True)
+                zygote = None
+
+    # 依存関係の段ごとに並行起動し、段の全サービスが READY になってから次の段へ進む
+    for i, wave in enumerate(start_levels, start=1):
+        names = [svc["name"] for svc in wave]
+        logger.log(f"Launching wave {i}/{len(start_levels)}: {', '.join(names)}", console=True)
+        for svc in wave:
+            processes[svc["name"]] = launch_service(svc)
+            svc_ready_status[svc["name"]] = False
+
+        t_wave = time.time()
+        not_ready = wait_services_ready(wave, logger, prober, ready_timeout)
+        if not_ready:
+            # 起動は続け、残りは monitor_loop に任せる
+            logger.log(f"[WARN] wave {i}: not ready after {ready_timeout}s: {', '.join(not_ready)}", level=WARN, console=True)
+        else:
+            logger.log(f"Wave {i} ready in {time.time() - t_wave:.2f}s", console=False)
+    logger.log(f"Startup finished in {time.time() - t_start:.2f}s", console=True)
+
+    m_thread = threading.Thread(
+        target=monitor_loop,
+        args=(logger, start_order, prober, monitor_conf.get("interval_s", 2.0)),
+        daemon=True,
+    )
     m_thread.start()
 
     print("\n[!] System initiated. Type 'help' or '?' for commands.")
@@ -480,17 +899,26 @@ def main():
                     print("Usage: addr <plc_service_name>")
                 else:
                     show_specific_plc_map(parts[1])
-            elif cmd == "info":
+            elif cmd == "pool":
+                show_pool_status()
+            elif cmd == "reload":
                 if len(parts) < 2:
-                    print("Usage: info <plc_service_name>")
+                    print("Usage: reload <plc_service_name>")
+                else:
+                    reload_plc_program(parts[1], logger)
+            elif cmd == "info":
+                if len(parts) < 2 or (len(parts) > 2 and not parts[2].isdigit()):
+                    print("Usage: info <plc_service_name> [scans]")
                 else:
-                    show_plc_memory_status(parts[1])
+                    show_plc_memory_status(parts[1], int(parts[2]) if len(parts) > 2 else INFO_HISTORY_SCANS)
             elif cmd in ["help", "?"]:
                 print("\nAvailable commands:")
                 print("  status (ls, ps)    : Show status of all services")
                 print("  addr <name>        : Show Modbus address map for a specific PLC")
-                print("  info <name>        : Show real-time memory value (Modbus Read)")
+                print("  info <name> [scans]: Show real-time memory value and recent changes")
                 print("  log                : Open interactive log viewer")
+                print("  pool               : Show PLC pool workers (launcher: pool)")
+                print("  reload <name>      : Reload the ladder program of a PLC without restarting")
                 print("  chaos kill <name>  : Force kill a service (auto-restart enabled)")
                 print("  chaos stop <name>  : Stop a service and disable auto-restart")
                 print("  chaos resume <name>: Re-enable and start a stopped service")
@@ -508,6 +936,14 @@ def main():
     for name in reversed([s["name"] for s in start_order]):
         p = processes.get(name)
         if p and p.poll() is None: p.terminate()
+    prober.close()
+    if zygote:
+        zygote.close()
+    if plant:
+        plant.close()
+    if pool:
+        pool.close()
+    logger.close()
     print("[*] Done.")
 
 if __name__ == "__main__":
@@ -0,0 +1,318 @@
+import asyncio
+import concurrent.futures
+import os
+import signal
+import threading
+import time
+import traceback
+
+import devicesim
+import iodevicesim
+import plcsim
+from ladder_compiler import COMPILE_LOCK
+from modbus_server import ModbusBridge
+from simlog import Logger, INFO, WARN, ERROR
+
+# -----------------------------
+# Plant Runner（orchestrator の in-process モード）
+# -----------------------------
+# サービスごとに OS プロセスを起動する代わりに、PLC / ModbusBridge /
+# DeviceSimulator / IODevice を1プロセス内のオブジェクトとして動かす。
+#
+#   * PLC のスキャンと Modbus サーバー・台帳同期は共有のイベントループ上のタスク
+#   * devicesim / iodevicesim は同期クライアントで PLC に接続するため、
+#     ループをブロックしないよう専用スレッドで run() し、ループ側のタスクが終了を待つ
+#   * ラダーパーサー（ladder_compiler.get_compiler）とログファイルは全サービスで共有
+#
+# chaos kill / stop は該当サービスのタスクの cancel、resume は新しいタスクの起動になる。
+
+# in-process で動かせるスクリプト -> 起動関数名
+PLANT_SCRIPTS = {
+    "plcsim.py": "run_plc",
+    "devicesim.py": "run_device",
+    "iodevicesim.py": "run_iodevice",
+}
+
+STOP_TIMEOUT = 5.0  # 停止を要求してからスレッドの終了を待つ上限 [s]
+SCAN_EWMA = 0.1     # スキャン時間の移動平均の重み
+
+
+class PlantLogger(Logger):
+    """全サービス共有のログファイル。行にサービス名を付けて書く（画面には出さない）"""
+
+    def __init__(self, log_dir, name="plant"):
+        super().__init__(name, log_dir, console=False)
+
+    def write(self, name, msg, level=INFO):
+        self.log(f"{name} | {msg}", level)
+
+    def channel(self, name):
+        return PlantLogChannel(self, name)
+
+
+class PlantLogChannel:
+    """サービスに渡す Logger 互換オブジェクト（close してもファイルは閉じない）"""
+
+    def __init__(self, plant_logger, name):
+        self.plant_logger = plant_logger
+        self.name = name
+        self.path = plant_logger.path
+
+    def log(self, msg, level=INFO, console=None):
+        self.plant_logger.write(self.name, msg, level)
+
+    def close(self):
+        pass
+
+
+class PlantService:
+    """in-process で動くサービス（subprocess.Popen と同じ poll / kill / terminate を持つ）"""
+
+    def __init__(self, runner, name, future):
+        self.runner = runner
+        self.name = name
+        self.future = future
+        self.pid = os.getpid()
+        self.returncode = None
+        self.stop_signal = None
+
+    def poll(self):
+        if self.returncode is None and self.future.done():
+            if self.stop_signal is not None:
+                self.returncode = -self.stop_signal
+            elif self.future.cancelled():
+                self.returncode = -signal.SIGTERM
+            elif self.future.exception() is not None:
+                self.returncode = 1
+            else:
+                self.returncode = self.future.result() or 0
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            self.stop_signal = sig
+            self.runner.loop.call_soon_threadsafe(self.runner.cancel, self.name)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class BlockingService:
+    """スレッドで動かす devicesim / iodevicesim（作成から run() までを同じスレッドで行う）"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.obj = None
+        self.stopping = False
+        self.lock = threading.Lock()
+
+    def run(self):
+        obj = self.factory()
+        with self.lock:
+            self.obj = obj
+            stopping = self.stopping
+        if stopping:
+            obj.shutdown()
+            return 0
+        obj.run()
+        return 0
+
+    def stop(self):
+        with self.lock:
+            self.stopping = True
+            obj = self.obj
+        if obj:
+            obj.stop()
+
+
+class PlantRunner:
+    def __init__(self, log_dir="logs", name="plant"):
+        self.logger = PlantLogger(log_dir, name)
+        self.tasks = {}       # サービス名 -> 実行中の asyncio.Task（ループのスレッドだけが触る）
+        self.cancelled = set()  # タスク開始前に停止を要求されたサービス
+        self.restore = {}       # サービス名 -> 起動時に書き戻す PLC メモリ (Memory.snapshot)
+        self.final_memory = {}  # サービス名 -> 停止時の PLC メモリ
+        self.scan_stats = {}    # サービス名 -> {"scan": 平均スキャン時間 [s], "cycle": 周期 [s], "scans": 回数}
+        self.futures = []
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="plant-loop", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def supports(svc):
+        return len(svc["command"]) == 1 and os.path.basename(svc["command"][0]) in PLANT_SCRIPTS
+
+    # -----------------------------
+    # 起動 / 停止（orchestrator のスレッドから呼ぶ）
+    # -----------------------------
+    def start(self, svc, memory=None):
+        """memory を渡すと PLC の起動時にそのメモリを書き戻す（plc_pool の移動用）"""
+        name = svc["name"]
+        if memory is not None:
+            self.restore[name] = memory
+        runner = getattr(self, PLANT_SCRIPTS[os.path.basename(svc["command"][0])])
+        args = [str(a) for a in svc.get("args", [])]
+        # future はタスクの後片付け（ポートを閉じる・スレッドの終了）まで終わってから完了する
+        fut = asyncio.run_coroutine_threadsafe(self.guard(name, runner(name, args)), self.loop)
+        self.futures = [f for f in self.futures if not f.done()] + [fut]
+        return PlantService(self, name, fut)
+
+    def cancel(self, name):
+        """ループのスレッドで呼ぶ"""
+        task = self.tasks.get(name)
+        if task:
+            task.cancel()
+        else:
+            self.cancelled.add(name)
+
+    def cancel_all(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+    def close(self, timeout=STOP_TIMEOUT):
+        self.loop.call_soon_threadsafe(self.cancel_all)
+        if self.futures:
+            concurrent.futures.wait(self.futures, timeout=timeout + 1)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1)
+        self.logger.close()
+
+    # -----------------------------
+    # ループ上のタスク
+    # -----------------------------
+    async def guard(self, name, coro):
+        """サービスの終了コードを返す。例外はログに残して 1 とする"""
+        log = self.logger.channel(name).log
+        self.tasks[name] = asyncio.current_task()
+        try:
+            if name in self.cancelled:
+                self.cancelled.discard(name)
+                coro.close()
+                raise asyncio.CancelledError()
+            return await coro
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except asyncio.CancelledError:
+            log("[plant] service cancelled")
+            raise
+        except Exception as e:
+            log(f"[plant][ERROR] {e}\n{traceback.format_exc()}", level=ERROR)
+            return 1
+        finally:
+            if self.tasks.get(name) is asyncio.current_task():
+                del self.tasks[name]
+
+    def in_thread(self, fn, name):
+        """fn を専用スレッドで実行し、その結果を待てる future を返す"""
+        fut = self.loop.create_future()
+
+        def done(setter, value):
+            if not fut.done():
+                setter(value)
+
+        def target():
+            try:
+                result = fn()
+            except BaseException as e:
+                self.loop.call_soon_threadsafe(done, fut.set_exception, e)
+            else:
+                self.loop.call_soon_threadsafe(done, fut.set_result, result)
+
+        threading.Thread(target=target, name=name, daemon=True).start()
+        return fut
+
+    async def run_plc(self, name, args):
+        log_channel = self.logger.channel(name)
+
+        def create():
+            # パーサーを共有するため、ラダーのコンパイルは1件ずつ行う
+            with COMPILE_LOCK:
+                opts = plcsim.parse_args(args)
+                return plcsim.create_plc(opts.plc_yaml, opts.ladder_yaml, logger=log_channel,
+                                         warm_start=opts.warm_start, checkpoint=opts.checkpoint)
+
+        plc, port = await self.in_thread(create, f"{name}-load")
+        snap = self.restore.pop(name, None)
+        if snap:
+            plc.mem.restore(snap)
+            plc.log(f"memory restored (scan_count={plc.mem.sys.scan_count})")
+        plc.log(f"Starting Modbus server on port {port}")
+        bridge = ModbusBridge(plc, port)
+        server = asyncio.create_task(bridge.serve())
+        sync = asyncio.create_task(self.sync_loop(bridge))
+
+        # イベントタスクの X が変化したら（PLC.interrupt）、周期を待たずにこのループで tick する
+        wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        plc.notify = lambda: loop.call_soon_threadsafe(wake.set)
+
+        plc.log("PLC START")
+        stats = self.scan_stats[name] = {"scan": None, "cycle": plc.tick_period, "scans": 0}
+        try:
+            while plc.power:
+                if server.done():
+                    server.result()  # ポートを開けなかった場合などはここで例外になる
+                    raise RuntimeError(f"Modbus server on port {port} stopped")
+                t0 = time.monotonic()
+                if plc.tick():
+                    t1 = time.monotonic()
+                    if stats["scan"] is None:
+                        stats["scan"] = t1 - t0
+                    else:
+                        stats["scan"] += (t1 - t0 - stats["scan"]) * SCAN_EWMA
+                    stats["scans"] += 1
+                    stats["cycle"] = plc.tick_period  # リロードでタスクが変わることがある
+
+                # 次にいずれかのタスクの周期が来る時刻まで待つ（タスクの予定時刻は周期の開始時刻が基準のため、
+                # 同じループの他の PLC の分だけ周期が延びることはない。遅れた場合は plc_tasks で数え直す）
+                try:
+                    await asyncio.wait_for(wake.wait(), max(0.0, plc.next_due() - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+            return 0
+        finally:
+            for t in (server, sync):
+                t.cancel()
+            await asyncio.gather(server, sync, return_exceptions=True)
+            self.scan_stats.pop(name, None)
+            self.final_memory[name] = plc.mem.snapshot()
+            plc.log("PLC STOP")
+            plc.close_files()
+
+    async def sync_loop(self, bridge):
+        bridge.log("[Modbus] sync task started")
+        while True:
+            try:
+                bridge.sync_once()
+                await asyncio.sleep(bridge.SYNC_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                bridge.log(f"[Modbus][ERROR] {e}\n{traceback.format_exc()}", level=ERROR)
+                await asyncio.sleep(1)
+
+    async def run_device(self, name, args):
+        return await self.run_blocking(name, lambda: devicesim.create_device(args, logger=self.logger.channel(name)))
+
+    async def run_iodevice(self, name, args):
+        return await self.run_blocking(name, lambda: iodevicesim.IODevice(args[0], logger=self.logger.channel(name)))
+
+    async def run_blocking(self, name, factory):
+        service = BlockingService(factory)
+        fut = self.in_thread(service.run, name)
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # スレッドは強制終了できないため、停止を要求して周期の切れ目で抜けるのを待つ
+            service.stop()
+            try:
+                await asyncio.wait_for(fut, STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.logger.write(name, f"[plant][WARN] thread did not stop within {STOP_TIMEOUT}s", level=WARN)
+            except BaseException:
+                pass
+            raise
@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from datetime import datetime
+
+from event_trace import AREAS, EVENT_NAMES, device_name, parse_device
+from simlog import WARN
+
+# -----------------------------
+# PLC の変化履歴（メモリ内・問い合わせ用）
+# -----------------------------
+# 直近のデバイス変化（EventRing。event_trace と共有）と、snapshot_every スキャンごとの
+# X / Y / M / D イメージ（直近 snapshots 個）をメモリ内に持ち、ローカルの TCP ソケットで
+# JSON 1行の問い合わせに答える。ディスクには触れない。
+#
+#   {"cmd": "changes", "scans": 500, "device": "Y0", "limit": 100}
+#       -> 直近 500 スキャンの変化（device / limit は省略可）
+#   {"cmd": "value", "device": "D12", "scan": 1234}
+#       -> スキャン 1234 終了時点の D12（それ以前で最新のイメージ + その後の変化から求める）
+#   {"cmd": "snapshots"}
+#       -> 保持しているイメージのスキャン番号と時刻
+#
+# 問い合わせは Modbus サーバーと同じイベントループで処理する（ModbusBridge.serve）。
+# ポートは plc.yaml の history.port。省略時は Modbus ポート + HISTORY_PORT_OFFSET。
+
+HISTORY_PORT_OFFSET = 10000
+DEFAULT_TRANSITIONS = 10000    # 保持する変化の件数
+DEFAULT_SNAPSHOTS = 10         # 保持するイメージの数
+DEFAULT_SNAPSHOT_EVERY = 100   # イメージを取る間隔 [スキャン]
+DEFAULT_LIMIT = 200            # changes で返す件数の上限
+
+IMAGE_AREAS = "XYMD"
+
+
+def history_conf(plc_conf):
+    """plc.yaml の history（無効なら None）。history: true または設定の dict を書いたときだけ有効"""
+    conf = plc_conf.get("history")
+    if not conf:
+        return None
+    return conf if isinstance(conf, dict) else {}
+
+
+def query_port(plc_conf):
+    """問い合わせポート（無効なら 0）。orchestrator も同じ規則で接続先を決める"""
+    conf = history_conf(plc_conf)
+    if conf is None:
+        return 0
+    port = conf.get("port")
+    if port is None:
+        modbus_port = plc_conf.get("modbus", {}).get("port")
+        if not modbus_port or modbus_port + HISTORY_PORT_OFFSET > 65535:
+            return 0
+        port = modbus_port + HISTORY_PORT_OFFSET
+    return port
+
+
+class Snapshot:
+    """X / Y / M / D のイメージ1つ分（領域は起動時に確保して使い回す）"""
+
+    def __init__(self, mem):
+        self.scan = None  # None の間は書きかけ（問い合わせでは使わない）
+        self.seq = 0      # イメージを取った時点の EventRing.head
+        self.time = 0.0
+        self.X = list(mem.X)
+        self.Y = list(mem.Y)
+        self.M = list(mem.M)
+        self.D = list(mem.D)
+
+
+class PlcHistory:
+    def __init__(self, mem, ring, snapshots=DEFAULT_SNAPSHOTS, snapshot_every=DEFAULT_SNAPSHOT_EVERY,
+                 port=0, host="127.0.0.1"):
+        self.mem = mem
+        self.ring = ring
+        self.snapshot_every = max(1, int(snapshot_every))
+        self.slots = [Snapshot(mem) for _ in range(max(1, int(snapshots)))]
+        self.taken = 0  # 取ったイメージの数（累計）
+        self.port = port
+        self.host = host
+
+    @staticmethod
+    def transitions(plc_conf):
+        """history が求めるリングの大きさ（無効なら 0）"""
+        conf = history_conf(plc_conf)
+        return 0 if conf is None else conf.get("transitions", DEFAULT_TRANSITIONS)
+
+    @classmethod
+    def from_config(cls, plc_conf, mem, ring):
+        """
+        plc.yaml の history から作る（history が無い / false なら None）。
+          history:
+            transitions: 10000   # 保持する変化の件数
+            snapshots: 10        # 保持するイメージの数
+            snapshot_every: 100  # イメージを取る間隔 [スキャン]
+            port: 25030          # 問い合わせポート（省略時は Modbus ポート + 10000、0 で無効）
+        """
+        conf = history_conf(plc_conf)
+        if conf is None:
+            return None
+        return cls(
+            mem, ring,
+            snapshots=conf.get("snapshots", DEFAULT_SNAPSHOTS),
+            snapshot_every=conf.get("snapshot_every", DEFAULT_SNAPSHOT_EVERY),
+            port=query_port(plc_conf),
+        )
+
+    # -----------------------------
+    # 記録（スキャンの後に呼ぶ）
+    # -----------------------------
+    def on_scan(self):
+        scan = self.mem.sys.scan_count
+        if scan % self.snapshot_every == 0 or self.taken == 0:
+            self.take(scan)
+
+    def take(self, scan):
+        slot = self.slots[self.taken % len(self.slots)]
+        slot.scan = None
+        slot.seq = self.ring.head
+        slot.time = time.time()
+        slot.X[:] = self.mem.X
+        slot.Y[:] = self.mem.Y
+        slot.M[:] = self.mem.M
+        slot.D[:] = self.mem.D
+        slot.scan = scan
+        self.taken += 1
+
+    # -----------------------------
+    # 問い合わせ
+    # -----------------------------
+    def snapshots(self):
+        return sorted((s for s in self.slots if s.scan is not None), key=lambda s: s.seq)
+
+    def query(self, req):
+        cmd = req.get("cmd")
+        if cmd == "changes":
+            return self.changes(req.get("scans"), req.get("device"), req.get("limit", DEFAULT_LIMIT))
+        if cmd == "value":
+            return self.value_at(req["device"], int(req["scan"]))
+        if cmd == "snapshots":
+            return {
+                "scan": self.mem.sys.scan_count,
+                "snapshots": [{"scan": s.scan, "time": s.time} for s in self.snapshots()],
+            }
+        raise ValueError(f"unknown cmd: {cmd}")
+
+    def changes(self, scans=None, device=None, limit=DEFAULT_LIMIT):
+        now = self.mem.sys.scan_count
+        since = now - int(scans) if scans else -1
+        dev = parse_device(device) if device else None
+        ring = self.ring
+        oldest = ring.oldest_scan()
+        if oldest is None:
+            oldest = now
+        # 要求した範囲の先頭は二分探索で求め、リング全体は読まない
+        end = ring.head
+        start = ring.first_after_scan(since)
+        total = end - start
+        if dev is None and limit:
+            # デバイスで絞り込まなければ、返す分（新しい limit 件）だけを読む
+            start = max(start, end - limit)
+        # monotonic_ns -> 実時刻 [s]
+        offset = time.time_ns() - time.monotonic_ns()
+
+        events = []
+        for _seq, t_ns, scan, event, area, address, value in ring.records(start, end):
+            if scan <= since or (dev is not None and (area, address) != dev):
+                continue
+            events.append([scan, (t_ns + offset) / 1e9, EVENT_NAMES.get(event, str(event)),
+                           device_name(area, address), value])
+        return {
+            "scan": now,
+            "oldest_scan": oldest,
+            # リングが1周していて、要求した範囲より古い変化までは残っていない
+            "complete": ring.head <= ring.capacity or oldest <= since,
+            "total": len(events) if dev is not None else total,
+            "events": events[-limit:] if limit else events,
+        }
+
+    def value_at(self, device, scan):
+        area, address = parse_device(device)
+        name = AREAS[area]
+        if name not in IMAGE_AREAS:
+            raise ValueError(f"history supports {', '.join(IMAGE_AREAS)} only: {device}")
+        live = getattr(self.mem, name)
+        if not 0 <= address < len(live):
+            raise ValueError(f"{device} is out of range ({name}0-{name}{len(live) - 1})")
+
+        now = self.mem.sys.scan_count
+        if scan >= now:
+            return {"device": device, "scan": now, "value": int(live[address]), "source": "live"}
+
+        base = None
+        snaps = self.snapshots()
+        for s in snaps:
+            if s.scan <= scan:
+                base = s
+        if base is None:
+            oldest = snaps[0].scan if snaps else now
+            raise ValueError(f"scan {scan} is older than the oldest snapshot (scan {oldest})")
+
+        value = int(getattr(base, name)[address])
+        records = self.ring.records(base.seq)
+        for _seq, _t_ns, rec_scan, _event, rec_area, rec_address, rec_value in records:
+            if rec_scan > scan:
+                break
+            if rec_area == area and rec_address == address:
+                value = rec_value
+        return {
+            "device": device, "scan": scan, "value": value, "source": "history",
+            "snapshot_scan": base.scan,
+            # イメージ以降の変化がリングから消えていれば、値はイメージ時点のもの
+            "exact": records[0][0] == base.seq if records else True,
+        }
+
+    # -----------------------------
+    # 問い合わせサーバー（Modbus サーバーと同じループで動かす）
+    # -----------------------------
+    async def start_server(self, log):
+        if not self.port:
+            return None
+        try:
+            server = await asyncio.start_server(self.handle, self.host, self.port)
+        except OSError as e:
+            log(f"[HISTORY][WARN] query port {self.port} unavailable: {e}", level=WARN)
+            return None
+        log(f"[HISTORY] query server on {self.host}:{self.port}")
+        return server
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    # リングやイメージを読む処理は Modbus と同じループを止めないよう別スレッドで行う
+                    resp = await asyncio.to_thread(self.query, json.loads(line))
+                except Exception as e:
+                    resp = {"error": str(e)}
+                writer.write((json.dumps(resp) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+
+# -----------------------------
+# クライアント（orchestrator / CLI）
+# -----------------------------
+def query(host, port, req, timeout=2.0):
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(req) + "\n").encode())
+        line = sock.makefile("rb").readline()
+    if not line:
+        raise ConnectionError(f"no response from {host}:{port}")
+    resp = json.loads(line)
+    if "error" in resp:
+        raise ValueError(resp["error"])
+    return resp
+
+
+def format_event(ev):
+    scan, t, event, device, value = ev
+    ts = datetime.fromtimestamp(t).strftime("%H:%M:%S.%f")[:-3]
+    return f"{ts} | scan={scan:<8} | {event:<8} | {device} = {value}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PLC history query client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True, help="問い合わせポート（既定は Modbus ポート + 10000）")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    ch = sub.add_parser("changes", help="直近の変化を表示")
+    ch.add_argument("--scans", type=int, default=None, help="直近何スキャン分か（省略時は保持している全件）")
+    ch.add_argument("--device", default=None)
+    ch.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    val = sub.add_parser("value", help="指定スキャン時点のデバイス値を表示")
+    val.add_argument("device")
+    val.add_argument("scan", type=int)
+
+    sub.add_parser("snapshots", help="保持しているイメージを表示")
+
+    args = parser.parse_args()
+    req = {k: v for k, v in vars(args).items() if k not in ("host", "port") and v is not None}
+    try:
+        resp = query(args.host, args.port, req)
+    except (OSError, ValueError) as e:
+        print(f"[!] {e}")
+        sys.exit(1)
+
+    if args.cmd == "changes":
+        for ev in resp["events"]:
+            print(format_event(ev))
+        note = "" if resp["complete"] else f" (history starts at scan {resp['oldest_scan']})"
+        print(f"-- {len(resp['events'])}/{resp['total']} changes, current scan={resp['scan']}{note}")
+    elif args.cmd == "value":
+        print(json.dumps(resp))
+    else:
+        for s in resp["snapshots"]:
+            print(f"scan={s['scan']:<8} {datetime.fromtimestamp(s['time']).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
+
+
+if __name__ == "__main__":
+    main()
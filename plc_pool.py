@@ -0,0 +1,352 @@
+import argparse
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from simlog import ERROR
+
+# -----------------------------
+# PLC プール（orchestrator の pool モード）
+# -----------------------------
+# PLC 200台を200プロセスで動かすと、インタプリタ同士が CPU を奪い合って
+# スキャン周期が乱れる。pool モードでは CPU コア数ぶんのワーカープロセスを起動し、
+# 各ワーカーが複数の PLC を1つのスキャンスケジューラ（plant_runner のイベントループ）で動かす。
+#
+#   orchestrator --(stdin: start / stop)--> ワーカー（CPU を1つに固定）
+#   orchestrator <--(stdout: exit / stats)-- ワーカー
+#
+# * 割り当て: 初回は PLC 数の最も少ないワーカー（同数なら番号の小さい方）。
+#   一度決まったワーカーは再起動後も変わらない（同じ yaml なら毎回同じ割り当て）
+# * 再配置: ワーカーが報告するスキャン時間から負荷（スキャン時間 / 周期の合計）を求め、
+#   差が閾値を超えたら PLC を1台ずつ移動する。移動はメモリを引き継いだ停止 -> 起動
+
+STATS_INTERVAL = 1.0  # ワーカーがスキャン時間を報告する間隔 [s]
+WARMUP_SCANS = 20     # 起動直後の PLC はスキャン時間が安定するまで再配置の判断に使わない
+POLL_INTERVAL = 0.1   # ワーカーが PLC の終了を確認する間隔 [s]
+
+
+# -----------------------------
+# ワーカー側
+# -----------------------------
+def pin_cpu(cpu):
+    """このプロセスを cpu に固定する。できない環境では False"""
+    if cpu is None or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError:
+        return False
+    return True
+
+
+def worker_main(index, cpu, log_dir):
+    from plant_runner import PlantRunner
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C は orchestrator が処理する
+    pinned = pin_cpu(cpu)
+    runner = PlantRunner(log_dir, name=f"plcpool{index}")
+    runner.logger.write("pool", f"worker {index} started (cpu={cpu if pinned else 'any'}, pid={os.getpid()})")
+
+    out = sys.stdout
+
+    def send(msg):
+        out.write(json.dumps(msg) + "\n")
+        out.flush()
+
+    services = {}  # name -> PlantService
+    send({"ready": True, "pid": os.getpid(), "pinned": pinned})
+
+    stdin = sys.stdin.buffer
+    buf = b""
+    next_stats = time.time() + STATS_INTERVAL
+    while True:
+        readable, _, _ = select.select([stdin], [], [], POLL_INTERVAL)
+        if readable:
+            data = os.read(stdin.fileno(), 65536)
+            if not data:
+                break  # orchestrator が終了した
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if not line.strip():
+                    continue
+                req = json.loads(line)
+                name = req["name"]
+                if req["cmd"] == "start":
+                    svc = {"name": name, "command": ["plcsim.py"], "args": req["args"]}
+                    runner.final_memory.pop(name, None)
+                    services[name] = runner.start(svc, memory=req.get("memory"))
+                elif req["cmd"] == "stop" and name in services:
+                    services[name].send_signal(req.get("sig", signal.SIGTERM))
+
+        for name, p in list(services.items()):
+            if p.poll() is not None:
+                del services[name]
+                send({"exit": name, "code": p.returncode, "memory": runner.final_memory.pop(name, None)})
+
+        if time.time() >= next_stats:
+            send({"stats": {
+                name: {"scan_ms": (st["scan"] or 0.0) * 1000, "cycle_ms": st["cycle"] * 1000,
+                       "scans": st["scans"]}
+                for name, st in list(runner.scan_stats.items())
+            }})
+            next_stats = time.time() + STATS_INTERVAL
+
+    runner.close()
+
+
+# -----------------------------
+# orchestrator 側
+# -----------------------------
+class PoolService:
+    """プール内の PLC（subprocess.Popen と同じ poll / kill / terminate を持つ）"""
+
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+        self.pid = None
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.returncode is None:
+            self.pool.stop(self.name, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class PoolWorker:
+    def __init__(self, pool, index, cpu):
+        self.pool = pool
+        self.index = index
+        self.cpu = cpu
+        self.proc = None
+        self.pinned = False
+        self.stats = {}  # PLC 名 -> {"scan_ms", "cycle_ms"}
+        self.spawn()
+
+    def spawn(self):
+        cmd = [self.pool.python, os.path.abspath(__file__), "--worker", str(self.index),
+               "--log-dir", self.pool.log_dir]
+        if self.cpu is not None:
+            cmd += ["--cpu", str(self.cpu)]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL)
+        self.stats = {}
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError(f"pool worker {self.index} failed to start")
+        self.pinned = json.loads(line).get("pinned", False)
+        threading.Thread(target=self.read_loop, args=(self.proc,), daemon=True).start()
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    def send(self, msg):
+        self.proc.stdin.write((json.dumps(msg) + "\n").encode())
+        self.proc.stdin.flush()
+
+    def read_loop(self, proc):
+        for line in proc.stdout:
+            msg = json.loads(line)
+            if "exit" in msg:
+                self.pool.on_exit(self, msg["exit"], msg["code"], msg.get("memory"))
+            elif "stats" in msg:
+                self.stats = msg["stats"]
+        # ワーカーごと落ちた場合は、そのワーカーの PLC をすべて終了扱いにする
+        self.pool.on_worker_lost(self, proc)
+
+    def load(self):
+        """このワーカーの負荷（各 PLC のスキャン時間 / 周期の合計。1.0 で CPU 1つ分）"""
+        return sum(self.plc_load(name) for name in self.stats)
+
+    def settled(self, names):
+        """names の PLC がすべて WARMUP_SCANS 回以上スキャン時間を報告しているか"""
+        return all(self.stats.get(n, {}).get("scans", 0) >= WARMUP_SCANS for n in names)
+
+    def plc_load(self, name):
+        st = self.stats.get(name)
+        if not st or st["cycle_ms"] <= 0:
+            return 0.0
+        return st["scan_ms"] / st["cycle_ms"]
+
+    def close(self):
+        if self.alive:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=7)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class PlcPool:
+    def __init__(self, workers=None, log_dir="logs", python=sys.executable,
+                 rebalance_interval=30.0, rebalance_threshold=0.2, log=None):
+        self.python = python
+        self.log_dir = log_dir
+        self.log = log or (lambda msg, level=None: None)
+        self.rebalance_threshold = rebalance_threshold
+        self.lock = threading.RLock()
+        self.assignment = {}  # PLC 名 -> ワーカー番号（再起動後も同じワーカーを使う）
+        self.running = {}     # PLC 名 -> (PoolService, PoolWorker, svc)
+        self.moving = {}      # PLC 名 -> 移動先の PoolWorker
+
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = [None] * (os.cpu_count() or 1)
+        count = workers or len(cpus)
+        self.workers = [PoolWorker(self, i, cpus[i % len(cpus)]) for i in range(count)]
+
+        self.stop_event = threading.Event()
+        if rebalance_interval > 0:
+            threading.Thread(target=self.rebalance_loop, args=(rebalance_interval,), daemon=True).start()
+
+    @staticmethod
+    def supports(svc):
+        return len(svc["command"]) == 1 and os.path.basename(svc["command"][0]) == "plcsim.py"
+
+    # -----------------------------
+    # 起動 / 停止
+    # -----------------------------
+    def assign(self, name):
+        with self.lock:
+            if name not in self.assignment:
+                counts = [0] * len(self.workers)
+                for idx in self.assignment.values():
+                    counts[idx] += 1
+                self.assignment[name] = counts.index(min(counts))
+            worker = self.workers[self.assignment[name]]
+            if not worker.alive:
+                self.log(f"[POOL] worker {worker.index} restarting")
+                worker.spawn()
+            return worker
+
+    def start(self, svc, memory=None):
+        name = svc["name"]
+        with self.lock:
+            worker = self.assign(name)
+            handle = PoolService(self, name)
+            handle.pid = worker.proc.pid
+            self.running[name] = (handle, worker, svc)
+            worker.send({"cmd": "start", "name": name, "args": [str(a) for a in svc.get("args", [])],
+                         "memory": memory})
+        return handle
+
+    def stop(self, name, sig):
+        with self.lock:
+            entry = self.running.get(name)
+            if entry:
+                self.moving.pop(name, None)
+                entry[1].send({"cmd": "stop", "name": name, "sig": int(sig)})
+
+    def on_exit(self, worker, name, code, memory):
+        with self.lock:
+            entry = self.running.get(name)
+            if not entry or entry[1] is not worker:
+                return
+            handle, _, svc = entry
+            target = self.moving.pop(name, None)
+            if target is not None:
+                # 再配置による停止: メモリを引き継いで移動先で起動する（handle はそのまま）
+                self.assignment[name] = target.index
+                self.running[name] = (handle, target, svc)
+                handle.pid = target.proc.pid
+                target.send({"cmd": "start", "name": name,
+                             "args": [str(a) for a in svc.get("args", [])], "memory": memory})
+                self.log(f"[POOL] moved {name}: worker {worker.index} -> {target.index}")
+                return
+            del self.running[name]
+            handle.returncode = code
+
+    def on_worker_lost(self, worker, proc):
+        with self.lock:
+            if worker.proc is not proc:
+                return
+            for name, (handle, w, _) in list(self.running.items()):
+                if w is worker:
+                    del self.running[name]
+                    self.moving.pop(name, None)
+                    handle.returncode = proc.poll() if proc.poll() is not None else -signal.SIGKILL
+
+    # -----------------------------
+    # 再配置
+    # -----------------------------
+    def rebalance_loop(self, interval):
+        while not self.stop_event.wait(interval):
+            try:
+                self.rebalance()
+            except (OSError, ValueError) as e:
+                self.log(f"[POOL][ERROR] rebalance: {e}", level=ERROR)
+
+    def rebalance(self):
+        """最も負荷の高いワーカーから低いワーカーへ PLC を1台移す。移した場合は True"""
+        with self.lock:
+            if self.moving or len(self.workers) < 2:
+                return False
+            workers = [w for w in self.workers if w.alive]
+            if len(workers) < 2:
+                return False
+            # 起動・移動した直後の PLC がある間は負荷を正しく測れないため判断しない
+            for w in workers:
+                if not w.settled([n for n, (_, ww, _) in self.running.items() if ww is w]):
+                    return False
+            hot = max(workers, key=lambda w: w.load())
+            cold = min(workers, key=lambda w: w.load())
+            gap = hot.load() - cold.load()
+            if gap <= self.rebalance_threshold:
+                return False
+
+            # 移した後の差が最も小さくなる PLC を選ぶ。差が閾値以上縮まらない移動は
+            # 往復の原因になるため行わない
+            candidates = [
+                (abs(gap - 2 * hot.plc_load(name)), name)
+                for name, (_, w, _) in self.running.items()
+                if w is hot and gap - abs(gap - 2 * hot.plc_load(name)) > self.rebalance_threshold
+            ]
+            if not candidates:
+                return False
+            _, name = min(candidates)
+            self.log(f"[POOL] rebalance: worker {hot.index} load={hot.load():.2f} -> "
+                     f"worker {cold.index} load={cold.load():.2f}, moving {name}")
+            self.moving[name] = cold
+            hot.send({"cmd": "stop", "name": name, "sig": int(signal.SIGTERM)})
+            return True
+
+    def describe(self):
+        """pool コマンド用: [(番号, cpu, pid, PLC 名のリスト, 負荷)]"""
+        with self.lock:
+            return [
+                (w.index, w.cpu if w.pinned else None, w.proc.pid,
+                 sorted(n for n, (_, ww, _) in self.running.items() if ww is w), w.load())
+                for w in self.workers
+            ]
+
+    def close(self):
+        self.stop_event.set()
+        for w in self.workers:
+            w.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(usage="python plc_pool.py --worker N [--cpu C] [--log-dir DIR]")
+    parser.add_argument("--worker", type=int, required=True)
+    parser.add_argument("--cpu", type=int, default=None)
+    parser.add_argument("--log-dir", default="logs")
+    args = parser.parse_args()
+    worker_main(args.worker, args.cpu, args.log_dir)
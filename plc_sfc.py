@@ -0,0 +1,144 @@
+from event_trace import AREAS, AREA_CODES, parse_device
+from ladder_compiler import rung_outputs
+
+# -----------------------------
+# SFC（ステップと遷移によるシーケンス）
+# -----------------------------
+# ladder.yaml の sfc に、ステップ（実行中に動かす rung）と遷移（ステップ間の移り方）を書く。
+# 自己保持回路で書いたシーケンスはすべての工程の rung を毎スキャン評価するが、SFC では
+# 動いているステップ（active）の rung と、そこから出る遷移の条件だけを評価する。
+#
+#   sfc:
+#     - name: molding
+#       initial: idle             # 最初に動かすステップ（省略時は先頭。リストで複数も可）
+#       steps:
+#         - name: idle
+#           flag: M100            # ステップが動いている間 ON にするデバイス（省略可。M / Y）
+#         - name: press
+#           actions:              # ステップが動いている間に実行する rung
+#             - "[ TRUE ] --(Y0)"
+#             - "[ TRUE ] --(TON T0 5000)"
+#       transitions:
+#         - {from: idle, to: press, when: "X0"}
+#         - {from: press, to: idle, when: "T0"}
+#
+# 1スキャンの動作（PLC.run_chart）:
+#   1. 動いているステップの actions を、ステップが動き出した順に実行する
+#   2. 動いているステップから出る遷移の条件を評価し、成立したものをまとめて発火する
+#      - 1つのステップから出る遷移は、先に書いたものが優先（成立した時点で残りは評価しない）
+#      - from が複数の遷移（合流）は、from のステップがすべて動いているときだけ評価する
+#      - to が複数の遷移（分岐）は、to のステップをすべて動かす
+#   3. 発火した遷移の from のステップを止め（actions のコイルを OFF・TON をリセット）、to を動かす。
+#      新しく動いたステップの actions は次のスキャンから実行する
+#
+# ステップのチャートは、最上位の sfc は main タスク、tasks の sfc はそのタスクの rung の後で実行する。
+# flag を書いたステップは、起動時にその flag が ON（--warm-start で復元）ならそこから再開する。
+# 再開しないステップは、書き戻したメモリに残っているコイルを OFF・TON をリセットしてから開始する。
+
+
+class SfcStep:
+    def __init__(self, name, rungs, flag=None):
+        self.name = name
+        self.rungs = rungs
+        self.flag = flag        # (area, address) または None
+        self.active = False
+        self.outgoing = []      # このステップから出る遷移（書いた順）
+        # ステップを止めるときに条件 OFF で実行する出力（MC の RESET と同じ）
+        self.resets = [
+            (i, out)
+            for i, rung in enumerate(rungs)
+            for out in rung_outputs(rung)
+            if out.get("type") in ("COIL", "TON")
+        ]
+
+
+class SfcTransition:
+    def __init__(self, sources, targets, logic, when):
+        self.sources = sources  # SfcStep のリスト
+        self.targets = targets
+        self.logic = logic      # eval する条件式
+        self.when = when        # ladder.yaml に書いた条件（ログ用）
+
+
+class SfcChart:
+    def __init__(self, name, steps, transitions, initial):
+        self.name = name
+        self.steps = steps
+        self.transitions = transitions
+        self.initial = initial
+        self.active = None      # 動いているステップ（動き出した順）。None はまだ開始していない
+        self.fired = 0          # 発火した遷移の数（累計）
+        self.dropped = []       # リロード前に動いていて引き継がなかったステップ（次のスキャンで出力を止める）
+
+    @classmethod
+    def from_config(cls, conf, compile_rungs, compile_condition):
+        """compile_rungs(lines) は rung のリストを、compile_condition(expr) は eval する条件式を返す関数"""
+        name = conf.get("name")
+        if not name:
+            raise ValueError("sfc without name in ladder yaml")
+
+        steps = {}
+        for step_conf in conf.get("steps") or []:
+            step_name = step_conf.get("name")
+            if not step_name or step_name in steps:
+                raise ValueError(f"sfc {name}: step without name or duplicate step: {step_name}")
+            flag = None
+            if step_conf.get("flag"):
+                flag = parse_device(str(step_conf["flag"]))
+                if flag[0] not in (AREA_CODES["M"], AREA_CODES["Y"]):
+                    raise ValueError(f"sfc {name}: step flag must be M or Y device: {step_conf['flag']}")
+            steps[step_name] = SfcStep(step_name, compile_rungs(step_conf.get("actions") or []), flag)
+        if not steps:
+            raise ValueError(f"sfc {name}: no steps")
+
+        def lookup(names, key):
+            names = names if isinstance(names, list) else [names]
+            if not names:
+                raise ValueError(f"sfc {name}: no step in {key}")
+            for n in names:
+                if n not in steps:
+                    raise ValueError(f"sfc {name}: unknown step in {key}: {n}")
+            return [steps[n] for n in names]
+
+        transitions = []
+        for tr_conf in conf.get("transitions") or []:
+            if "when" not in tr_conf:
+                raise ValueError(f"sfc {name}: transition without when: {tr_conf}")
+            when = str(tr_conf["when"])
+            tr = SfcTransition(lookup(tr_conf.get("from"), "from"), lookup(tr_conf.get("to"), "to"),
+                               compile_condition(when), when)
+            for step in tr.sources:
+                step.outgoing.append(tr)
+            transitions.append(tr)
+
+        initial = lookup(conf.get("initial", next(iter(steps))), "initial")
+        return cls(name, list(steps.values()), transitions, initial)
+
+    def start(self, mem):
+        """
+        最初に動かすステップ（flag が ON のステップがあればそれらから再開する）。
+        PLC.run_chart は、ここで返さなかったステップの出力を止めてから開始する
+        """
+        resumed = [s for s in self.steps if s.flag and getattr(mem, AREAS[s.flag[0]])[s.flag[1]]]
+        return resumed or self.initial
+
+    def adopt(self, old):
+        """
+        リロード前の同じ名前のチャートから、動いているステップを名前で引き継ぐ。
+        引き継がなかった（無くなった / チャートを開始し直す）ステップは dropped に入れ、出力を止める
+        """
+        self.dropped = list(old.dropped)
+        if old.active is None:
+            return
+        steps = {s.name: s for s in self.steps}
+        active = [steps[s.name] for s in old.active if s.name in steps]
+        if active:
+            for step in active:
+                step.active = True
+            self.active = active
+        self.dropped.extend(s for s in old.active if s.name not in steps)
+        self.fired = old.fired
+
+    def stats(self):
+        names = ",".join(s.name for s in self.active) if self.active else "-"
+        return f"{self.name}: [{names}] fired={self.fired}"
@@ -0,0 +1,182 @@
+import time
+
+from event_trace import AREA_CODES, parse_device
+from ladder_compiler import rung_outputs
+
+# -----------------------------
+# 周期タスク（IEC 61131-3 のタスク）
+# -----------------------------
+# ladder.yaml の tasks で rung を名前付きのタスクに分け、タスクごとの周期で実行する。
+#
+#   tasks:
+#     - name: interlock
+#       period_ms: 10
+#       priority: 0          # 小さいほど優先（同じスキャンで周期が来たときに先に実行）
+#       rungs: [...]
+#     - name: housekeeping
+#       period_ms: 500
+#       priority: 20
+#       rungs: [...]
+#     - name: estop
+#       event: [X0, X1]      # 周期ではなく X の変化で実行するイベントタスク
+#       edge: rising         # rising / falling / both（TON は書けない）
+#       rungs: [...]
+#       sfc: [...]           # タスクの rung の後に実行する SFC のチャート（plc_sfc）
+#
+# 従来どおり最上位に書いた rungs / sfc は、cpu.scan_cycle_ms 周期の "main" タスクになる
+# （周期タスクが1つも無い場合は rungs が無くても空の main タスクを作る）。
+# PLC.tick() は周期が来ているタスクを priority の順に1つずつ最後まで実行する
+# （実行中のタスクを途中で止める横取りはしない）。周期より遅れたタスクは追いつこうとせず、
+# overruns を数えて次の周期から数え直す。
+# イベントタスクは、X を書き換えたスレッド（Modbus の書き込み / set_physical_input）が変化を積んで
+# スキャンのスレッドを起こし（PLC.interrupt）、スキャンのスレッドが次の tick の先頭で実行する。
+#
+# タスクごとの実行統計は SYS レジスタ（SYS_TASK_BASE〜）に TASK_REGS 個ずつ載せる。
+
+MAIN_TASK = "main"
+DEFAULT_PRIORITY = 10
+
+SYS_TASK_COUNT = 8      # SYS 領域でのタスク数のオフセット（10008）
+SYS_TASK_BASE = 20      # SYS 領域でのタスク統計の開始オフセット（10020〜）
+TASK_REGS = 8           # 1タスクあたりのレジスタ数
+MAX_TASKS = 16          # SYS レジスタに載せるタスクの数
+
+# タスク統計の各レジスタ（SYS_TASK_BASE + i * TASK_REGS + オフセット）
+TASK_REG_NAMES = ("period_ms", "priority", "runs", "last_us", "avg_us", "max_us", "overruns", "max_delay_us")
+
+STAT_EWMA = 0.1         # avg_us の平滑化係数
+
+EDGES = ("rising", "falling", "both")
+
+
+def has_main_task(data):
+    """ladder.yaml に main タスクを作るか（最上位の rungs / sfc があるか、周期タスクが無い場合）"""
+    return bool(data.get("rungs") or data.get("sfc")) or not any("event" not in conf for conf in data.get("tasks") or [])
+
+
+def task_names(data):
+    """ladder.yaml の内容からタスク名を SYS レジスタの順に返す（orchestrator の表示用）"""
+    names = []
+    if has_main_task(data):
+        names.append(MAIN_TASK)
+    names.extend(conf.get("name", f"task{i}") for i, conf in enumerate(data.get("tasks") or []))
+    return names
+
+
+def reg16(value):
+    return max(0, min(int(value), 0xFFFF))
+
+
+class LadderTask:
+    def __init__(self, name, period, priority, rungs, events=(), edge="both", charts=()):
+        self.name = name
+        self.period = period          # [s]（None なら PLC の scan_cycle。イベントタスクは None のまま）
+        self.priority = priority
+        self.rungs = rungs
+        self.charts = list(charts)    # rung の後に実行する SFC のチャート（plc_sfc.SfcChart）
+        self.events = tuple(events)   # イベントタスクを起動する X の番号
+        self.edge = edge
+
+        self.next_due = None          # 次に実行する時刻（time.monotonic。None なら次のスキャンで実行）
+        self.runs = 0
+        self.last_s = 0.0             # 直近の実行時間
+        self.avg_s = None
+        self.max_s = 0.0
+        self.overruns = 0             # 次の周期までに実行し終わらなかった回数
+        self.max_delay_s = 0.0        # 予定時刻（イベントタスクは X の変化）から実行開始までの遅れの最大値
+
+    @classmethod
+    def from_config(cls, conf, rungs, charts=()):
+        name = conf.get("name")
+        if not name:
+            raise ValueError("task without name in ladder yaml")
+        if "event" in conf:
+            devices = conf["event"] if isinstance(conf["event"], list) else [conf["event"]]
+            events = []
+            for dev in devices:
+                area, address = parse_device(str(dev))
+                if area != AREA_CODES["X"]:
+                    raise ValueError(f"task {name}: event must be X devices: {dev}")
+                events.append(address)
+            edge = conf.get("edge", "both")
+            if edge not in EDGES:
+                raise ValueError(f"task {name}: edge must be one of {', '.join(EDGES)}")
+            # イベントタスクには周期が無く、TON が積算する時間を決められない
+            steps = [step.rungs for chart in charts for step in chart.steps]
+            for rung in [r for rs in [rungs] + steps for r in rs]:
+                if any(out.get("type") == "TON" for out in rung_outputs(rung)):
+                    raise ValueError(f"task {name}: TON cannot be used in an event task")
+            return cls(name, None, conf.get("priority", DEFAULT_PRIORITY), rungs, events=events, edge=edge,
+                       charts=charts)
+
+        period_ms = conf.get("period_ms")
+        if not isinstance(period_ms, (int, float)) or period_ms <= 0:
+            raise ValueError(f"task {name}: period_ms must be a positive number")
+        return cls(name, period_ms / 1000, conf.get("priority", DEFAULT_PRIORITY), rungs, charts=charts)
+
+    def adopt(self, old):
+        """リロード前の同じ名前のタスクから、周期の位相と統計、SFC の動いているステップを引き継ぐ"""
+        self.next_due = old.next_due
+        self.runs = old.runs
+        self.last_s = old.last_s
+        self.avg_s = old.avg_s
+        self.max_s = old.max_s
+        self.overruns = old.overruns
+        self.max_delay_s = old.max_delay_s
+        old_charts = {c.name: c for c in old.charts}
+        for chart in self.charts:
+            if chart.name in old_charts:
+                chart.adopt(old_charts[chart.name])
+
+    def triggered_by(self, value):
+        """X の変化（value は新しい値）でこのイベントタスクを実行するか"""
+        return self.edge == "both" or (self.edge == "rising") == bool(value)
+
+    def record(self, due, start, end):
+        """1回の実行を記録し、次の予定時刻を決める（イベントタスクでは due は X が変化した時刻）"""
+        elapsed = end - start
+        self.runs += 1
+        self.last_s = elapsed
+        self.avg_s = elapsed if self.avg_s is None else self.avg_s + (elapsed - self.avg_s) * STAT_EWMA
+        if elapsed > self.max_s:
+            self.max_s = elapsed
+        if start - due > self.max_delay_s:
+            self.max_delay_s = start - due
+        if self.events:
+            return
+
+        self.next_due = due + self.period
+        if self.next_due < end:
+            self.overruns += 1
+            self.next_due = end
+
+    def registers(self):
+        return [
+            reg16((self.period or 0) * 1000),
+            reg16(self.priority),
+            self.runs & 0xFFFF,
+            reg16(self.last_s * 1e6),
+            reg16((self.avg_s or 0.0) * 1e6),
+            reg16(self.max_s * 1e6),
+            self.overruns & 0xFFFF,
+            reg16(self.max_delay_s * 1e6),
+        ]
+
+    def stats(self):
+        if self.events:
+            return f"{self.name} (event): runs={self.runs} avg={(self.avg_s or 0.0) * 1000:.3f}ms " \
+                   f"max={self.max_s * 1000:.3f}ms max_delay={self.max_delay_s * 1000:.3f}ms"
+        return f"{self.name}: runs={self.runs} avg={(self.avg_s or 0.0) * 1000:.3f}ms " \
+               f"max={self.max_s * 1000:.3f}ms overruns={self.overruns} max_delay={self.max_delay_s * 1000:.3f}ms"
+
+
+def due_tasks(tasks, now):
+    """tasks（priority の順）のうち now までに周期が来ているもの"""
+    return [t for t in tasks if t.next_due is None or t.next_due <= now]
+
+
+def next_due(tasks):
+    """次にいずれかのタスクの周期が来る時刻"""
+    if any(t.next_due is None for t in tasks):
+        return time.monotonic()
+    return min(t.next_due for t in tasks)
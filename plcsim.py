@@ -1,43 +1,23 @@
+import argparse
 import yaml
 import time
-from datetime import datetime
 import threading
 import sys
-import os
 import re
-
 from collections import deque
-from modbus_server import ModbusBridge
-from ladder_compiler import LadderCompiler
-
-# -----------------------------
-# Logger
-# -----------------------------
-class Logger:
-    def __init__(self, name, log_dir=None):
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{name}_{ts}.log"
-
-        if log_dir:
-            os.makedirs(log_dir, exist_ok=True)
-            self.path = os.path.join(log_dir, filename)
-        else:
-            self.path = filename
-
-        self.fp = open(self.path, "a", encoding="utf-8")
-        self.log(f"log file opened: {self.path}")
-
-    def log(self, msg):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        line = f"{now} | {msg}"
-        print(line, flush=True)
-        self.fp.write(line + "\n")
-        self.fp.flush()
-
-    def close(self):
-        self.log("log file closed")
-        self.fp.close()
 
+from modbus_server import ModbusBridge
+from ladder_compiler import get_compiler, link_jumps
+from simlog import Logger, ERROR
+from event_trace import (
+    EventRing, EventTrace, EV_COIL, EV_TIMER, EV_RESET, EV_PHYSICAL, EV_CALC, EV_STEP, AREAS, AREA_CODES,
+    target_device,
+)
+from plc_history import PlcHistory, IMAGE_AREAS
+from checkpoint import Checkpoint
+from ladder_reload import LadderReloader
+from plc_sfc import SfcChart
+from plc_tasks import LadderTask, MAIN_TASK, DEFAULT_PRIORITY, due_tasks, has_main_task, next_due
 
 # -----------------------------
 # システムメモリ（ladder 非公開）
@@ -68,6 +48,29 @@ class Memory:
 
         self.sys = SystemMemory()
 
+    def snapshot(self):
+        """デバイスとタイマー / カウンターの状態を JSON にできる dict で返す（別プロセスへの移動用）"""
+        return {
+            "X": list(self.X), "Y": list(self.Y), "M": list(self.M), "D": list(self.D),
+            # T / C は状態 dict（キーは "self.mem.T[1]"）と接点の値（キーは 1）が混在するため、
+            # キーの型を保つよう [キー, 値] のリストにする
+            "T": [[k, dict(v) if isinstance(v, dict) else v] for k, v in self.T.items()],
+            "C": [[k, dict(v) if isinstance(v, dict) else v] for k, v in self.C.items()],
+            "heartbeat": self.sys.heartbeat,
+            "scan_count": self.sys.scan_count,
+        }
+
+    def restore(self, snap):
+        """snapshot() の内容を書き戻す（サイズが違う場合は重なる範囲だけ）"""
+        for dev in ("X", "Y", "M", "D"):
+            area = getattr(self, dev)
+            values = snap.get(dev, [])[:len(area)]
+            area[:len(values)] = values
+        self.T = {k: dict(v) if isinstance(v, dict) else v for k, v in snap.get("T", [])}
+        self.C = {k: dict(v) if isinstance(v, dict) else v for k, v in snap.get("C", [])}
+        self.sys.heartbeat = snap.get("heartbeat", 0)
+        self.sys.scan_count = snap.get("scan_count", 0)
+
 
 # -----------------------------
 # 直感ラダー文字列 parser：旧正規表現版
@@ -156,15 +159,42 @@ def load_ladder_yaml(filename, compiler):
     if data.get("kind") != "ladder":
         raise ValueError("invalid ladder yaml")
 
+    # 最上位の rungs / sfc は cpu.scan_cycle_ms 周期の main タスク、tasks は周期またはイベントを指定したタスク（plc_tasks）
+    tasks = []
+    if has_main_task(data):
+        tasks.append(LadderTask(MAIN_TASK, None, DEFAULT_PRIORITY, compile_rungs(data.get("rungs") or [], compiler),
+                                charts=compile_charts(data.get("sfc"), compiler)))
+    for conf in data.get("tasks") or []:
+        tasks.append(LadderTask.from_config(conf, compile_rungs(conf.get("rungs") or [], compiler),
+                                            charts=compile_charts(conf.get("sfc"), compiler)))
+    names = [t.name for t in tasks]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate task name in ladder yaml: {names}")
+    return tasks
+
+
+def compile_rungs(lines, compiler):
     rungs = []
-    for line in data.get("rungs", []):
+    for line in lines:
         rung = compiler.compile_line(line)
         if rung:
             rungs.append(rung)
         else:
             # ラダーパースに失敗した行をコンソールに出力して気づけるようにする
             print(f"[ERROR] Failed to parse ladder line: {line}")
-    return rungs
+    # MC / CJ の飛び先を rung の番号に解決しておく（スキャンでは番号で飛ぶだけにする）
+    return link_jumps(rungs)
+
+
+def compile_charts(confs, compiler):
+    charts = [
+        SfcChart.from_config(conf, lambda lines: compile_rungs(lines, compiler), compiler.compile_condition)
+        for conf in confs or []
+    ]
+    names = [c.name for c in charts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate sfc name in ladder yaml: {names}")
+    return charts
 
 
 # -----------------------------
@@ -180,11 +210,15 @@ def load_plc_yaml(filename):
     return plc_conf
 
 
+# ブロック命令（ladder_compiler の block_*）
+BLOCK_INSTRUCTIONS = ("BMOV", "FMOV", "BCMP", "SUM", "AVG", "MIN", "MAX")
+
+
 # -----------------------------
 # PLC
 # -----------------------------
 class PLC:
-    def __init__(self, plc_conf, ladder_conf):
+    def __init__(self, plc_conf, ladder_conf, logger=None, warm_start=False, checkpoint=False, ladder_path=None):
         mem_conf = plc_conf["memory"]
         self.mem = Memory(
             mem_conf["X"],
@@ -193,25 +227,91 @@ class PLC:
             mem_conf["D"]
         )
 
-        self.ladder = ladder_conf
         self.scan_cycle = plc_conf["cpu"]["scan_cycle_ms"] / 1000
+        # イベントタスクを起動する X の変化 (X の番号, 値, 変化した時刻)。interrupt が積み、スキャンのスレッドが
+        # tick の先頭で取り出して実行する。notify はスキャンのスレッドを起こす関数（plant_runner は差し替える）
+        self.pending_events = deque()
+        self.wakeup = threading.Event()
+        self.notify = self.wakeup.set
+        self.set_tasks(ladder_conf)
+        self.current_task = self.tasks[0]
         self.power = plc_conf["power"]
 
         name = plc_conf.get("name", "plc")
-        self.logger = Logger(f"plc_{name}", plc_conf.get("log_dir"))
+        self.logger = logger or Logger.from_config(f"plc_{name}", plc_conf)
         self.log = self.logger.log
 
+        # デバイス変化はリングバッファ（EventRing）に記録し、メモリ内の履歴（plc_history）と
+        # バイナリ記録（event_trace）で共有する。event_trace が有効な場合、変化ごとのテキストログは
+        # event_trace.text_log: true のときだけ出す
+        self.events = EventRing(max(PlcHistory.transitions(plc_conf), EventTrace.capacity(plc_conf)))
+        self.history = PlcHistory.from_config(plc_conf, self.mem, self.events)
+        trace_conf = plc_conf.get("event_trace")
+        self.trace = EventTrace.from_config(f"plc_{name}", plc_conf, self.events)
+        self.text_events = self.trace is None or (isinstance(trace_conf, dict) and trace_conf.get("text_log", False))
+
         self.log("PLC initialized")
         self.log(f"scan_cycle={self.scan_cycle}s")
-
-        self.last_snapshot = None
+        if len(self.tasks) > 1 or self.tasks[0].name != MAIN_TASK:
+            for task in self.task_order:
+                trigger = f"event={','.join(f'X{a}' for a in task.events)} edge={task.edge}" if task.events \
+                    else f"period={task.period * 1000:g}ms"
+                self.log(f"task {task.name}: {trigger} priority={task.priority} rungs={len(task.rungs)}")
+        if self.trace:
+            self.log(f"event trace: {self.trace.path} (capacity={self.events.capacity})")
+
+        # メモリのチェックポイント（plc.yaml の checkpoint か --checkpoint / --warm-start で有効）。
+        # warm_start なら前回の内容を書き戻してから書き始める
+        self.checkpoint = Checkpoint.from_config(f"plc_{name}", plc_conf, self.mem, checkpoint or warm_start)
+        if self.checkpoint:
+            if warm_start:
+                self.warm_start()
+            self.checkpoint.start()
+            self.log(f"checkpoint: {self.checkpoint.path} (every {self.checkpoint.every_scans} scans)")
+
+        # ラダーのオンライン変更（ladder.yaml のパスが分かる場合だけ）
+        self.reloader = None
+        if ladder_path:
+            self.reloader = LadderReloader.from_config(
+                plc_conf, ladder_path, self.mem, lambda path: load_ladder_yaml(path, get_compiler()), self.log)
+            if self.reloader.watch_interval:
+                self.log(f"ladder reload: watching {ladder_path} (every {self.reloader.watch_interval}s)")
         self.last_alive = time.time()
 
-    def scan(self):
-        self.mem.sys.heartbeat += 1
-        self.mem.sys.scan_count += 1
-
-        for idx, rung in enumerate(self.ladder):
+    def set_tasks(self, tasks):
+        """
+        タスク（plc_tasks.LadderTask のリスト）を設定する。周期の無い main タスクは scan_cycle で動かす。
+        リロードでは、同じ名前のタスクが周期の位相と統計を引き継ぐ
+        """
+        old = {t.name: t for t in getattr(self, "tasks", [])}
+        for task in tasks:
+            if task.period is None and not task.events:
+                task.period = self.scan_cycle
+            if task.name in old:
+                task.adopt(old[task.name])
+        self.tasks = tasks  # ladder.yaml の順（SYS レジスタの順）
+        cyclic = [t for t in tasks if not t.events]
+        self.task_order = sorted(cyclic, key=lambda t: t.priority)
+        # X の番号 -> その変化で実行するイベントタスク（priority の順）
+        event_tasks = {}
+        for task in sorted(tasks, key=lambda t: t.priority):
+            for address in task.events:
+                event_tasks.setdefault(address, []).append(task)
+        self.event_tasks = event_tasks
+        # 最も短い周期（plant_runner の負荷の見積もりに使う）
+        self.tick_period = min(t.period for t in cyclic)
+
+    def scan(self, task):
+        """タスク1つの rung を上から実行し、続けてタスクの SFC のチャートを実行する"""
+        self.current_task = task
+        self.run_rungs(task.rungs)
+        for chart in task.charts:
+            self.run_chart(chart)
+
+    def run_rungs(self, rungs):
+        idx = 0
+        while idx < len(rungs):
+            rung = rungs[idx]
             # 1. END命令の処理
             if rung.get("type") == "END":
                 break
@@ -221,7 +321,13 @@ class PLC:
             logic_str = rung.get("logic")
             condition_met = eval(logic_str) if logic_str else True
 
-            # 3. 複数出力の実行
+            # 3. MC / CJ は区間を飛ばすか決める（飛ばす場合は区間内の rung を評価しない）
+            jump = rung.get("jump")
+            if jump is not None:
+                idx = jump["end"] + 1 if self.execute_jump(jump, condition_met) else idx + 1
+                continue
+
+            # 4. 複数出力の実行
             if "outputs" in rung:
                 outputs = rung["outputs"]
                 # 単一の辞書で届いた場合でもループ回るようにリスト化する
@@ -230,6 +336,92 @@ class PLC:
 
                 for out in outputs:
                     self.execute_output(out, condition_met, idx)
+            idx += 1
+
+    # -----------------------------
+    # SFC（plc_sfc）
+    # -----------------------------
+    def run_chart(self, chart):
+        """動いているステップの actions と、そこから出る遷移だけを評価する"""
+        # リロードで無くなったステップが動いていた場合は、その出力を止める
+        while chart.dropped:
+            self.clear_step(chart.dropped.pop())
+        if chart.active is None:
+            chart.active = []
+            start = chart.start(self.mem)
+            # warm start / プール移動で書き戻したメモリには、前回動いていたステップのコイルが ON のまま
+            # 残っていることがある。開始しないステップは止めた状態にしてから始める
+            for step in chart.steps:
+                if step not in start:
+                    self.clear_step(step)
+            for step in start:
+                self.set_step(chart, step, True)
+
+        for step in chart.active:
+            self.run_rungs(step.rungs)
+
+        fired = []
+        for step in chart.active:
+            for tr in step.outgoing:
+                if tr in fired:
+                    continue
+                if all(s.active for s in tr.sources) and eval(tr.logic):
+                    fired.append(tr)
+                    break
+
+        for tr in fired:
+            # 同じスキャンで先に発火した遷移が from のステップを止めていれば発火しない
+            if not all(s.active for s in tr.sources):
+                continue
+            for step in tr.sources:
+                self.set_step(chart, step, False)
+            for step in tr.targets:
+                self.set_step(chart, step, True)
+            chart.fired += 1
+            if self.text_events:
+                self.log(f"[SFC] {chart.name}: {','.join(s.name for s in tr.sources)} -> "
+                         f"{','.join(s.name for s in tr.targets)} ({tr.when})")
+
+    def set_step(self, chart, step, on):
+        if step.active == on:
+            return
+        step.active = on
+        if on:
+            chart.active.append(step)
+        else:
+            chart.active.remove(step)
+            # 止めたステップのコイルを OFF・TON をリセットする（D などはそのまま）
+            for rung_idx, out in step.resets:
+                self.execute_output(out, False, rung_idx)
+        if step.flag:
+            area, address = step.flag
+            getattr(self.mem, AREAS[area])[address] = on
+            self.events.record(self.mem.sys.scan_count, EV_STEP, area, address, on)
+
+    def clear_step(self, step):
+        """動いていないステップの出力を、止めたときと同じ状態にする（コイル OFF・TON リセット・flag OFF）"""
+        for rung_idx, out in step.resets:
+            self.execute_output(out, False, rung_idx)
+        if step.flag:
+            area, address = step.flag
+            mem = getattr(self.mem, AREAS[area])
+            if mem[address]:
+                mem[address] = False
+                self.events.record(self.mem.sys.scan_count, EV_STEP, area, address, False)
+
+    def execute_jump(self, jump, en):
+        """MC / CJ の区間を飛ばすなら True（MC は条件 OFF、CJ は条件 ON のとき飛ばす）"""
+        skip = not en if jump["type"] == "MC" else bool(en)
+        if not skip:
+            jump["active"] = True
+            return False
+        # reset: 区間の出力を、飛ばし始めたスキャンで1回だけ条件 OFF として実行する
+        # （飛ばしている間は区間内の出力はどこからも書かれないため、毎スキャン繰り返す必要はない）
+        if jump["active"] is not False:
+            for rung_idx, out in jump["resets"]:
+                self.execute_output(out, False, rung_idx)
+            jump["active"] = False
+        return True
 
     def execute_output(self, out, en, rung_idx):
         out_type = out["type"]
@@ -241,7 +433,9 @@ class PLC:
             new_val = bool(en)
             if old_val != new_val:
                 exec(f"{target} = {new_val}")
-                self.log(f"[LADDER] rung# {rung_idx}: {target} = {new_val}")
+                self.events.record_target(self.mem.sys.scan_count, EV_COIL, target, new_val)
+                if self.text_events:
+                    self.log(f"[LADDER] rung# {rung_idx}: {target} = {new_val}")
 
         # --- CALC命令 ---
         elif out_type == "CALC":
@@ -249,11 +443,22 @@ class PLC:
                 formula = out.get("formula")
                 try:
                     # formulaは"self.mem.D[0] = self.mem.D[0] + 1"という文字列など
-                    exec(formula)
+                    # 代入先のデバイスは初回に調べて rung に覚えておき、値が変わったときだけ記録する
+                    dest = out.get("dest")
+                    if dest is None:
+                        dest = out["dest"] = self.calc_dest(formula)
+                    if dest:
+                        area = getattr(self.mem, AREAS[dest[0]])
+                        old_val = area[dest[1]]
+                        exec(formula)
+                        if area[dest[1]] != old_val:
+                            self.events.record(self.mem.sys.scan_count, EV_CALC, dest[0], dest[1], area[dest[1]])
+                    else:
+                        exec(formula)
                     # 毎スキャンログを出力すると膨大になるため、デバック時以外は出力を控えめに
                     # self.log(f"[CALC] {formula}")
                 except Exception as e:
-                    self.log(f"[ERROR] CALC failed: {formula} -> {e}")
+                    self.log(f"[ERROR] CALC failed: {formula} -> {e}", level=ERROR)
 
         elif out_type == "TON":
             preset = out["preset"]
@@ -262,7 +467,7 @@ class PLC:
 
             prev_on = st["on"]
             if en:
-                st["acc"] += (self.scan_cycle * 1000)
+                st["acc"] += ((self.current_task.period or 0) * 1000)
                 if st["acc"] >= preset:
                     st["on"] = True
             else:
@@ -273,7 +478,13 @@ class PLC:
             exec(f"{target} = {st['on']}")
 
             if prev_on != st["on"]:
-                self.log(f"[TON] {target} turned {'ON' if st['on'] else 'OFF'} (acc={st['acc']})")
+                self.events.record_target(self.mem.sys.scan_count, EV_TIMER, target, st["on"])
+                if self.text_events:
+                    self.log(f"[TON] {target} turned {'ON' if st['on'] else 'OFF'} (acc={st['acc']})")
+
+        elif out_type in BLOCK_INSTRUCTIONS:
+            if en:
+                self.execute_block(out, out_type)
 
         elif out_type == "RES":
             if en:
@@ -285,7 +496,83 @@ class PLC:
                 
                 # 物理メモリの値もFalse(0)にリセット
                 exec(f"{target} = False")
-                self.log(f"[RES] {target} reset")
+                self.events.record_target(self.mem.sys.scan_count, EV_RESET, target, False)
+                if self.text_events:
+                    self.log(f"[RES] {target} reset")
+
+    def execute_block(self, out, out_type):
+        """
+        ブロック命令をリストのスライスでまとめて実行する（1語ずつ eval / exec しない）。
+        変化した点だけを EV_CALC として記録する
+        """
+        n = out["n"]
+        dst_area, dst = out["dst"]
+        dest = getattr(self.mem, dst_area)
+        try:
+            if out_type in ("BMOV", "FMOV"):
+                src = out["src"]
+                if out_type == "FMOV":
+                    value = src if isinstance(src, int) else getattr(self.mem, src[0])[src[1]]
+                    new = [value] * n
+                else:
+                    new = getattr(self.mem, src[0])[src[1]:src[1] + n]
+                    if len(new) != n:
+                        raise IndexError(f"source {src[0]}{src[1]}+{n} is out of range")
+                if dst + n > len(dest):
+                    raise IndexError(f"destination {dst_area}{dst}+{n} is out of range")
+                # ビットデバイスへは bool、D へは int で書く
+                new = list(map(bool, new)) if dst_area != "D" else list(map(int, new))
+                old = dest[dst:dst + n]
+                if old != new:
+                    dest[dst:dst + n] = new
+                    area = AREA_CODES[dst_area]
+                    scan = self.mem.sys.scan_count
+                    for i, (a, b) in enumerate(zip(old, new)):
+                        if a != b:
+                            self.events.record(scan, EV_CALC, area, dst + i, b)
+                return
+
+            src_area, src = out["src"]
+            block = getattr(self.mem, src_area)[src:src + n]
+            if len(block) != n:
+                raise IndexError(f"source {src_area}{src}+{n} is out of range")
+            if out_type == "BCMP":
+                src2_area, src2 = out["src2"]
+                other = getattr(self.mem, src2_area)[src2:src2 + n]
+                if len(other) != n:
+                    raise IndexError(f"source {src2_area}{src2}+{n} is out of range")
+                value = block == other
+            elif out_type == "SUM":
+                value = sum(block)
+            elif out_type == "AVG":
+                value = int(sum(block) / n)
+            elif out_type == "MIN":
+                value = min(block)
+            else:
+                value = max(block)
+            value = bool(value) if dst_area != "D" else int(value)
+            if dest[dst] != value:
+                dest[dst] = value
+                self.events.record(self.mem.sys.scan_count, EV_CALC, AREA_CODES[dst_area], dst, value)
+        except IndexError as e:
+            self.log(f"[ERROR] {out_type} failed: {e}", level=ERROR)
+
+    def warm_start(self):
+        t0 = time.perf_counter()
+        snap = self.checkpoint.load()
+        if snap is None:
+            self.log(f"warm start: no valid checkpoint in {self.checkpoint.path}; cold start")
+            return
+        self.mem.restore(snap)
+        self.log(f"warm start: restored scan_count={self.mem.sys.scan_count} "
+                 f"(checkpoint age {time.time() - snap['time']:.3f}s, {(time.perf_counter() - t0) * 1000:.1f}ms)")
+
+    def calc_dest(self, formula):
+        """CALC の代入先 (area, address)。X / Y / M / D の範囲内でなければ ()"""
+        dest = target_device(formula.split("=", 1)[0])
+        if dest and AREAS[dest[0]] in IMAGE_AREAS and dest[1] < len(getattr(self.mem, AREAS[dest[0]])):
+            return dest
+        return ()
 
     def get_bit(self, addr):
         dev = addr[0]
@@ -309,20 +596,97 @@ class PLC:
     def run(self):
         self.log("PLC START")
         # デバッグ用：パース済みラダーの表示
-        for idx, rung in enumerate(self.ladder):
-            print(f"Parsed {idx}: {rung}")
+        for task in self.tasks:
+            for idx, rung in enumerate(task.rungs):
+                print(f"Parsed {task.name} {idx}: {rung}")
 
         try:
             while self.power:
-                self.scan()
-                if time.time() - self.last_alive > 5:
-                    self.log(f"PLC alive | hb={self.mem.sys.heartbeat} uptime={self.mem.sys.uptime_sec}s")
-                    self.last_alive = time.time()
-                time.sleep(self.scan_cycle)
+                self.tick()
+                # 次にいずれかのタスクの周期が来るまで待つ（イベントタスクの X が変化したらすぐ起きる）
+                delay = self.next_due() - time.monotonic()
+                if delay > 0:
+                    self.wakeup.wait(delay)
+                self.wakeup.clear()
         finally:
             self.log("PLC STOP")
+            self.close_files()
             self.logger.close()
 
+    def close_files(self):
+        """ladder.yaml の監視を止め、イベントトレースとチェックポイントを閉じる（run と plant_runner の両方から呼ぶ）"""
+        if self.reloader:
+            self.reloader.close()
+        if self.trace:
+            self.trace.close()
+            self.log(f"event trace closed: {self.events.head} events (dropped={self.trace.dropped})")
+        if self.checkpoint:
+            self.checkpoint.close()
+
+    def next_due(self):
+        """次にいずれかのタスクを実行する時刻（time.monotonic）"""
+        return next_due(self.task_order)
+
+    def tick(self):
+        """
+        周期が来ているタスクを priority の順に実行する（run と plant_runner の両方から呼ぶ）。
+        1つでも実行したら1スキャンと数え、True を返す
+        """
+        # 新しいプログラムのコンパイルが終わっていれば、スキャンの切れ目で差し替える
+        if self.reloader and self.reloader.pending is not None:
+            self.reloader.install(self)
+        if self.pending_events:
+            self.run_events()
+        now = time.monotonic()
+        due = due_tasks(self.task_order, now)
+        if not due:
+            return False
+
+        self.mem.sys.heartbeat += 1
+        self.mem.sys.scan_count += 1
+        for task in due:
+            start = time.monotonic()
+            self.scan(task)
+            task.record(now if task.next_due is None else task.next_due, start, time.monotonic())
+        if self.history:
+            self.history.on_scan()
+        if self.checkpoint:
+            self.checkpoint.on_scan()
+        if time.time() - self.last_alive > 5:
+            self.log(f"PLC alive | hb={self.mem.sys.heartbeat} uptime={self.mem.sys.uptime_sec}s")
+            if len(self.tasks) > 1:
+                for task in self.tasks:
+                    self.log(f"  task {task.stats()}")
+            for task in self.tasks:
+                for chart in task.charts:
+                    self.log(f"  sfc {chart.stats()}")
+            self.last_alive = time.time()
+        return True
+
+    def interrupt(self, addr, value):
+        """
+        X[addr] が value に変化したときに呼ぶ（Modbus の書き込み / set_physical_input）。
+        その X を待つイベントタスクがあれば変化を積んでスキャンのスレッドを起こすだけで、
+        呼び出したスレッド（Modbus のイベントループなど）ではタスクを実行せず、待たせない
+        """
+        if addr not in self.event_tasks:
+            return
+        self.pending_events.append((addr, value, time.monotonic()))
+        self.notify()
+
+    def run_events(self):
+        """interrupt で積んだ X の変化の順に、イベントタスクを実行する（スキャンのスレッドの tick から呼ぶ）"""
+        while self.pending_events:
+            addr, value, changed = self.pending_events.popleft()
+            # 取り出すまでに X が戻っていても（短いパルス）、変化した時点の値でタスクを実行する。
+            # その後の変化も積んであるため、最後まで取り出すと X は最新の値に戻る
+            self.mem.X[addr] = value
+            for task in self.event_tasks.get(addr, ()):
+                if task.triggered_by(value):
+                    start = time.monotonic()
+                    self.scan(task)
+                    task.record(changed, start, time.monotonic())
+
     # PLCの物理入力の模擬(devicesimからのXへの入力対応)
     def set_physical_input(self, addr: int, value: bool):
         """
@@ -331,25 +695,41 @@ class PLC:
         """
         if 0 <= addr < len(self.mem.X):
             self.mem.X[addr] = value
-            self.log(f"[PHYSICAL_INPUT] X{addr} set to {value}")
+            self.events.record(self.mem.sys.scan_count, EV_PHYSICAL, AREA_CODES["X"], addr, value)
+            if self.text_events:
+                self.log(f"[PHYSICAL_INPUT] X{addr} set to {value}")
+            self.interrupt(addr, value)
 
 # -----------------------------
 # 起動
 # -----------------------------
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python plcsim.py plc.yaml ladder.yaml")
-        sys.exit(1)
-
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="PLC simulator")
+    parser.add_argument("plc_yaml")
+    parser.add_argument("ladder_yaml")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="plc.yaml に checkpoint が無くてもチェックポイントを書く")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="チェックポイントからメモリを書き戻して起動する（--checkpoint を含む）")
+    return parser.parse_args(argv)
+
+
+def create_plc(plc_yaml, ladder_yaml, logger=None, warm_start=False, checkpoint=False):
+    """yaml を読み込んで PLC を作る。戻り値: (plc, Modbus ポート)"""
     # 1. コンパイラを先に作成
-    compiler = LadderCompiler()
+    compiler = get_compiler()
 
-    plc_conf = load_plc_yaml(sys.argv[1])
-    ladder_conf = load_ladder_yaml(sys.argv[2], compiler)
+    plc_conf = load_plc_yaml(plc_yaml)
+    ladder_conf = load_ladder_yaml(ladder_yaml, compiler)
 
-    plc = PLC(plc_conf, ladder_conf)
+    plc = PLC(plc_conf, ladder_conf, logger=logger, warm_start=warm_start, checkpoint=checkpoint,
+              ladder_path=ladder_yaml)
+    return plc, plc_conf["modbus"]["port"]
 
-    port = plc_conf["modbus"]["port"]
+
+def main():
+    args = parse_args(sys.argv[1:])
+    plc, port = create_plc(args.plc_yaml, args.ladder_yaml, warm_start=args.warm_start, checkpoint=args.checkpoint)
     plc.log(f"Starting Modbus server on port {port}")
 
     modbus = ModbusBridge(plc, port)
@@ -0,0 +1,222 @@
+import math
+import time
+
+import numpy as np
+
+from modbus_pipeline import merge_ranges, MAX_READ_GAP, MAX_READ_COUNT, MAX_WRITE_COUNT
+
+# -----------------------------
+# 連続プロセスモデル（devicesim の type: model）
+# -----------------------------
+# 1デバイス分の model 信号をまとめて NumPy 配列で保持し、
+# 1周期ごとに全信号を一括で計算する（信号ごとの Python ループを持たない）。
+
+MODEL_KINDS = ("lag", "ramp", "integrator", "sine", "random_walk")
+
+KIND_LAG, KIND_RAMP, KIND_INTEGRATOR, KIND_SINE, KIND_RANDOM_WALK = range(len(MODEL_KINDS))
+
+# 入力元の種別（PLC の出力側を読む）
+INPUT_NONE, INPUT_COIL, INPUT_HR = 0, 1, 2
+
+REG_MAX = 0xFFFF
+
+
+def contiguous_runs(addrs, max_count=MAX_WRITE_COUNT['reg']):
+    """ソート済みアドレス配列を連続区間 [(start, count), ...] に分割する（1区間は max_count 以下）"""
+    if len(addrs) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(addrs) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(addrs)]))
+    runs = []
+    for s, e in zip(starts, ends):
+        for c in range(s, e, max_count):
+            runs.append((int(addrs[c]), int(min(max_count, e - c))))
+    return runs
+
+
+class ProcessModelBank:
+    """
+    type: model の信号群。
+
+    signals:
+      tank_level:
+        type: model
+        model: integrator          # lag / ramp / integrator / sine / random_walk
+        address: 0                 # 書き込み先 D0
+        input: {type: coil, address: 0}   # 入力: Y0 (coil) または D (hr)
+        gain: 5.0                  # 入力1あたりの変化量 [/s]
+        bias: -1.0                 # 入力に関係なく加わる変化量 [/s]
+        initial: 500
+        min: 0
+        max: 1000
+    """
+
+    def __init__(self, signals, log, seed=None):
+        self.log = log
+        self.names = list(signals.keys())
+        n = len(self.names)
+
+        self.kind = np.empty(n, dtype=np.int8)
+        self.address = np.empty(n, dtype=np.int64)
+        self.src_type = np.zeros(n, dtype=np.int8)
+        self.src_addr = np.zeros(n, dtype=np.int64)
+
+        self.gain = np.ones(n)
+        self.bias = np.zeros(n)
+        self.setpoint = np.ones(n)
+        self.tau = np.ones(n)
+        self.rate = np.zeros(n)
+        self.amplitude = np.zeros(n)
+        self.period = np.ones(n)
+        self.phase = np.zeros(n)
+        self.offset = np.zeros(n)
+        self.walk_step = np.zeros(n)
+        self.noise = np.zeros(n)
+        self.lo = np.zeros(n)
+        self.hi = np.full(n, float(REG_MAX))
+        self.state = np.zeros(n)
+
+        for i, name in enumerate(self.names):
+            sig = signals[name]
+            kind = sig.get("model")
+            if kind not in MODEL_KINDS:
+                raise ValueError(f"unknown model for signal '{name}': {kind}")
+            self.kind[i] = MODEL_KINDS.index(kind)
+            self.address[i] = sig["address"]
+
+            src = sig.get("input")
+            if src:
+                if src.get("type") == "coil":
+                    self.src_type[i] = INPUT_COIL
+                elif src.get("type") == "hr":
+                    self.src_type[i] = INPUT_HR
+                else:
+                    raise ValueError(f"model input type must be 'coil' or 'hr': {name}")
+                self.src_addr[i] = src["address"]
+
+            self.gain[i] = sig.get("gain", 1.0)
+            self.bias[i] = sig.get("bias", 0.0)
+            self.setpoint[i] = sig.get("setpoint", 1.0)
+            self.tau[i] = max(sig.get("tau_ms", 1000), 1) / 1000
+            self.rate[i] = sig.get("rate", 0.0)
+            self.amplitude[i] = sig.get("amplitude", 0.0)
+            self.period[i] = max(sig.get("period_ms", 1000), 1) / 1000
+            self.phase[i] = sig.get("phase", 0.0)
+            self.offset[i] = sig.get("offset", 0.0)
+            self.walk_step[i] = sig.get("step", 1.0)
+            self.noise[i] = sig.get("noise", 0.0)
+            self.lo[i] = sig.get("min", 0)
+            self.hi[i] = sig.get("max", REG_MAX)
+            self.state[i] = sig.get("initial", self.lo[i])
+
+        # 書き込みはアドレス順にまとめて FC16 で送るため、並び順を先に決めておく
+        self.write_order = np.argsort(self.address, kind="stable")
+        self.last_written = np.full(n, -1, dtype=np.int64)
+
+        # 入力は coil / hr それぞれ範囲読み出しにまとめて取得する（1回の要求の上限を超える分は分ける）
+        self.coil_mask = self.src_type == INPUT_COIL
+        self.hr_mask = self.src_type == INPUT_HR
+        self.coil_ranges = merge_ranges(self.src_addr[self.coil_mask].tolist(), MAX_READ_GAP['bit'], MAX_READ_COUNT['bit'])
+        self.hr_ranges = merge_ranges(self.src_addr[self.hr_mask].tolist(), MAX_READ_GAP['reg'], MAX_READ_COUNT['reg'])
+
+        # hr 入力の範囲読み出し結果を受け取るコールバック (start, registers)
+        self.observe = None
+
+        self.rng = np.random.default_rng(seed)
+        self.t0 = None
+        self.last_t = None
+
+    # -----------------------------
+    # 入力（PLC 出力）の一括読み出し
+    # -----------------------------
+    def read_inputs(self, client):
+        u = self.setpoint.copy()
+
+        if self.coil_ranges:
+            u[self.coil_mask] = self._read_ranges(client.read_coils, "coil", self.coil_ranges,
+                                                  self.src_addr[self.coil_mask])
+        if self.hr_ranges:
+            u[self.hr_mask] = self._read_ranges(client.read_holding_registers, "hr", self.hr_ranges,
+                                                self.src_addr[self.hr_mask])
+        return u
+
+    def _read_ranges(self, read, space, ranges, addrs):
+        values = np.empty(len(addrs))
+        for start, count in ranges:
+            rr = read(address=start, count=count)
+            if rr.isError():
+                raise IOError(f"model input read failed ({space} {start}+{count}): {rr}")
+            if space == "coil":
+                data = rr.bits[:count]
+            else:
+                data = rr.registers[:count]
+                if self.observe:
+                    self.observe(start, data)
+            sel = (addrs >= start) & (addrs < start + count)
+            values[sel] = np.asarray(data, dtype=float)[addrs[sel] - start]
+        return values
+
+    # -----------------------------
+    # 1周期分の計算
+    # -----------------------------
+    def advance(self, u, now):
+        if self.t0 is None:
+            self.t0 = self.last_t = now
+        dt = now - self.last_t
+        self.last_t = now
+        t = now - self.t0
+
+        kind = self.kind
+        y = self.state
+
+        # 一次遅れ: y += (K*u - y) * (1 - exp(-dt/tau))
+        d_lag = (self.gain * u - y) * (1.0 - np.exp(-dt / self.tau))
+        # 積分（タンク液位など）: y += (K*u + bias) * dt
+        d_int = (self.gain * u + self.bias) * dt
+        # ランプ: 入力が立っている間 rate で変化
+        d_ramp = self.rate * u * dt
+        # ランダムウォーク
+        d_walk = self.walk_step * self.rng.standard_normal(len(y)) * math.sqrt(dt)
+
+        y = np.select(
+            [kind == KIND_LAG, kind == KIND_INTEGRATOR, kind == KIND_RAMP, kind == KIND_RANDOM_WALK],
+            [y + d_lag, y + d_int, y + d_ramp, y + d_walk],
+            default=y,
+        )
+        # 正弦波は状態を持たず時刻から直接求める
+        sine = self.offset + self.amplitude * np.sin(2 * np.pi * t / self.period + self.phase)
+        y = np.where(kind == KIND_SINE, sine, y)
+
+        self.state = np.clip(y, self.lo, self.hi)
+
+        out = self.state + self.noise * self.rng.standard_normal(len(y))
+        return np.clip(np.rint(out), 0, REG_MAX).astype(np.int64)
+
+    # -----------------------------
+    # 変化分だけを連続区間ごとに書き込む
+    # -----------------------------
+    def write_outputs(self, client, values):
+        order = self.write_order
+        changed = values[order] != self.last_written[order]
+        if not changed.any():
+            return []
+
+        idx = order[changed]
+        runs = contiguous_runs(self.address[idx])
+        pos = 0
+        for start, count in runs:
+            sent = idx[pos:pos + count]
+            rr = client.write_registers(address=start, values=[int(v) for v in values[sent]])
+            if rr.isError():
+                # 書けなかった区間は last_written を更新せず、次の周期に送り直す
+                raise IOError(f"model output write failed (hr {start}+{count}): {rr}")
+            self.last_written[sent] = values[sent]
+            pos += count
+        return runs
+
+    def step(self, client, now=None):
+        now = time.time() if now is None else now
+        u = self.read_inputs(client)
+        values = self.advance(u, now)
+        return self.write_outputs(client, values)
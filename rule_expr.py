@@ -0,0 +1,81 @@
+import ast
+
+# -----------------------------
+# ルール式（iodevicesim の when / expr）
+# -----------------------------
+# 設定読み込み時に1度だけ式を検証して Python 関数へコンパイルし、
+# 周期ごとの評価はスナップショットの値を引数に呼び出すだけにする。
+#
+#   when: "level > 500 and stop == 0"
+#   expr: "raw * 10 + offset"
+#
+# 使えるのは入力名・数値/真偽値の定数・算術/比較/論理演算・条件式と
+# EXPR_FUNCTIONS の関数だけ（属性参照や添字、任意の関数呼び出しは不可）。
+
+EXPR_FUNCTIONS = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "int": int,
+    "round": round,
+    "bool": bool,
+}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.Load,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd, ast.Invert,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.IfExp, ast.Call, ast.Name, ast.Constant,
+)
+
+
+class ExprError(ValueError):
+    """式の構文 / 使用できない要素のエラー"""
+
+
+def compile_expr(text, names, where="expr"):
+    """
+    式 text を names を引数に取る関数へコンパイルする。
+    戻り値の関数は names と同じ順の位置引数で呼び出す。
+    """
+    try:
+        tree = ast.parse(str(text), mode="eval")
+    except SyntaxError as e:
+        raise ExprError(f"{where}: syntax error in '{text}': {e.msg}")
+
+    allowed_names = set(names) | set(EXPR_FUNCTIONS)
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExprError(f"{where}: '{type(node).__name__}' is not allowed in '{text}'")
+        if isinstance(node, ast.Name) and node.id not in allowed_names:
+            raise ExprError(f"{where}: unknown name '{node.id}' in '{text}' (inputs: {sorted(names)})")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in EXPR_FUNCTIONS or node.keywords:
+                raise ExprError(f"{where}: only {sorted(EXPR_FUNCTIONS)} can be called in '{text}'")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, bool)):
+            raise ExprError(f"{where}: only numeric constants are allowed in '{text}'")
+
+    # lambda <names>: <式> を組み立てて1度だけ compile する
+    args = ast.arguments(
+        posonlyargs=[], args=[ast.arg(arg=n) for n in names], vararg=None,
+        kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[],
+    )
+    fn_tree = ast.Expression(body=ast.Lambda(args=args, body=tree.body))
+    ast.fix_missing_locations(fn_tree)
+    code = compile(fn_tree, f"<{where}>", "eval")
+    return eval(code, {"__builtins__": {}, **EXPR_FUNCTIONS})
+
+
+# -----------------------------
+# actions の op（固定演算）
+# -----------------------------
+# 発火のたびに if 連鎖で選ばず、読み込み時に関数を決めておく
+ACTION_OPS = {
+    "increment": lambda current, value: current + value,
+    "add": lambda current, value: current + value,
+    "decrement": lambda current, value: max(0, current - value),
+    "set": lambda current, value: value,
+}
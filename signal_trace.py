@@ -0,0 +1,244 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+# -----------------------------
+# 信号トレースファイル (devicesim の type: trace / 記録ツール)
+# -----------------------------
+# ヘッダ 16byte + 固定長レコード 16byte の追記型バイナリ。
+#   header : magic(8s) version(H) record_size(H) reserved(I)
+#   record : t_ns(q, 記録開始からの経過ns) area(B) flags(B) address(H) value(i)
+# 読み出しは mmap + チャンク単位の struct.iter_unpack で行い、
+# 数GBのトレースでも全体をメモリに載せない。
+
+TRACE_MAGIC = b"PLCTRACE"
+TRACE_VERSION = 1
+
+HEADER = struct.Struct("<8sHHI")
+RECORD = struct.Struct("<qBBHi")
+
+# area: どのデバイス領域の値か
+AREA_X = 0   # Discrete Input (SIM_INJECT で書き戻す)
+AREA_Y = 1   # Coil
+AREA_D = 2   # Holding Register
+
+AREA_NAMES = {AREA_X: "X", AREA_Y: "Y", AREA_D: "D"}
+AREA_CODES = {v: k for k, v in AREA_NAMES.items()}
+
+CHUNK_RECORDS = 4096
+
+# Modbus 1リクエストあたりの上限
+MAX_READ_BITS = 2000
+MAX_READ_REGS = 125
+
+
+# -----------------------------
+# 書き込み
+# -----------------------------
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path
+        self.fp = open(path, "wb")
+        self.fp.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, 0))
+        self.t0 = time.monotonic_ns()
+        self.count = 0
+
+    def write(self, area, address, value, t_ns=None):
+        if t_ns is None:
+            t_ns = time.monotonic_ns() - self.t0
+        self.fp.write(RECORD.pack(t_ns, area, 0, address, int(value)))
+        self.count += 1
+
+    def close(self):
+        if not self.fp.closed:
+            self.fp.close()
+
+
+# -----------------------------
+# 読み出し（遅延評価）
+# -----------------------------
+def iter_trace(path, chunk_records=CHUNK_RECORDS):
+    """(t_ns, area, address, value) を先頭から順に返すジェネレータ"""
+    with open(path, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size < HEADER.size:
+            raise ValueError(f"not a trace file: {path}")
+
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, rec_size, _ = HEADER.unpack_from(mm, 0)
+            if magic != TRACE_MAGIC:
+                raise ValueError(f"not a trace file: {path}")
+            if version != TRACE_VERSION or rec_size != RECORD.size:
+                raise ValueError(f"unsupported trace version: {version} (record={rec_size})")
+
+            # 書きかけの末尾レコードは読まない
+            end = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            # チャンク単位で切り出す（切り出した分だけがページインされる）
+            step = chunk_records * RECORD.size
+            for pos in range(HEADER.size, end, step):
+                chunk = mm[pos:min(pos + step, end)]
+                for t_ns, area, _flags, address, value in RECORD.iter_unpack(chunk):
+                    yield t_ns, area, address, value
+
+
+class TraceReplay:
+    """
+    トレースを経過時間に合わせて取り出す。
+
+    speed: 1 = 実時間, 10 = 10倍速, 0 = 可能な限り速く（1回あたり max_batch 件）
+    """
+    def __init__(self, path, speed=1.0, loop=False, max_batch=1000):
+        self.path = path
+        self.speed = float(speed)
+        self.loop = loop
+        self.max_batch = max_batch
+        self.finished = False
+        self._restart()
+
+    def _restart(self):
+        self.records = iter_trace(self.path)
+        self.pending = next(self.records, None)
+        self.t_start = time.monotonic_ns()
+
+    def due(self):
+        """現在時刻までに再生すべきレコードのリスト"""
+        if self.finished:
+            return []
+
+        out = []
+        if self.speed > 0:
+            limit = (time.monotonic_ns() - self.t_start) * self.speed
+        else:
+            limit = None
+
+        while len(out) < self.max_batch:
+            if self.pending is None:
+                if not self.loop:
+                    self.finished = True
+                    break
+                self._restart()
+                if self.pending is None:
+                    # 空のトレース
+                    self.finished = True
+                    break
+                if limit is not None:
+                    limit = 0
+
+            if limit is not None and self.pending[0] > limit:
+                break
+            out.append(self.pending)
+            self.pending = next(self.records, None)
+
+        return out
+
+
+# -----------------------------
+# 記録（PLC の X / D イメージ）
+# -----------------------------
+class TraceRecorder:
+    def __init__(self, client, writer, x_count, d_count):
+        self.client = client
+        self.writer = writer
+        self.x_count = x_count
+        self.d_count = d_count
+        self.last = {AREA_X: [None] * x_count, AREA_D: [None] * d_count}
+
+    def _read_x(self):
+        values = []
+        for start in range(0, self.x_count, MAX_READ_BITS):
+            count = min(MAX_READ_BITS, self.x_count - start)
+            rr = self.client.read_discrete_inputs(address=start, count=count)
+            if rr.isError():
+                raise IOError(f"read X{start}+{count} failed: {rr}")
+            values.extend(int(b) for b in rr.bits[:count])
+        return values
+
+    def _read_d(self):
+        values = []
+        for start in range(0, self.d_count, MAX_READ_REGS):
+            count = min(MAX_READ_REGS, self.d_count - start)
+            rr = self.client.read_holding_registers(address=start, count=count)
+            if rr.isError():
+                raise IOError(f"read D{start}+{count} failed: {rr}")
+            values.extend(rr.registers[:count])
+        return values
+
+    def sample(self):
+        """1回分のイメージを読み、前回から変化したアドレスだけを記録する"""
+        t_ns = time.monotonic_ns() - self.writer.t0
+        changed = 0
+        for area, values in ((AREA_X, self._read_x()), (AREA_D, self._read_d())):
+            last = self.last[area]
+            for addr, v in enumerate(values):
+                if last[addr] != v:
+                    self.writer.write(area, addr, v, t_ns=t_ns)
+                    last[addr] = v
+                    changed += 1
+        return changed
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def cmd_record(args):
+    from pymodbus.client import ModbusTcpClient
+
+    client = ModbusTcpClient(args.host, port=args.port, timeout=2)
+    if not client.connect():
+        print(f"[!] Could not connect to {args.host}:{args.port}")
+        sys.exit(1)
+
+    writer = TraceWriter(args.out)
+    recorder = TraceRecorder(client, writer, args.x, args.d)
+    period = args.period_ms / 1000
+    t_end = time.time() + args.duration if args.duration else None
+    print(f"[*] recording {args.host}:{args.port} X={args.x} D={args.d} -> {args.out}")
+
+    try:
+        while t_end is None or time.time() < t_end:
+            t_next = time.time() + period
+            recorder.sample()
+            time.sleep(max(0.0, t_next - time.time()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        client.close()
+        print(f"[*] {writer.count} records written")
+
+
+def cmd_dump(args):
+    for i, (t_ns, area, address, value) in enumerate(iter_trace(args.file)):
+        if args.limit and i >= args.limit:
+            break
+        print(f"{t_ns / 1e9:12.6f} | {AREA_NAMES.get(area, area)}{address} = {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PLC signal trace recorder / viewer")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="PLC の X/D イメージをトレースファイルへ記録")
+    rec.add_argument("--host", default="localhost")
+    rec.add_argument("--port", type=int, required=True)
+    rec.add_argument("--x", type=int, default=0, help="記録する X の点数")
+    rec.add_argument("--d", type=int, default=0, help="記録する D の点数")
+    rec.add_argument("--period-ms", type=int, default=100)
+    rec.add_argument("--duration", type=float, default=None, help="記録秒数（省略時は Ctrl+C まで）")
+    rec.add_argument("--out", required=True)
+    rec.set_defaults(func=cmd_record)
+
+    dump = sub.add_parser("dump", help="トレースファイルをテキスト表示")
+    dump.add_argument("file")
+    dump.add_argument("--limit", type=int, default=0)
+    dump.set_defaults(func=cmd_dump)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
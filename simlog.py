@@ -0,0 +1,289 @@
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+# -----------------------------
+# ログ（plcsim / devicesim / iodevicesim / orchestrator 共通）
+# -----------------------------
+# log() は時刻とメッセージをキューに積むだけで戻り、書式化・ファイル書き込み・
+# 画面出力はプロセスに1つの書き込みスレッドがまとめて行う。
+# スキャンや I/O の周期処理の中で print / flush / fsync を待たないようにするため。
+#
+#   * ファイルへの書き込みはキューに溜まった分をまとめて1回で行う
+#   * fsync は FSYNC_INTERVAL ごと（と close 時）だけ
+#   * level 未満のメッセージはキューにも積まない。[DEBUG] / [WARN] / [ERROR] / [FATAL] を付けた
+#     メッセージは、呼び出し側がその tag と同じ level を渡す
+#   * max_bytes / interval_s でファイルを切り替える（path.1, path.2, ... に退避）
+
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+FATAL = 50
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARN": WARN, "WARNING": WARN, "ERROR": ERROR, "FATAL": FATAL}
+
+BATCH_MAX = 1000      # 書き込みスレッドが1回にまとめる件数の上限
+FSYNC_INTERVAL = 1.0  # ファイルを fsync する間隔 [s]
+
+
+def parse_level(value, default=INFO):
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    try:
+        return LEVELS[str(value).upper()]
+    except KeyError:
+        raise ValueError(f"unknown log level: {value} (use {', '.join(LEVELS)})")
+
+
+def stdout_writer(lines):
+    sys.stdout.write("".join(line + "\n" for line in lines))
+    sys.stdout.flush()
+
+
+# -----------------------------
+# 書き込みスレッド
+# -----------------------------
+class LogWriter:
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < BATCH_MAX:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        files = {}     # Logger -> [行]
+        consoles = {}  # writer 関数 -> [行]
+        events = []
+        stamp_sec = None
+        stamp_text = ""
+        for item in batch:
+            if item[0] == "sync":
+                events.append(item)
+                continue
+            logger, t, msg, console = item
+            # 秒までの書式化は同じ秒の間だけ使い回す
+            sec = int(t)
+            if sec != stamp_sec:
+                stamp_sec = sec
+                stamp_text = datetime.fromtimestamp(sec).strftime("%Y-%m-%d %H:%M:%S")
+            line = f"{stamp_text}.{int((t - sec) * 1000):03d} | {msg}"
+            files.setdefault(logger, []).append(line)
+            if console:
+                consoles.setdefault(logger.console_writer, []).append(line)
+
+        for writer, lines in consoles.items():
+            try:
+                writer(lines)
+            except (OSError, ValueError):
+                pass  # 画面が閉じられていてもファイルへの記録は続ける
+        for logger, lines in files.items():
+            logger.write_lines(lines)
+
+        for _, logger, done in events:
+            if logger is None:
+                for lg in list(Logger.open_loggers):
+                    lg.sync()
+            else:
+                logger.sync()
+                logger.close_file()
+            done.set()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+    return _writer
+
+
+def _reset_after_fork():
+    # fork した子には書き込みスレッドが引き継がれないため、最初の log() で作り直す
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def flush_all(timeout=5.0):
+    """キューに積まれたすべてのログを書き出すまで待つ（プロセス終了前に呼ぶ）"""
+    if _writer is None or not _writer.thread.is_alive():
+        return
+    done = threading.Event()
+    _writer.queue.put(("sync", None, done))
+    done.wait(timeout)
+
+
+atexit.register(flush_all)
+
+
+# -----------------------------
+# Logger
+# -----------------------------
+class Logger:
+    open_loggers = set()
+
+    def __init__(self, name, log_dir=None, level=INFO, console=True, console_writer=None,
+                 max_bytes=0, interval_s=0, backups=5):
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{name}_{ts}.log"
+
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            self.path = os.path.join(log_dir, filename)
+        else:
+            self.path = filename
+
+        self.level = parse_level(level)
+        self.console = console
+        self.console_writer = console_writer or stdout_writer
+        self.max_bytes = max_bytes
+        self.interval_s = interval_s
+        self.backups = backups
+
+        # ファイルは書き込みスレッドだけが触る
+        self.fp = open(self.path, "a", encoding="utf-8")
+        self.size = self.fp.tell()
+        self.opened_at = time.time()
+        self.synced_at = time.time()
+        self.closed = False
+        Logger.open_loggers.add(self)
+        self.log(f"log file opened: {self.path}")
+
+    @classmethod
+    def from_config(cls, name, conf, console=True):
+        """
+        yaml の設定からログを作る。
+          log_dir: logs
+          log_level: INFO          # DEBUG / INFO / WARN / ERROR
+          log_console: true        # 画面にも出力するか
+          log_rotate: {max_mb: 50, interval_h: 24, backups: 5}
+        """
+        rotate = conf.get("log_rotate") or {}
+        return cls(
+            name, conf.get("log_dir"),
+            level=conf.get("log_level", INFO),
+            console=conf.get("log_console", console),
+            max_bytes=int(rotate.get("max_mb", 0) * 1024 * 1024),
+            interval_s=rotate.get("interval_h", 0) * 3600,
+            backups=rotate.get("backups", 5),
+        )
+
+    # -----------------------------
+    # 呼び出し側（どのスレッドからでもよい）
+    # -----------------------------
+    def log(self, msg, level=INFO, console=None):
+        if level < self.level or self.closed:
+            return
+        get_writer().queue.put((self, time.time(), msg, self.console if console is None else console))
+
+    def debug(self, msg):
+        self.log(msg, DEBUG)
+
+    def info(self, msg):
+        self.log(msg, INFO)
+
+    def warn(self, msg):
+        self.log(msg, WARN)
+
+    def error(self, msg):
+        self.log(msg, ERROR)
+
+    def fatal(self, msg):
+        self.log(msg, FATAL)
+
+    def flush(self, timeout=5.0):
+        """ここまでのログがファイルに書かれるまで待つ"""
+        done = threading.Event()
+        get_writer().queue.put(("sync", None, done))
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.log("log file closed")
+        self.closed = True
+        done = threading.Event()
+        get_writer().queue.put(("sync", self, done))
+        done.wait(timeout)
+
+    # -----------------------------
+    # 書き込みスレッド側
+    # -----------------------------
+    def write_lines(self, lines):
+        if self.fp.closed:
+            return
+        now = time.time()
+        if self.interval_s and now - self.opened_at >= self.interval_s:
+            self.rotate(now)
+        # まとめて書くが、max_bytes を超える行の手前でファイルを切り替える
+        chunk = []
+        chunk_size = 0
+        for line in lines:
+            # max_bytes はファイルのバイト数（日本語は UTF-8 で1文字3バイト）
+            n = len(line.encode("utf-8")) + 1
+            if self.max_bytes and self.size + chunk_size + n > self.max_bytes and self.size + chunk_size > 0:
+                self.fp.write("".join(chunk))
+                self.rotate(now)
+                chunk = []
+                chunk_size = 0
+            chunk.append(line + "\n")
+            chunk_size += n
+        self.fp.write("".join(chunk))
+        self.fp.flush()
+        self.size += chunk_size
+        if now - self.synced_at >= FSYNC_INTERVAL:
+            self.sync()
+
+    def rotate(self, now):
+        self.fp.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.fp = open(self.path, "a", encoding="utf-8")
+        self.size = 0
+        self.opened_at = now
+
+    def sync(self):
+        if self.fp.closed:
+            return
+        self.fp.flush()
+        try:
+            os.fsync(self.fp.fileno())
+        except OSError:
+            pass
+        self.synced_at = time.time()
+
+    def close_file(self):
+        Logger.open_loggers.discard(self)
+        if not self.fp.closed:
+            self.fp.close()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+# シミュレータのモジュールはリポジトリ直下にあるため、tests/ から import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_plc(tmp_path):
+    """ladder.yaml の内容（dict）から、Modbus サーバーを起動しない PLC を作る"""
+    from ladder_compiler import get_compiler
+    from plcsim import PLC, load_ladder_yaml
+
+    plcs = []
+
+    def make(ladder, scan_cycle_ms=100):
+        path = tmp_path / f"ladder{len(plcs)}.yaml"
+        path.write_text(yaml.safe_dump({"kind": "ladder", **ladder}, allow_unicode=True), encoding="utf-8")
+        plc_conf = {
+            "kind": "plc", "name": f"test{len(plcs)}", "power": True,
+            "memory": {"X": 16, "Y": 16, "M": 16, "D": 16},
+            "cpu": {"scan_cycle_ms": scan_cycle_ms},
+            "log_dir": str(tmp_path), "log_console": False,
+        }
+        plc = PLC(plc_conf, load_ladder_yaml(str(path), get_compiler()))
+        plcs.append(plc)
+        return plc
+
+    yield make
+    for plc in plcs:
+        plc.close_files()
+        plc.logger.close()
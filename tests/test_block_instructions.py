@@ -0,0 +1,160 @@
+import pytest
+
+from event_trace import AREA_CODES, EV_CALC
+from ladder_compiler import get_compiler
+
+
+def compile_output(line):
+    return get_compiler().compile_line(line)["outputs"]
+
+
+def run(plc, scans=1):
+    for _ in range(scans):
+        plc.scan(plc.tasks[0])
+
+
+def capture_log(plc, monkeypatch):
+    messages = []
+    monkeypatch.setattr(plc, "log", lambda msg, level=None, console=None: messages.append(msg))
+    return messages
+
+
+# -----------------------------
+# コンパイル
+# -----------------------------
+@pytest.mark.parametrize("line, expected", [
+    ("[ X0 ] --(BMOV D0 D4 4)", {"type": "BMOV", "src": ("D", 0), "dst": ("D", 4), "n": 4}),
+    ("[ X0 ] --(FMOV 5 D4 4)", {"type": "FMOV", "src": 5, "dst": ("D", 4), "n": 4}),
+    ("[ X0 ] --(FMOV D1 Y0 4)", {"type": "FMOV", "src": ("D", 1), "dst": ("Y", 0), "n": 4}),
+    ("[ X0 ] --(BCMP D0 D4 4 M1)", {"type": "BCMP", "src": ("D", 0), "src2": ("D", 4), "n": 4, "dst": ("M", 1)}),
+    ("[ X0 ] --(SUM D0 4 D8)", {"type": "SUM", "src": ("D", 0), "n": 4, "dst": ("D", 8)}),
+    ("[ X0 ] --(AVG D0 4 D8)", {"type": "AVG", "src": ("D", 0), "n": 4, "dst": ("D", 8)}),
+    ("[ X0 ] --(MIN X0 4 D8)", {"type": "MIN", "src": ("X", 0), "n": 4, "dst": ("D", 8)}),
+    ("[ X0 ] --(MAX D0 4 M8)", {"type": "MAX", "src": ("D", 0), "n": 4, "dst": ("M", 8)}),
+])
+def test_compile_block(line, expected):
+    assert compile_output(line) == expected
+
+
+@pytest.mark.parametrize("line, message", [
+    ("[ X0 ] --(BMOV T0 D4 4)", "supports X, Y, M, D only: T0"),
+    ("[ X0 ] --(SUM C0 4 D8)", "supports X, Y, M, D only: C0"),
+    ("[ X0 ] --(BMOV D0 D4 0)", "block size must be positive"),
+])
+def test_compile_block_errors(line, message):
+    with pytest.raises(Exception, match=message):
+        compile_output(line)
+
+
+# 右辺が1項だけの CALC は math_expr を通らない（Token のまま calc_expr に届く）
+@pytest.mark.parametrize("line, formula", [
+    ("[ X0 ] --(D10 = 5)", "self.mem.D[10] = 5"),
+    ("[ X0 ] --(D10 = D0)", "self.mem.D[10] = self.mem.D[0]"),
+    ("[ X0 ] --(D10 = D0 + 2 * D1)", "self.mem.D[10] = self.mem.D[0] + 2 * self.mem.D[1]"),
+])
+def test_compile_calc(line, formula):
+    assert compile_output(line) == {"type": "CALC", "formula": formula}
+
+
+def test_single_term_calc_scan(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(D10 = 5)", "[ TRUE ] --(D11 = D0)"]})
+    plc.mem.D[0] = 42
+    run(plc)
+    assert plc.mem.D[10:12] == [5, 42]
+
+
+# -----------------------------
+# スキャンでの動作
+# -----------------------------
+def test_bmov(make_plc):
+    plc = make_plc({"rungs": ["[ X0 ] --(BMOV D0 D4 4)"]})
+    plc.mem.D[0:4] = [1, 2, 3, 4]
+    run(plc)
+    # 条件が OFF の間は実行しない
+    assert plc.mem.D[4:8] == [0, 0, 0, 0]
+    plc.mem.X[0] = True
+    run(plc)
+    assert plc.mem.D[4:8] == [1, 2, 3, 4]
+
+
+def test_bmov_to_bit_device(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(BMOV D0 Y0 3)"]})
+    plc.mem.D[0:3] = [0, 7, -1]
+    run(plc)
+    assert plc.mem.Y[0:3] == [False, True, True]
+
+
+@pytest.mark.parametrize("line, expected", [
+    # 前へずらす / 後ろへずらす。転送元は転送前の値で読む
+    ("[ TRUE ] --(BMOV D0 D2 4)", [1, 2, 1, 2, 3, 4]),
+    ("[ TRUE ] --(BMOV D2 D0 4)", [3, 4, 5, 6, 5, 6]),
+])
+def test_bmov_overlap(make_plc, line, expected):
+    plc = make_plc({"rungs": [line]})
+    plc.mem.D[0:6] = [1, 2, 3, 4, 5, 6]
+    run(plc)
+    assert plc.mem.D[0:6] == expected
+
+
+def test_fmov(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(FMOV 5 D4 3)", "[ TRUE ] --(FMOV D0 M0 2)"]})
+    plc.mem.D[0] = 9
+    run(plc)
+    assert plc.mem.D[3:8] == [0, 5, 5, 5, 0]
+    assert plc.mem.M[0:3] == [True, True, False]
+
+
+def test_bcmp(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(BCMP D0 D4 3 M1)"]})
+    plc.mem.D[0:3] = [1, 2, 3]
+    plc.mem.D[4:7] = [1, 2, 3]
+    run(plc)
+    assert plc.mem.M[1] is True
+    plc.mem.D[6] = 0
+    run(plc)
+    assert plc.mem.M[1] is False
+
+
+@pytest.mark.parametrize("op, expected", [("SUM", 10), ("AVG", 2), ("MIN", -3), ("MAX", 8)])
+def test_reduce(make_plc, op, expected):
+    plc = make_plc({"rungs": [f"[ TRUE ] --({op} D0 4 D8)"]})
+    plc.mem.D[0:4] = [8, 2, -3, 3]
+    run(plc)
+    assert plc.mem.D[8] == expected
+
+
+def test_avg_truncates(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(AVG D0 3 D8)"]})
+    plc.mem.D[0:3] = [1, 1, 2]
+    run(plc)
+    assert plc.mem.D[8] == 1
+
+
+def test_records_changed_points_only(make_plc):
+    plc = make_plc({"rungs": ["[ TRUE ] --(BMOV D0 D4 4)"]})
+    plc.mem.D[0:4] = [0, 7, 0, 8]
+    run(plc)
+    calc = [r[4:] for r in plc.events.records() if r[3] == EV_CALC]
+    assert calc == [(AREA_CODES["D"], 5, 7), (AREA_CODES["D"], 7, 8)]
+    run(plc)
+    assert len([r for r in plc.events.records() if r[3] == EV_CALC]) == 2
+
+
+# -----------------------------
+# 範囲外: 実行せずにエラーを出す
+# -----------------------------
+@pytest.mark.parametrize("line, message", [
+    ("[ TRUE ] --(BMOV D0 D14 4)", "BMOV failed: destination D14+4 is out of range"),
+    ("[ TRUE ] --(BMOV D14 D0 4)", "BMOV failed: source D14+4 is out of range"),
+    ("[ TRUE ] --(FMOV 1 D14 4)", "FMOV failed: destination D14+4 is out of range"),
+    ("[ TRUE ] --(BCMP D0 D14 4 M0)", "BCMP failed: source D14+4 is out of range"),
+    ("[ TRUE ] --(SUM D14 4 D0)", "SUM failed: source D14+4 is out of range"),
+])
+def test_out_of_range(make_plc, monkeypatch, line, message):
+    plc = make_plc({"rungs": [line]})
+    messages = capture_log(plc, monkeypatch)
+    plc.mem.D[:] = list(range(1, 17))
+    run(plc)
+    assert plc.mem.D == list(range(1, 17))
+    assert plc.mem.M[0] is False
+    assert any(message in m for m in messages)
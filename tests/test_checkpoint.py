@@ -0,0 +1,121 @@
+import pytest
+
+from checkpoint import HEADER, SLOT_HEADER, Checkpoint
+from plcsim import Memory
+
+
+@pytest.fixture
+def mem():
+    m = Memory(8, 8, 16, 8)
+    m.X[1] = True
+    m.Y[2] = True
+    m.M[15] = True
+    m.D[:3] = [7, -1, 123456789]
+    m.T["self.mem.T[0]"] = {"acc": 250.0, "on": False}
+    m.T[0] = False
+    m.C["self.mem.C[3]"] = {"count": 4, "prev": True, "done": False}
+    m.C[3] = False
+    m.sys.heartbeat = 11
+    m.sys.scan_count = 11
+    return m
+
+
+def open_ckpt(tmp_path, mem):
+    ckpt = Checkpoint(str(tmp_path / "plc.ckpt"), mem)
+    ckpt.start()
+    return ckpt
+
+
+def slot_offset(ckpt, seq):
+    return HEADER.size + (seq % 2) * ckpt.slot_size
+
+
+def test_round_trip(tmp_path, mem):
+    ckpt = open_ckpt(tmp_path, mem)
+    ckpt.close()
+
+    snap = Checkpoint(ckpt.path, Memory(8, 8, 16, 8)).load()
+    expected = mem.snapshot()
+    for key in ("X", "Y", "M", "D", "heartbeat", "scan_count"):
+        assert snap[key] == expected[key]
+    assert sorted(snap["T"], key=str) == sorted(expected["T"], key=str)
+    assert sorted(snap["C"], key=str) == sorted(expected["C"], key=str)
+
+    # Memory.restore にそのまま渡せる
+    restored = Memory(8, 8, 16, 8)
+    restored.restore(snap)
+    assert restored.T["self.mem.T[0]"] == {"acc": 250.0, "on": False}
+    assert restored.C["self.mem.C[3]"] == {"count": 4, "prev": True, "done": False}
+
+
+def test_newest_slot_wins(tmp_path, mem):
+    ckpt = open_ckpt(tmp_path, mem)
+    for scan in range(12, 15):
+        mem.sys.scan_count = scan
+        mem.D[0] = scan
+        ckpt.write(scan)
+    ckpt.close()
+    snap = Checkpoint(ckpt.path, mem).load()
+    assert snap["scan_count"] == 14
+    assert snap["D"][0] == 14
+
+
+def test_corrupt_slot_falls_back_to_other(tmp_path, mem):
+    ckpt = open_ckpt(tmp_path, mem)
+    mem.sys.scan_count = 12
+    mem.D[0] = 100
+    ckpt.write(12)
+    mem.sys.scan_count = 13
+    mem.D[0] = 200
+    ckpt.write(13)
+    # 最新のスロットの image を壊す（書き込みの途中で kill された場合と同じく crc が合わない）
+    ckpt.mm[slot_offset(ckpt, ckpt.seq) + SLOT_HEADER.size] ^= 0xFF
+    ckpt.close()
+
+    snap = Checkpoint(ckpt.path, mem).load()
+    assert snap["scan_count"] == 12
+    assert snap["D"][0] == 100
+
+
+def test_half_written_slot_is_ignored(tmp_path, mem):
+    ckpt = open_ckpt(tmp_path, mem)
+    ckpt.write(12)
+    # write_slot は最初に seq を 0 にする。そこで止まったスロットは使わない
+    SLOT_HEADER.pack_into(ckpt.mm, slot_offset(ckpt, ckpt.seq), 0, 0, 0, 0.0, 0, 0)
+    ckpt.close()
+    assert Checkpoint(ckpt.path, mem).load()["scan_count"] == 11
+
+
+def test_missing_or_foreign_file(tmp_path, mem):
+    assert Checkpoint(str(tmp_path / "none.ckpt"), mem).load() is None
+    path = tmp_path / "bad.ckpt"
+    path.write_bytes(b"NOTACKPT" + bytes(64))
+    assert Checkpoint(str(path), mem).load() is None
+
+
+def test_non_integer_d_is_truncated(tmp_path, mem):
+    mem.D[1] = 2.75   # CALC の割り算の結果など
+    ckpt = open_ckpt(tmp_path, mem)
+    ckpt.close()
+    assert Checkpoint(ckpt.path, mem).load()["D"][1] == 2
+
+
+def test_grows_when_timers_exceed_reserve(tmp_path, mem):
+    ckpt = Checkpoint(str(tmp_path / "plc.ckpt"), mem)
+    ckpt.open(tc_reserve=4)
+    for i in range(10):
+        mem.T[f"self.mem.T[{i}]"] = {"acc": float(i), "on": False}
+    ckpt.write(12)
+    assert ckpt.tc_reserve >= len(ckpt.tc_entries())
+    ckpt.close()
+    snap = Checkpoint(ckpt.path, mem).load()
+    assert ["self.mem.T[9]", {"acc": 9.0, "on": False}] in snap["T"]
+
+
+def test_from_config(tmp_path, mem):
+    assert Checkpoint.from_config("plc_a", {}, mem) is None
+    ckpt = Checkpoint.from_config("plc_a", {"log_dir": str(tmp_path)}, mem, enable=True)
+    assert ckpt.path == str(tmp_path / "plc_a.ckpt")
+    ckpt = Checkpoint.from_config("plc_a", {"checkpoint": {"dir": str(tmp_path / "ck"), "every_scans": 5}}, mem)
+    assert ckpt.path == str(tmp_path / "ck" / "plc_a.ckpt")
+    assert ckpt.every_scans == 5
@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from event_trace import (
+    AREA_CODES, AREA_UNKNOWN, BLOCK_RECORDS, EV_CALC, EV_COIL, EV_INJECT, EV_STEP,
+    RECORD, EventRing, EventTrace, device_name, iter_events, parse_device, segments, target_device,
+)
+
+
+def fill(ring, scans, per_scan=1):
+    for scan in range(scans):
+        for i in range(per_scan):
+            ring.record(scan, EV_COIL, AREA_CODES["Y"], i, scan & 1)
+
+
+# -----------------------------
+# デバイス名
+# -----------------------------
+def test_device_names():
+    assert parse_device("d12") == (AREA_CODES["D"], 12)
+    assert device_name(*parse_device("M100")) == "M100"
+    assert target_device("self.mem.Y[3]") == (AREA_CODES["Y"], 3)
+    assert target_device("self.mem.sys.heartbeat") is None
+    with pytest.raises(ValueError):
+        parse_device("Q1")
+
+
+# -----------------------------
+# EventRing
+# -----------------------------
+def test_ring_records():
+    ring = EventRing(0)
+    assert ring.capacity == BLOCK_RECORDS
+    ring.record(5, EV_INJECT, AREA_CODES["X"], 2, True)
+    ring.record_target(6, EV_COIL, "self.mem.Y[1]", False)
+    ring.record_target(6, EV_COIL, "not a device", 1)
+    records = ring.records()
+    assert [r[:1] + r[2:] for r in records] == [
+        (0, 5, EV_INJECT, AREA_CODES["X"], 2, 1),
+        (1, 6, EV_COIL, AREA_CODES["Y"], 1, 0),
+        (2, 6, EV_COIL, AREA_UNKNOWN, 0, 1),
+    ]
+    assert ring.records(1, 2)[0][0] == 1
+    assert len(ring.records(1, 2)) == 1
+
+
+def test_ring_clamps_value_to_int32():
+    ring = EventRing(0)
+    ring.record(1, EV_CALC, AREA_CODES["D"], 0, 2 ** 40)
+    ring.record(1, EV_CALC, AREA_CODES["D"], 1, -2 ** 40)
+    ring.record_target(1, EV_CALC, "self.mem.D[2]", 2 ** 31)
+    ring.record_target(1, EV_CALC, "self.mem.D[3]", -2 ** 31)
+    assert [r[-1] for r in ring.records()] == [2 ** 31 - 1, -2 ** 31, 2 ** 31 - 1, -2 ** 31]
+
+
+def test_calc_beyond_int32(make_plc, monkeypatch):
+    plc = make_plc({"rungs": ["[ TRUE ] --(D1 = D0 * 2)"]})
+    messages = []
+    monkeypatch.setattr(plc, "log", lambda msg, level=None, console=None: messages.append(msg))
+    plc.mem.D[0] = 2 ** 31
+    plc.scan(plc.tasks[0])
+    # 代入は成功しており、記録の値だけが丸められる
+    assert plc.mem.D[1] == 2 ** 32
+    assert not any("CALC failed" in m for m in messages)
+    assert [r[-1] for r in plc.events.records() if r[3] == EV_CALC] == [2 ** 31 - 1]
+
+
+def test_ring_wraps_and_skips_overwritten():
+    ring = EventRing(BLOCK_RECORDS)
+    fill(ring, BLOCK_RECORDS + 10)
+    start, blocks = ring.copy(0)
+    assert start == 10
+    assert sum(len(b) for b in blocks) // RECORD.size == BLOCK_RECORDS
+    records = ring.records()
+    assert records[0][0] == 10 and records[-1][0] == BLOCK_RECORDS + 9
+    assert [r[2] for r in records] == list(range(10, BLOCK_RECORDS + 10))
+
+
+def test_first_after_scan():
+    ring = EventRing(BLOCK_RECORDS)
+    assert ring.first_after_scan(-1) == 0
+    assert ring.oldest_scan() is None
+    fill(ring, 2000, per_scan=3)   # 6000 件で1周する
+    head = ring.head
+    oldest = head - ring.capacity
+    assert ring.oldest_scan() == oldest // 3
+    assert ring.first_after_scan(-1) == oldest
+    assert ring.first_after_scan(1990) == 1991 * 3
+    assert ring.first_after_scan(1999) == head
+    # 求めた位置の直前は since 以前、位置のレコードは since より後
+    seq = ring.first_after_scan(1500)
+    assert ring.records(seq - 1, seq + 1)[0][2] == 1500
+    assert ring.records(seq - 1, seq + 1)[1][2] == 1501
+
+
+# -----------------------------
+# EventTrace（書き出し）と iter_events（デコーダ）
+# -----------------------------
+def test_trace_encode_decode(tmp_path):
+    ring = EventRing(BLOCK_RECORDS)
+    trace = EventTrace(ring, str(tmp_path / "plc.evt"))
+    before = time.time_ns()
+    ring.record(1, EV_INJECT, AREA_CODES["X"], 0, 1)
+    ring.record(2, EV_STEP, AREA_CODES["M"], 100, 1)
+    ring.record(3, EV_COIL, AREA_CODES["D"], 4, -5)
+    trace.close()
+
+    events = list(iter_events(trace.path))
+    assert [e[1:] for e in events] == [
+        (1, EV_INJECT, AREA_CODES["X"], 0, 1),
+        (2, EV_STEP, AREA_CODES["M"], 100, 1),
+        (3, EV_COIL, AREA_CODES["D"], 4, -5),
+    ]
+    # t_ns は実時刻に換算して返す
+    assert before - 10**9 < events[0][0] < time.time_ns() + 10**9
+    assert trace.dropped == 0
+
+
+def test_trace_rotation(tmp_path):
+    ring = EventRing(BLOCK_RECORDS)
+    path = str(tmp_path / "plc.evt")
+    trace = EventTrace(ring, path, max_bytes=BLOCK_RECORDS * RECORD.size, backups=2)
+    for part in range(3):
+        fill(ring, BLOCK_RECORDS // 2)
+        trace.flush()
+    trace.close()
+    files = segments(path)
+    assert files[-1] == path and len(files) >= 2
+    total = sum(1 for f in files for _ in iter_events(f))
+    assert total <= 3 * BLOCK_RECORDS // 2
+
+
+def test_trace_counts_dropped(tmp_path):
+    ring = EventRing(BLOCK_RECORDS)
+    trace = EventTrace(ring, str(tmp_path / "plc.evt"))
+    trace.stopping = True   # 書き出しスレッドを止めたまま1周以上記録する
+    trace.wake.set()
+    trace.thread.join()
+    fill(ring, BLOCK_RECORDS + 100)
+    trace.stopping = False
+    trace.close()
+    assert trace.dropped == 100
+    assert sum(1 for _ in iter_events(trace.path)) == BLOCK_RECORDS
+
+
+def test_iter_events_rejects_other_files(tmp_path):
+    path = tmp_path / "x.evt"
+    path.write_bytes(b"NOTEVENT" + bytes(64))
+    with pytest.raises(ValueError):
+        list(iter_events(str(path)))
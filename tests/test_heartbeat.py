@@ -0,0 +1,73 @@
+from heartbeat import HB_ADDR, HB_LOST, HB_OK, HB_STALE, HB_UNKNOWN, HeartbeatMonitor
+
+
+def make_monitor(logs=None):
+    return HeartbeatMonitor(period=1.0, timeout=5.0, log=logs.append if logs is not None else None)
+
+
+def test_unknown_until_first_value():
+    hb = make_monitor()
+    assert hb.state("plc") == HB_UNKNOWN
+    assert hb.evaluate("plc", now=100.0) == HB_UNKNOWN
+
+
+def test_ok_stale_lost_and_recover():
+    logs = []
+    hb = make_monitor(logs)
+    assert hb.feed("plc", 1, now=0.0) == HB_OK
+    assert hb.feed("plc", 2, now=1.0) == HB_OK
+    # 値が変わらなければ period の2倍で STALE、timeout を超えたら LOST
+    assert hb.feed("plc", 2, now=3.0) == HB_OK
+    assert hb.feed("plc", 2, now=3.5) == HB_STALE
+    assert hb.evaluate("plc", now=6.5) == HB_LOST
+    assert hb.feed("plc", 3, now=7.0) == HB_OK
+    # 起動直後の UNKNOWN -> OK は記録しない
+    assert logs == [
+        "[HB] plc: OK -> STALE",
+        "[HB] plc: STALE -> LOST",
+        "[HB] plc: LOST -> OK",
+    ]
+
+
+def test_hosts_are_independent():
+    hb = make_monitor()
+    hb.feed("a", 1, now=0.0)
+    hb.feed("b", 1, now=0.0)
+    hb.feed("b", 2, now=2.5)
+    assert hb.evaluate("a", now=2.5) == HB_STALE
+    assert hb.evaluate("b", now=2.5) == HB_OK
+
+
+def test_due_after_period():
+    hb = make_monitor()
+    assert hb.due("plc", now=10.0)
+    hb.feed("plc", 1, now=10.0)
+    assert not hb.due("plc", now=10.5)
+    assert hb.due("plc", now=11.0)
+
+
+def test_covers_and_feed_registers():
+    assert HeartbeatMonitor.covers([(0, 10), (HB_ADDR, 3)])
+    assert HeartbeatMonitor.covers([(HB_ADDR - 5, 6)])
+    assert not HeartbeatMonitor.covers([(HB_ADDR - 5, 5), (HB_ADDR + 1, 3)])
+
+    hb = make_monitor()
+    assert hb.feed_registers("plc", 0, [1, 2, 3], now=0.0) is None
+    assert hb.feed_registers("plc", HB_ADDR - 1, [0, 42, 7], now=0.0) == HB_OK
+    assert hb.hosts["plc"]["val"] == 42
+
+
+def test_reset():
+    hb = make_monitor()
+    hb.feed("plc", 1, now=0.0)
+    hb.evaluate("plc", now=10.0)
+    hb.reset("plc")
+    assert hb.state("plc") == HB_UNKNOWN
+
+
+def test_from_config():
+    hb = HeartbeatMonitor.from_config({"period_ms": 200}, default_timeout=3)
+    assert hb.period == 0.2
+    assert hb.timeout == 3.0
+    hb = HeartbeatMonitor.from_config(None, default_timeout=3)
+    assert (hb.period, hb.timeout) == (1.0, 3.0)
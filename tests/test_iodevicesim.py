@@ -0,0 +1,194 @@
+from concurrent.futures import Future
+
+from iodevicesim import HostWorker, changed_runs
+from modbus_pipeline import MAX_READ_COUNT, MAX_READ_GAP, MAX_WRITE_COUNT, merge_ranges
+
+
+# -----------------------------
+# merge_ranges（読み出し範囲のまとめ）
+# -----------------------------
+def test_merge_ranges_empty():
+    assert merge_ranges([], 16, 125) == []
+
+
+def test_merge_ranges_sorts_and_dedups():
+    assert merge_ranges([5, 3, 4, 3], 16, 125) == [(3, 3)]
+
+
+def test_merge_ranges_gap():
+    # 終端 (start + count) から max_gap 以内なら同じ範囲にまとめる
+    assert merge_ranges([0, 17], 16, 125) == [(0, 18)]
+    assert merge_ranges([0, 18], 16, 125) == [(0, 1), (18, 1)]
+
+
+def test_merge_ranges_max_count():
+    ranges = merge_ranges(range(300), MAX_READ_GAP['reg'], MAX_READ_COUNT['reg'])
+    assert ranges == [(0, 125), (125, 125), (250, 50)]
+    assert all(count <= MAX_READ_COUNT['reg'] for _, count in ranges)
+
+
+def test_merge_ranges_covers_all_addresses():
+    addrs = [1, 2, 40, 41, 100, 1000, 1001, 10000]
+    ranges = merge_ranges(addrs, MAX_READ_GAP['reg'], MAX_READ_COUNT['reg'])
+    for addr in addrs:
+        assert any(start <= addr < start + count for start, count in ranges)
+
+
+# -----------------------------
+# changed_runs（mirror ルールの差分書き込み）
+# -----------------------------
+def test_changed_runs_none_changed():
+    assert changed_runs([1, 2, 3], [1, 2, 3], 123) == []
+
+
+def test_changed_runs_separate_runs():
+    last = [0] * 10
+    values = [0, 1, 1, 0, 0, 0, 1, 0, 1, 1]
+    assert changed_runs(values, last, 123) == [(1, 2), (6, 1), (8, 2)]
+
+
+def test_changed_runs_split_at_max_count():
+    values = [1] * 300
+    last = [0] * 300
+    runs = changed_runs(values, last, MAX_WRITE_COUNT['reg'])
+    assert runs == [(0, 123), (123, 123), (246, 54)]
+
+
+def test_changed_runs_first_write():
+    # まだ書いていない（last が None の並び）ときは全体が1区間
+    assert changed_runs([0, 0, 0], [None] * 3, 123) == [(0, 3)]
+
+
+# -----------------------------
+# HostWorker の書き込み（送る前のまとめ）
+# -----------------------------
+def hr(address):
+    return {'type': 'hr', 'host': '127.0.0.1', 'port': 1, 'address': address}
+
+
+def coil(address):
+    return {'type': 'coil', 'host': '127.0.0.1', 'port': 1, 'address': address}
+
+
+def make_worker(batches):
+    # 接続はせず、_write_batch に渡るバッチだけを見る
+    worker = HostWorker('127.0.0.1', 1, [], 10000, log=lambda msg: None)
+    worker._write_batch = batches.append
+    return worker
+
+
+def test_flush_waits_while_previous_batch_runs():
+    batches = []
+    worker = make_worker(batches)
+    worker.writing = Future()   # 前のバッチを送っている途中
+    worker.queue_write(hr(5), 1)
+    worker.flush_writes()
+    worker.queue_write(hr(5), 2)
+    worker.queue_write(hr(6), 3)
+    worker.flush_writes()
+    # 投入せず、同じアドレスは新しい値で置き換える
+    assert worker.writing.done() is False
+    assert worker.writes_coalesced == 1
+    assert {k: v[1] for k, v in worker.unsent.items()} == {('reg', 5): 2, ('reg', 6): 3}
+
+    worker._write_pending()
+    assert worker.unsent == {}
+    assert batches == [[(hr(5), 5, [2], False), (hr(6), 6, [3], False)]]
+    worker.executor.shutdown()
+
+
+def test_pending_blocks_regrouped_into_runs():
+    batches = []
+    worker = make_worker(batches)
+    worker.writing = Future()
+    worker.queue_write_block(hr(0), 10, [1, 2, 3])
+    worker.queue_write_block(hr(0), 13, [4, 5])
+    worker.queue_write_block(hr(0), 20, [6])
+    worker.queue_write_block(coil(0), 10, [True, False])
+    worker.flush_writes()
+    worker._write_pending()
+    assert [(node['type'], address, values) for node, address, values, _ in batches[0]] == [
+        ('coil', 10, [True, False]),
+        ('hr', 10, [1, 2, 3, 4, 5]),
+        ('hr', 20, [6]),
+    ]
+    worker.executor.shutdown()
+
+
+def test_pending_block_split_at_max_write_count():
+    batches = []
+    worker = make_worker(batches)
+    worker.writing = Future()
+    worker.queue_write_block(hr(0), 0, list(range(300)))
+    worker.flush_writes()
+    worker._write_pending()
+    assert [(address, len(values)) for _, address, values, _ in batches[0]] == [(0, 123), (123, 123), (246, 54)]
+    worker.executor.shutdown()
+
+
+# -----------------------------
+# HostWorker の書き込み抑制（直近の周期読み出しで読み返した値だけを使う）
+# -----------------------------
+class FakeClient:
+    connected = True
+
+    def __init__(self, read_results):
+        self.read_results = read_results
+        self.sent = 0
+
+    def execute(self, requests):
+        if self.read_results is not None:
+            results, self.read_results = self.read_results, None
+            return results
+        self.sent += len(requests)
+        return [[0]] * len(requests)
+
+
+def make_reading_worker(registers):
+    worker = HostWorker('127.0.0.1', 1, [('reg', 10, len(registers))], 10000, log=lambda msg, level=None: None)
+    worker.client = FakeClient([registers])
+    worker._read_cycle(poll_hb=False)
+    return worker
+
+
+def write(worker, node, value):
+    worker._write_batch([(node, node['address'], [value], False)])
+
+
+def test_suppress_only_against_readback():
+    worker = make_reading_worker([5, 7])
+    write(worker, hr(10), 5)
+    assert (worker.writes_suppressed, worker.client.sent) == (1, 0)
+    write(worker, hr(10), 6)
+    assert worker.client.sent == 1
+    # 書いたアドレスは次に読み返すまで抑制しない（他の装置が戻したかもしれない）
+    write(worker, hr(10), 6)
+    write(worker, hr(10), 5)
+    assert worker.client.sent == 3
+    worker.executor.shutdown()
+
+
+def test_no_suppress_outside_read_plan():
+    worker = make_reading_worker([5, 7])
+    write(worker, hr(50), 1)
+    write(worker, hr(50), 1)
+    assert worker.client.sent == 2
+    assert worker.writes_suppressed == 0
+    worker.executor.shutdown()
+
+
+def test_no_suppress_for_inject():
+    worker = make_reading_worker([5, 7])
+    write(worker, coil(3), True)
+    write(worker, coil(3), True)
+    assert worker.client.sent == 2
+    worker.executor.shutdown()
+
+
+def test_readback_replaced_each_cycle():
+    worker = make_reading_worker([5, 7])
+    worker.client.read_results = [None]   # この周期は範囲を読めなかった
+    worker._read_cycle(poll_hb=False)
+    write(worker, hr(10), 5)
+    assert worker.client.sent == 1
+    worker.executor.shutdown()
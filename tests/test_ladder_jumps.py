@@ -0,0 +1,127 @@
+import pytest
+
+from ladder_compiler import get_compiler, link_jumps
+
+
+def compile_lines(lines):
+    compiler = get_compiler()
+    return [compiler.compile_line(line) for line in lines]
+
+
+# -----------------------------
+# link_jumps（飛び先の解決）
+# -----------------------------
+def test_link_jumps_resolves_end_and_resets():
+    rungs = link_jumps(compile_lines([
+        "[ M0 ] --(MC N0)",
+        "[ X0 ] --(Y0)",
+        "[ X1 ] --(TON T0 100)",
+        "[ X2 ] --(D0 = D0 + 1)",
+        "MCR N0",
+        "[ M1 ] --(CJ P1)",
+        "[ X3 ] --(Y1)",
+        "LABEL P1",
+    ]))
+    mc, cj = rungs[0]["jump"], rungs[5]["jump"]
+    assert (mc["type"], mc["end"], mc["mode"]) == ("MC", 4, "reset")
+    # reset で戻すのはコイルと TON だけ（D はそのまま）
+    assert [(i, out["type"]) for i, out in mc["resets"]] == [(1, "COIL"), (2, "TON")]
+    assert (cj["type"], cj["end"], cj["mode"]) == ("CJ", 7, "hold")
+    assert cj["resets"] == []
+    assert mc["active"] is None
+
+
+def test_link_jumps_explicit_mode():
+    rungs = link_jumps(compile_lines(["[ M0 ] --(MC N0 HOLD)", "[ X0 ] --(Y0)", "MCR N0"]))
+    assert rungs[0]["jump"]["mode"] == "hold"
+    assert rungs[0]["jump"]["resets"] == []
+
+
+@pytest.mark.parametrize("lines, message", [
+    (["[ M0 ] --(MC N0)", "[ X0 ] --(Y0)"], "without MCR N0"),
+    (["MCR N0", "[ M0 ] --(MC N0)"], "without MCR N0"),            # 後ろ向きは不可
+    (["[ M0 ] --(CJ P1)", "LABEL P2"], "without LABEL P1"),
+    (["[ M0 ] --(MC N0) --(Y0)", "MCR N0"], "only output"),
+])
+def test_link_jumps_errors(lines, message):
+    with pytest.raises(ValueError, match=message):
+        link_jumps(compile_lines(lines))
+
+
+# -----------------------------
+# スキャンでの動作
+# -----------------------------
+def test_mc_skips_and_resets_once(make_plc):
+    plc = make_plc({"rungs": [
+        "[ M0 ] --(MC N0)",
+        "[ TRUE ] --(Y0)",
+        "[ TRUE ] --(TON T0 100)",
+        "[ TRUE ] --(D0 = D0 + 1)",
+        "MCR N0",
+        "[ TRUE ] --(Y1)",
+    ]})
+    plc.mem.M[0] = True
+    plc.scan(plc.tasks[0])
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True and plc.mem.D[0] == 2
+    assert plc.mem.T["self.mem.T[0]"]["acc"] == 200
+
+    plc.mem.M[0] = False
+    plc.scan(plc.tasks[0])
+    # 区間は評価せず、コイル OFF・TON リセット。D はそのまま。区間の後ろは実行する
+    assert plc.mem.Y[0] is False
+    assert plc.mem.T["self.mem.T[0]"]["acc"] == 0
+    assert plc.mem.D[0] == 2
+    assert plc.mem.Y[1] is True
+
+    # reset は実行 -> スキップの変化時だけ（飛ばしている間に外から ON にしたコイルはそのまま）
+    plc.mem.Y[0] = True
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True
+
+
+def test_cj_holds_outputs(make_plc):
+    plc = make_plc({"rungs": [
+        "[ M1 ] --(CJ P1)",
+        "[ X0 ] --(Y0)",
+        "LABEL P1",
+    ]})
+    plc.mem.X[0] = True
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True
+    plc.mem.M[1] = True
+    plc.mem.X[0] = False
+    plc.scan(plc.tasks[0])
+    # CJ の既定は HOLD。飛ばしている間は X0 が OFF でも Y0 は ON のまま
+    assert plc.mem.Y[0] is True
+    plc.mem.M[1] = False
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is False
+
+
+def test_cj_reset_mode(make_plc):
+    plc = make_plc({"rungs": ["[ M1 ] --(CJ P1 RESET)", "[ TRUE ] --(Y0)", "LABEL P1"]})
+    plc.scan(plc.tasks[0])
+    plc.mem.M[1] = True
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is False
+
+
+def test_nested_mc(make_plc):
+    plc = make_plc({"rungs": [
+        "[ M0 ] --(MC N0)",
+        "[ M1 ] --(MC N1)",
+        "[ TRUE ] --(Y0)",
+        "MCR N1",
+        "[ TRUE ] --(Y1)",
+        "MCR N0",
+    ]})
+    plc.mem.M[0] = plc.mem.M[1] = True
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True and plc.mem.Y[1] is True
+    plc.mem.M[1] = False
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is False and plc.mem.Y[1] is True
+    plc.mem.M[0] = False
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[1] is False
@@ -0,0 +1,84 @@
+import pytest
+
+import orchestrator
+
+
+# -----------------------------
+# info（show_plc_memory_status）は state_lock の外で I/O を行う
+# -----------------------------
+class FakeResponse:
+    def isError(self):
+        return True
+
+
+class FakeClient:
+    def __init__(self, host, port, timeout):
+        assert not orchestrator.state_lock.locked(), "Modbus connect under state_lock"
+
+    def connect(self):
+        assert not orchestrator.state_lock.locked()
+        return True
+
+    def read_holding_registers(self, address, count):
+        assert not orchestrator.state_lock.locked(), "Modbus read under state_lock"
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+def test_info_io_outside_state_lock(tmp_path, monkeypatch, capsys):
+    plc_yaml = tmp_path / "plc.yaml"
+    plc_yaml.write_text("kind: plc\nmemory: {}\nmodbus: {port: 15099}\nhistory: true\n", encoding="utf-8")
+    queries = []
+
+    def query(host, port, req):
+        assert not orchestrator.state_lock.locked(), "history query under state_lock"
+        queries.append(port)
+        raise OSError("refused")
+
+    monkeypatch.setattr(orchestrator, "ModbusTcpClient", FakeClient)
+    monkeypatch.setattr(orchestrator.plc_history, "query", query)
+    monkeypatch.setitem(orchestrator.svc_map, "plc_t", {
+        "name": "plc_t", "type": "plc", "args": [str(plc_yaml)],
+        "ready_check": {"kind": "modbus", "host": "127.0.0.1", "port": 15099},
+    })
+    orchestrator.show_plc_memory_status("plc_t")
+    assert queries == [15099 + 10000]
+    assert "history unavailable" in capsys.readouterr().out
+
+
+# -----------------------------
+# スキャン健全性: 稼働秒数の 16bit 周回は再起動とみなさない
+# -----------------------------
+@pytest.fixture
+def prober(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(orchestrator.time, "time", lambda: clock["now"])
+    p = orchestrator.ReadinessProber()
+    p.clock = clock
+    yield p
+    p.executor.shutdown(wait=False)
+
+
+def probe(p, advance, hb, scans, uptime):
+    p.clock["now"] += advance
+    p.check_scan_health("plc", {"timeout_s": 3.0}, hb, scans, uptime)
+    return p.health["plc"]["state"]
+
+
+def test_uptime_wrap_is_not_restart(prober):
+    assert probe(prober, 0, 1, 100, 65534) == "STARTING"
+    # 3秒後、稼働秒数は 65537 & 0xFFFF = 1 に周回している
+    assert probe(prober, 3, 2, 400, 1) == "OK"
+    assert probe(prober, 3, 3, 700, 4) == "OK"
+
+
+def test_uptime_reset_is_restart(prober):
+    assert probe(prober, 0, 1, 100, 500) == "STARTING"
+    assert probe(prober, 3, 2, 400, 503) == "OK"
+    # 再起動: 稼働秒数が 0 から数え直される
+    assert probe(prober, 3, 1, 10, 1) == "STARTING"
+    # 起動直後の再起動（稼働秒数の進みが経過時間より小さい）
+    assert probe(prober, 3, 2, 300, 4) == "OK"
+    assert probe(prober, 10, 1, 10, 2) == "STARTING"
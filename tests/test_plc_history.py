@@ -0,0 +1,47 @@
+from event_trace import AREA_CODES, BLOCK_RECORDS, EV_COIL, EventRing
+from plc_history import HISTORY_PORT_OFFSET, PlcHistory, history_conf, query_port
+from plcsim import Memory
+
+
+def make_history(scans, per_scan=2):
+    mem = Memory(4, 4, 4, 4)
+    ring = EventRing(BLOCK_RECORDS)
+    for scan in range(1, scans + 1):
+        for i in range(per_scan):
+            ring.record(scan, EV_COIL, AREA_CODES["Y"], i, scan & 1)
+    mem.sys.scan_count = scans
+    return PlcHistory.from_config({"history": True}, mem, ring)
+
+
+def test_history_is_opt_in():
+    assert history_conf({}) is None
+    assert history_conf({"history": False}) is None
+    assert history_conf({"history": True}) == {}
+    assert history_conf({"history": {"port": 25030}}) == {"port": 25030}
+    assert query_port({"modbus": {"port": 15020}}) == 0
+    assert query_port({"history": True, "modbus": {"port": 15020}}) == 15020 + HISTORY_PORT_OFFSET
+
+
+def test_changes_in_range_and_limit():
+    history = make_history(100)
+    resp = history.changes(scans=10, limit=5)
+    assert resp["scan"] == 100
+    assert resp["total"] == 20
+    assert [e[0] for e in resp["events"]] == [98, 99, 99, 100, 100]
+    assert [e[3] for e in resp["events"]][-2:] == ["Y0", "Y1"]
+    assert resp["complete"] is True
+
+
+def test_changes_device_filter():
+    history = make_history(100)
+    resp = history.changes(scans=10, device="Y1", limit=3)
+    assert resp["total"] == 10
+    assert [(e[0], e[3], e[4]) for e in resp["events"]] == [(98, "Y1", 0), (99, "Y1", 1), (100, "Y1", 0)]
+
+
+def test_changes_reports_incomplete_after_wrap():
+    history = make_history(BLOCK_RECORDS)  # 2件ずつなのでリングは1周している
+    resp = history.changes(scans=BLOCK_RECORDS, limit=0)
+    assert resp["complete"] is False
+    assert resp["oldest_scan"] == BLOCK_RECORDS // 2 + 1
+    assert resp["total"] == len(resp["events"]) == BLOCK_RECORDS
@@ -0,0 +1,160 @@
+import pytest
+
+from plc_tasks import LadderTask, due_tasks, has_main_task, next_due, task_names
+
+
+def cyclic(period_ms=10, **conf):
+    return LadderTask.from_config({"name": "t", "period_ms": period_ms, **conf}, rungs=[])
+
+
+# -----------------------------
+# 周期と overruns
+# -----------------------------
+def test_on_time_runs_keep_phase():
+    task = cyclic(10)
+    task.record(due=0.0, start=0.0, end=0.004)
+    assert task.next_due == pytest.approx(0.010)
+    task.record(due=0.010, start=0.011, end=0.013)
+    # 開始が遅れても次の予定は周期の開始時刻が基準
+    assert task.next_due == pytest.approx(0.020)
+    assert task.overruns == 0
+    assert task.max_delay_s == pytest.approx(0.001)
+
+
+def test_overrun_restarts_from_end():
+    task = cyclic(10)
+    task.record(due=0.0, start=0.0, end=0.025)
+    # 次の周期までに終わらなかったら数え、追いつこうとせず終わった時刻から数え直す
+    assert task.overruns == 1
+    assert task.next_due == pytest.approx(0.025)
+    task.record(due=0.025, start=0.025, end=0.027)
+    assert task.overruns == 1
+    assert task.next_due == pytest.approx(0.035)
+
+
+def test_run_statistics():
+    task = cyclic(10)
+    task.record(due=0.0, start=0.0, end=0.002)
+    task.record(due=0.010, start=0.010, end=0.014)
+    assert task.runs == 2
+    assert task.last_s == pytest.approx(0.004)
+    assert task.max_s == pytest.approx(0.004)
+    assert task.avg_s == pytest.approx(0.002 + (0.004 - 0.002) * 0.1)
+
+
+def test_registers():
+    task = cyclic(10, priority=3)
+    task.record(due=0.0, start=0.0, end=0.025)
+    period_ms, priority, runs, last_us, avg_us, max_us, overruns, max_delay_us = task.registers()
+    assert (period_ms, priority, runs, overruns) == (10, 3, 1, 1)
+    assert last_us == max_us == 25000
+    # 16bit に収まらない値は 0xFFFF で止める
+    task.record(due=0.0, start=0.0, end=1.0)
+    assert task.registers()[3] == 0xFFFF
+
+
+def test_due_tasks_and_next_due():
+    a, b = cyclic(10), cyclic(50)
+    assert due_tasks([a, b], now=0.0) == [a, b]   # 初回はすぐ実行
+    a.next_due, b.next_due = 1.0, 2.0
+    assert due_tasks([a, b], now=1.5) == [a]
+    assert next_due([a, b]) == 1.0
+
+
+# -----------------------------
+# 設定
+# -----------------------------
+@pytest.mark.parametrize("conf", [
+    {"period_ms": 0},
+    {"period_ms": "10"},
+    {},
+    {"event": "Y0"},
+    {"event": "X0", "edge": "up"},
+])
+def test_invalid_task_config(conf):
+    with pytest.raises(ValueError):
+        LadderTask.from_config({"name": "t", **conf}, rungs=[])
+
+
+def test_main_task_and_names():
+    assert has_main_task({"rungs": ["[ X0 ] --(Y0)"]})
+    assert has_main_task({"tasks": [{"name": "ev", "event": "X0"}]})
+    assert not has_main_task({"tasks": [{"name": "fast", "period_ms": 10}]})
+    data = {"rungs": ["[ X0 ] --(Y0)"], "tasks": [{"name": "fast", "period_ms": 10}]}
+    assert task_names(data) == ["main", "fast"]
+
+
+def test_tasks_run_in_priority_order(make_plc):
+    plc = make_plc({"tasks": [
+        {"name": "slow", "period_ms": 100, "priority": 20, "rungs": ["[ M0 ] --(M1)"]},
+        {"name": "fast", "period_ms": 10, "priority": 0, "rungs": ["[ X0 ] --(M0)"]},
+    ]})
+    assert [t.name for t in plc.task_order] == ["fast", "slow"]
+    assert plc.tick_period == pytest.approx(0.010)
+    plc.mem.X[0] = True
+    assert plc.tick()
+    # 同じスキャンでは fast の結果を slow が読む
+    assert plc.mem.M[1] is True
+    assert plc.mem.sys.scan_count == 1
+
+
+# -----------------------------
+# イベントタスク
+# -----------------------------
+PULSE_LADDER = {
+    "rungs": ["[ Y0 ] --(Y0)"],
+    "tasks": [{"name": "pulse_catch", "event": "X0", "edge": "rising", "rungs": ["[ X0 OR Y0 ] --(Y0)"]}],
+}
+
+
+def test_interrupt_queues_and_tick_runs(make_plc):
+    plc = make_plc(PULSE_LADDER)
+    plc.tick()
+    woken = []
+    plc.notify = lambda: woken.append(True)
+
+    plc.mem.X[0] = True
+    plc.interrupt(0, True)
+    # 呼び出したスレッドでは実行せず、積んでスキャンのスレッドを起こすだけ
+    assert woken == [True]
+    assert plc.mem.Y[0] is False
+    plc.mem.X[0] = False
+    plc.interrupt(0, False)
+
+    # 周期が来ていなくても、tick の先頭で積んだ変化を順に処理する（falling は起動しない）
+    assert plc.tick() is False
+    assert plc.mem.Y[0] is True
+    task = plc.tasks[1]
+    assert task.runs == 1
+    assert plc.mem.sys.scan_count == 1
+    assert not plc.pending_events
+
+
+def test_interrupt_ignores_other_inputs(make_plc):
+    plc = make_plc(PULSE_LADDER)
+    plc.notify = lambda: pytest.fail("woken for X1")
+    plc.interrupt(1, True)
+    assert not plc.pending_events
+
+
+def test_set_physical_input_triggers_event_task(make_plc):
+    plc = make_plc(PULSE_LADDER)
+    plc.set_physical_input(0, True)
+    assert plc.wakeup.is_set()
+    plc.tick()
+    assert plc.mem.Y[0] is True
+
+
+def test_ton_rejected_in_event_task():
+    from ladder_compiler import get_compiler
+    from plcsim import compile_charts, compile_rungs
+
+    compiler = get_compiler()
+    conf = {"name": "ev", "event": "X0"}
+    with pytest.raises(ValueError, match="TON"):
+        LadderTask.from_config(conf, compile_rungs(["[ X0 ] --(TON T0 100)"], compiler))
+    sfc = [{"name": "c", "steps": [{"name": "s", "actions": ["[ TRUE ] --(TON T1 100)"]}]}]
+    with pytest.raises(ValueError, match="TON"):
+        LadderTask.from_config(conf, [], charts=compile_charts(sfc, compiler))
+    # 周期タスクでは使える
+    LadderTask.from_config({"name": "cyc", "period_ms": 10}, compile_rungs(["[ X0 ] --(TON T0 100)"], compiler))
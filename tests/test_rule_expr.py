@@ -0,0 +1,76 @@
+import pytest
+
+from rule_expr import ACTION_OPS, ExprError, compile_expr
+
+
+# -----------------------------
+# 使える式
+# -----------------------------
+def test_arithmetic_and_compare():
+    fn = compile_expr("raw * 10 + offset", ["raw", "offset"])
+    assert fn(3, 5) == 35
+    when = compile_expr("level > 500 and stop == 0", ["level", "stop"])
+    assert when(600, 0) is True
+    assert when(600, 1) is False
+
+
+def test_args_follow_names_order():
+    fn = compile_expr("a - b", ["b", "a"])
+    assert fn(1, 10) == 9
+
+
+def test_functions_and_ifexp():
+    fn = compile_expr("max(0, min(100, x)) if enable else -1", ["x", "enable"])
+    assert fn(150, True) == 100
+    assert fn(-5, True) == 0
+    assert fn(50, False) == -1
+    assert compile_expr("abs(int(x)) + round(y)", ["x", "y"])(-2.7, 1.4) == 3
+
+
+def test_bool_constants():
+    assert compile_expr("x or False", ["x"])(True) is True
+
+
+# -----------------------------
+# 使えない式（設定読み込み時に ExprError）
+# -----------------------------
+@pytest.mark.parametrize("text", [
+    "x.__class__",                      # 属性参照
+    "x[0]",                             # 添字
+    "__import__('os')",                 # 任意の関数呼び出し / 文字列
+    "open('f')",
+    "(lambda: 1)()",
+    "[x for x in y]",
+    "max(x, key=abs)",                  # キーワード引数
+    "'abc'",                            # 数値以外の定数
+    "x := 1",
+])
+def test_rejected_nodes(text):
+    with pytest.raises(ExprError):
+        compile_expr(text, ["x", "y"])
+
+
+def test_unknown_name():
+    with pytest.raises(ExprError, match="unknown name 'z'"):
+        compile_expr("x + z", ["x"])
+
+
+def test_syntax_error_mentions_where():
+    with pytest.raises(ExprError, match="rule1.when: syntax error"):
+        compile_expr("x +", ["x"], where="rule1.when")
+
+
+def test_no_builtins_at_runtime():
+    # 許可した関数以外の組み込みは実行時にも見えない
+    fn = compile_expr("x", ["x"])
+    assert "__import__" not in fn.__globals__["__builtins__"]
+
+
+def test_expr_error_is_value_error():
+    assert issubclass(ExprError, ValueError)
+
+
+def test_action_ops():
+    assert ACTION_OPS["increment"](5, 2) == 7
+    assert ACTION_OPS["decrement"](1, 5) == 0
+    assert ACTION_OPS["set"](5, 9) == 9
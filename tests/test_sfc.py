@@ -0,0 +1,163 @@
+import pytest
+
+from event_trace import AREA_CODES, EV_STEP
+from ladder_compiler import get_compiler
+from plcsim import compile_charts, load_ladder_yaml
+
+MOLDING = {"sfc": [{
+    "name": "molding",
+    "initial": "idle",
+    "steps": [
+        {"name": "idle"},
+        {"name": "press", "flag": "M0", "actions": ["[ TRUE ] --(Y0)", "[ TRUE ] --(TON T0 200)"]},
+        {"name": "eject", "actions": ["[ TRUE ] --(Y1)"]},
+    ],
+    "transitions": [
+        {"from": "idle", "to": "press", "when": "X0"},
+        {"from": "press", "to": "eject", "when": "T0"},
+        {"from": "eject", "to": "idle", "when": "X1"},
+    ],
+}]}
+
+
+def active(plc, chart=0):
+    return [s.name for s in plc.tasks[0].charts[chart].active]
+
+
+# -----------------------------
+# 設定
+# -----------------------------
+@pytest.mark.parametrize("conf, message", [
+    ({"steps": [{"name": "a"}]}, "without name"),
+    ({"name": "c", "steps": []}, "no steps"),
+    ({"name": "c", "steps": [{"name": "a"}, {"name": "a"}]}, "duplicate step"),
+    ({"name": "c", "steps": [{"name": "a", "flag": "D0"}]}, "flag must be M or Y"),
+    ({"name": "c", "steps": [{"name": "a"}], "transitions": [{"from": "a", "to": "b", "when": "X0"}]}, "unknown step"),
+    ({"name": "c", "steps": [{"name": "a"}], "transitions": [{"from": "a", "to": "a"}]}, "without when"),
+])
+def test_invalid_chart(conf, message):
+    with pytest.raises(ValueError, match=message):
+        compile_charts([conf], get_compiler())
+
+
+# -----------------------------
+# 遷移
+# -----------------------------
+def test_runs_only_active_step(make_plc):
+    plc = make_plc(MOLDING)
+    plc.tick()
+    assert active(plc) == ["idle"]
+    assert plc.mem.Y[0] is False
+
+    plc.mem.X[0] = True
+    plc.scan(plc.tasks[0])
+    # 遷移したスキャンでは、新しいステップの actions はまだ実行しない
+    assert active(plc) == ["press"]
+    assert plc.mem.M[0] is True and plc.mem.Y[0] is False
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True
+    # flag の変化は STEP として記録する
+    assert (EV_STEP, AREA_CODES["M"], 0, 1) in [r[3:] for r in plc.events.records()]
+
+
+def test_stopping_step_resets_outputs(make_plc):
+    plc = make_plc(MOLDING)
+    plc.mem.X[0] = True
+    for _ in range(4):
+        plc.scan(plc.tasks[0])
+    assert active(plc) == ["eject"]
+    # press を止めたのでコイル OFF・TON リセット・flag OFF
+    assert plc.mem.Y[0] is False
+    assert plc.mem.T["self.mem.T[0]"]["acc"] == 0
+    assert plc.mem.M[0] is False
+    assert plc.tasks[0].charts[0].fired == 2
+
+
+def test_divergence_and_convergence(make_plc):
+    plc = make_plc({"sfc": [{
+        "name": "par",
+        "steps": [{"name": "start"}, {"name": "a", "actions": ["[ TRUE ] --(Y0)"]},
+                  {"name": "b", "actions": ["[ TRUE ] --(Y1)"]}, {"name": "done", "flag": "M5"}],
+        "transitions": [
+            {"from": "start", "to": ["a", "b"], "when": "X0"},
+            {"from": ["a", "b"], "to": "done", "when": "X1"},
+        ],
+    }]})
+    plc.mem.X[0] = True
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["a", "b"]
+    plc.scan(plc.tasks[0])
+    assert plc.mem.Y[0] is True and plc.mem.Y[1] is True
+    plc.mem.X[1] = True
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["done"]
+    assert plc.mem.Y[0] is False and plc.mem.Y[1] is False and plc.mem.M[5] is True
+
+
+def test_first_written_transition_wins(make_plc):
+    plc = make_plc({"sfc": [{
+        "name": "c",
+        "steps": [{"name": "s"}, {"name": "a"}, {"name": "b"}],
+        "transitions": [{"from": "s", "to": "a", "when": "X0"}, {"from": "s", "to": "b", "when": "X0"}],
+    }]})
+    plc.mem.X[0] = True
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["a"]
+
+
+# -----------------------------
+# 起動 / リロード
+# -----------------------------
+def test_resume_from_flag_and_clear_other_steps(make_plc):
+    plc = make_plc(MOLDING)
+    # warm start で press の flag と、前回動いていた eject のコイルが残っている
+    plc.mem.M[0] = True
+    plc.mem.Y[1] = True
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["press"]
+    assert plc.mem.Y[1] is False
+    assert plc.mem.Y[0] is True
+
+
+def test_restart_at_initial_clears_stale_coils(make_plc):
+    plc = make_plc(MOLDING)
+    plc.mem.Y[1] = True    # eject（flag なし）の途中で止まった
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["idle"]
+    assert plc.mem.Y[1] is False
+
+
+def test_reload_keeps_active_step_by_name(make_plc, tmp_path):
+    plc = make_plc(MOLDING)
+    plc.mem.X[0] = True
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["press"]
+    plc.set_tasks(load_ladder_yaml(write_ladder(tmp_path, MOLDING), get_compiler()))
+    assert active(plc) == ["press"]
+    assert plc.tasks[0].charts[0].fired == 1
+
+
+def test_reload_clears_dropped_step(make_plc, tmp_path):
+    plc = make_plc(MOLDING)
+    plc.mem.X[0] = True
+    plc.mem.X[1] = False
+    for _ in range(4):
+        plc.scan(plc.tasks[0])
+    assert active(plc) == ["eject"] and plc.mem.Y[1] is True
+
+    # eject を無くしたプログラムへ差し替える
+    chart = dict(MOLDING["sfc"][0])
+    chart["steps"] = chart["steps"][:2]
+    chart["transitions"] = [chart["transitions"][0], {"from": "press", "to": "idle", "when": "T0"}]
+    plc.set_tasks(load_ladder_yaml(write_ladder(tmp_path, {"sfc": [chart]}), get_compiler()))
+    plc.mem.X[0] = False
+    plc.scan(plc.tasks[0])
+    assert active(plc) == ["idle"]
+    assert plc.mem.Y[1] is False
+
+
+def write_ladder(tmp_path, ladder):
+    import yaml
+    path = tmp_path / "reload.yaml"
+    path.write_text(yaml.safe_dump({"kind": "ladder", **ladder}), encoding="utf-8")
+    return str(path)
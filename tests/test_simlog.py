@@ -0,0 +1,93 @@
+import ast
+import os
+import re
+
+import pytest
+
+from simlog import DEBUG, ERROR, FATAL, INFO, WARN, Logger, parse_level
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAG_RE = re.compile(r"\[(DEBUG|WARN|ERROR|FATAL)\]")
+
+
+def read_log(logger):
+    logger.close()
+    with open(logger.path, encoding="utf-8") as f:
+        return f.read()
+
+
+# -----------------------------
+# レベル
+# -----------------------------
+def test_parse_level():
+    assert parse_level("warn") == WARN
+    assert parse_level("FATAL") == FATAL
+    assert parse_level(None) == INFO
+    with pytest.raises(ValueError):
+        parse_level("verbose")
+
+
+@pytest.mark.parametrize("level, kept, dropped", [
+    ("DEBUG", ["[DEBUG]", "info", "[WARN]", "[ERROR]", "[FATAL]"], []),
+    ("INFO", ["info", "[WARN]", "[ERROR]", "[FATAL]"], ["[DEBUG]"]),
+    ("WARN", ["[WARN]", "[ERROR]", "[FATAL]"], ["[DEBUG]", "info"]),
+    ("FATAL", ["[FATAL]"], ["[DEBUG]", "info", "[WARN]", "[ERROR]"]),
+])
+def test_level_filter(tmp_path, level, kept, dropped):
+    logger = Logger.from_config("lv", {"log_dir": str(tmp_path), "log_level": level, "log_console": False})
+    logger.log("[DEBUG] Write Discrete (Injected) -> X0", level=DEBUG)
+    logger.log("info line")
+    logger.warn("[WARN] PLC communication error")
+    logger.error("[ERROR] Loop error")
+    logger.fatal("[FATAL] PLC heartbeat stopped")
+    text = read_log(logger)
+    for tag in kept:
+        assert tag in text
+    for tag in dropped:
+        assert tag not in text
+
+
+def tagged_log_calls():
+    """リポジトリ直下のモジュールで、[DEBUG] などの tag を付けてログに出している呼び出し"""
+    for name in sorted(os.listdir(ROOT)):
+        if not name.endswith(".py") or name == "ladder_parser.py":
+            continue
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            func = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, "id", "")
+            if func not in ("log", "write"):
+                continue
+            text = "".join(
+                part.value for arg in node.args for part in ast.walk(arg)
+                if isinstance(part, ast.Constant) and isinstance(part.value, str)
+            )
+            m = TAG_RE.search(text)
+            if m:
+                yield name, node.lineno, m.group(1), node
+
+
+def test_tagged_messages_pass_their_level():
+    calls = list(tagged_log_calls())
+    assert calls
+    for name, lineno, tag, node in calls:
+        levels = [kw.value for kw in node.keywords if kw.arg == "level"]
+        assert levels and getattr(levels[0], "id", None) == tag, f"{name}:{lineno} [{tag}] without level={tag}"
+
+
+
+# -----------------------------
+# 切り替え
+# -----------------------------
+def test_rotation_counts_utf8_bytes(tmp_path):
+    logger = Logger("rot", str(tmp_path), console=False, max_bytes=4096, backups=2)
+    for i in range(100):
+        logger.log(f"{i:03d} スキャン周期を超えました（日本語のメッセージ）")
+    path = logger.path
+    logger.close()
+    files = [path] + [f"{path}.{i}" for i in (1, 2) if os.path.exists(f"{path}.{i}")]
+    assert len(files) == 3
+    for f in files:
+        assert os.path.getsize(f) <= 4096
@@ -0,0 +1,242 @@
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import traceback
+
+# -----------------------------
+# Zygote ランチャー（orchestrator 用）
+# -----------------------------
+# サービスを Popen で起動すると、そのたびに新しいインタプリタが pymodbus / yaml /
+# ladder_parser を import し、Lark パーサーを組み立てる。自動再起動でも同じ。
+# zygote はこれらを1度だけ読み込んだ状態で待機し、起動要求ごとに fork する。
+#
+#   orchestrator --(stdin: {"cmd": "spawn", "id", "script", "args"})--> zygote
+#   orchestrator <--(stdout: {"id", "pid"} / {"exit": pid, "code"})---- zygote
+#
+# fork した子の親は zygote なので、終了の回収（waitpid）は zygote が行い、
+# 終了コードを orchestrator へ通知する。kill / terminate は orchestrator が
+# pid に直接シグナルを送る。
+#
+# zygote 自身はスレッドを持たない（スレッドのあるプロセスの fork は安全でないため）。
+
+# fork で起動できるスクリプト -> モジュール名（main() を持つこと）
+ZYGOTE_SCRIPTS = {
+    "plcsim.py": "plcsim",
+    "devicesim.py": "devicesim",
+    "iodevicesim.py": "iodevicesim",
+}
+
+REAP_INTERVAL = 0.1  # 子プロセスの終了を確認する間隔 [s]
+
+
+# -----------------------------
+# zygote 側
+# -----------------------------
+def preload():
+    """fork 前に重いモジュールとラダーパーサーを読み込んでおく"""
+    import importlib
+    import ladder_compiler
+
+    modules = {script: importlib.import_module(name) for script, name in ZYGOTE_SCRIPTS.items()}
+    ladder_compiler.get_compiler()
+    return modules
+
+
+def run_child(module, script, args):
+    """fork した子プロセスでサービスの main() を実行し、終了コードで抜ける"""
+    code = 0
+    try:
+        os.setsid()
+        for sig in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT, signal.SIGPIPE):
+            signal.signal(sig, signal.SIG_DFL)
+        # zygote と orchestrator の間のパイプは子に持たせない
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.close(devnull)
+
+        import random
+        random.seed()  # 乱数状態は zygote から引き継がれるため子ごとに初期化
+        sys.argv = [script] + list(args)
+        module.main()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            import simlog
+            simlog.flush_all()  # _exit では atexit が走らないため、キューのログをここで書き出す
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except Exception:
+            pass
+        # 親から引き継いだ atexit やバッファを実行しないよう _exit で抜ける
+        os._exit(code)
+
+
+def serve():
+    modules = preload()
+    out = sys.stdout
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C は orchestrator が処理する
+
+    def send(msg):
+        out.write(json.dumps(msg) + "\n")
+        out.flush()
+
+    def reap():
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            send({"exit": pid, "code": os.waitstatus_to_exitcode(status)})
+
+    send({"ready": True, "pid": os.getpid()})
+    stdin = sys.stdin.buffer
+    buf = b""
+    while True:
+        readable, _, _ = select.select([stdin], [], [], REAP_INTERVAL)
+        if readable:
+            data = os.read(stdin.fileno(), 65536)
+            if not data:
+                break  # orchestrator が終了した
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if not line.strip():
+                    continue
+                req = json.loads(line)
+                module = modules.get(os.path.basename(req["script"]))
+                if module is None:
+                    send({"id": req["id"], "error": f"unsupported script: {req['script']}"})
+                    continue
+                pid = os.fork()
+                if pid == 0:
+                    run_child(module, req["script"], req.get("args", []))
+                send({"id": req["id"], "pid": pid})
+        reap()
+
+
+# -----------------------------
+# orchestrator 側
+# -----------------------------
+class ZygoteProcess:
+    """zygote が fork した子プロセス（subprocess.Popen と同じ poll / kill / terminate を持つ）"""
+
+    def __init__(self, zygote, pid):
+        self.zygote = zygote
+        self.pid = pid
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            self.returncode = self.zygote.exit_code(self.pid)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class Zygote:
+    def __init__(self, python=sys.executable, timeout=30.0):
+        self.timeout = timeout
+        self.proc = subprocess.Popen(
+            [python, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.replies = {}  # request id -> 応答
+        self.exits = {}    # pid -> 終了コード
+        self.next_id = 0
+        self.ready = False
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader.start()
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.ready or self.proc.poll() is not None, timeout):
+                raise RuntimeError("zygote did not become ready")
+            if not self.ready:
+                raise RuntimeError(f"zygote exited during preload (code={self.proc.returncode})")
+
+    @staticmethod
+    def supports(script):
+        return os.name == "posix" and os.path.basename(script) in ZYGOTE_SCRIPTS
+
+    @property
+    def alive(self):
+        return self.proc.poll() is None
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            msg = json.loads(line)
+            with self.cond:
+                if "exit" in msg:
+                    self.exits[msg["exit"]] = msg["code"]
+                elif "ready" in msg:
+                    self.ready = True
+                else:
+                    self.replies[msg["id"]] = msg
+                self.cond.notify_all()
+        with self.cond:
+            self.cond.notify_all()
+
+    def spawn(self, script, args):
+        with self.cond:
+            self.next_id += 1
+            req_id = self.next_id
+            self.proc.stdin.write((json.dumps(
+                {"cmd": "spawn", "id": req_id, "script": script, "args": list(args)}
+            ) + "\n").encode())
+            self.proc.stdin.flush()
+            if not self.cond.wait_for(lambda: req_id in self.replies or not self.alive, self.timeout):
+                raise RuntimeError(f"zygote did not answer spawn of {script}")
+            if not self.alive and req_id not in self.replies:
+                raise RuntimeError("zygote exited")
+            reply = self.replies.pop(req_id)
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return ZygoteProcess(self, reply["pid"])
+
+    def exit_code(self, pid):
+        with self.lock:
+            code = self.exits.get(pid)
+        if code is None and not self.alive:
+            # zygote がいなくなった後は回収されないため、生存だけ確認する
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return -1
+        return code
+
+    def close(self):
+        if self.alive:
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+if __name__ == "__main__":
+    serve()